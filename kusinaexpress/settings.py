@@ -1,5 +1,10 @@
+import json
+import os
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -39,8 +44,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'restaurant.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'restaurant.middleware.PrincipalMiddleware',
+    'restaurant.middleware.ReplicaPinningMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -48,11 +56,20 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Request metrics (restaurant/metrics.py). Every response carries a
+# Server-Timing header unless KX_SERVER_TIMING=0. /metrics answers
+# "Authorization: Bearer <KX_METRICS_TOKEN>" and logged-in admins; with no
+# token set it is open only when DEBUG is on.
+METRICS_SERVER_TIMING = os.environ.get('KX_SERVER_TIMING', '1') != '0'
+METRICS_TOKEN = os.environ.get('KX_METRICS_TOKEN', '')
+
 ROOT_URLCONF = 'kusinaexpress.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to MetricsMiddleware
+        'BACKEND': 'restaurant.metrics.InstrumentedTemplates',
+        'NAME': 'django',
         'DIRS': [BASE_DIR / 'restaurant' / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -85,6 +102,152 @@ DATABASES = {
     }
 }
 
+# Local development without MySQL: KX_DB_ENGINE=sqlite uses a SQLite file.
+# Run `manage.py migrate` and then `manage.py ensure_schema` to create the
+# unmanaged tables (users, orders, deliveries, ...) and their indexes.
+if os.environ.get('KX_DB_ENGINE') == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('KX_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+    }
+
+# Read replica (optional). KX_REPLICA_HOST / KX_REPLICA_NAME point the
+# 'replica' alias at a copy of the default database; catalog, dashboard,
+# export and history reads go there (see restaurant/routers.py). Locally a
+# second database (or SQLite file) works as a stand-in.
+if os.environ.get('KX_REPLICA_HOST') or os.environ.get('KX_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ.get('KX_REPLICA_HOST', DATABASES['default'].get('HOST', '')),
+        'NAME': os.environ.get('KX_REPLICA_NAME', DATABASES['default']['NAME']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Exports and analytics connection. export_orders and the menu export read
+# through the 'exports' alias (see restaurant/export_db.py): READ COMMITTED,
+# and every statement is cut off after EXPORT_STATEMENT_SECONDS so a huge
+# report fails fast instead of tying up the connections checkout uses.
+# It follows the replica when there is one; KX_EXPORTS_HOST / KX_EXPORTS_NAME
+# point it at another server.
+EXPORT_STATEMENT_SECONDS = float(os.environ.get('KX_EXPORT_STATEMENT_SECONDS', 30))
+_exports_base = DATABASES.get('replica', DATABASES['default'])
+DATABASES['exports'] = {
+    **_exports_base,
+    'HOST': os.environ.get('KX_EXPORTS_HOST', _exports_base.get('HOST', '')),
+    'NAME': os.environ.get('KX_EXPORTS_NAME', _exports_base['NAME']),
+    'TEST': {'MIRROR': 'default'},
+}
+if DATABASES['exports']['ENGINE'] == 'django.db.backends.mysql':
+    DATABASES['exports']['OPTIONS'] = {
+        **_exports_base.get('OPTIONS', {}),
+        'isolation_level': 'read committed',
+        'init_command': (
+            "SET sql_mode='STRICT_TRANS_TABLES', "
+            f"max_execution_time={int(EXPORT_STATEMENT_SECONDS * 1000)}"
+        ),
+    }
+
+# Branch shards. Orders, order items, deliveries and payments of each
+# kitchen branch live on its own database (see restaurant/shards.py); the
+# 'main' branch uses 'default'. Extra branches come from KX_BRANCH_SHARDS,
+# e.g. '{"north": {"index": 1, "NAME": "kusina_north", "HOST": "db-north"}}'
+# where index picks the branch's order ID range and the other keys override
+# the default database settings (NAME is a file path with KX_DB_ENGINE=sqlite).
+DEFAULT_BRANCH = 'main'
+BRANCH_SHARDS = {DEFAULT_BRANCH: {'alias': 'default', 'index': 0}}
+for _branch, _shard in json.loads(os.environ.get('KX_BRANCH_SHARDS', '{}')).items():
+    _shard = dict(_shard)
+    _index = _shard.pop('index')
+    DATABASES[f'shard_{_branch}'] = {**DATABASES['default'], **_shard}
+    BRANCH_SHARDS[_branch] = {'alias': f'shard_{_branch}', 'index': _index}
+
+DATABASE_ROUTERS = [
+    'restaurant.shards.ShardRouter',
+    'restaurant.export_db.ExportRouter',
+    'restaurant.routers.ReplicaRouter',
+]
+
+# After a write, the client reads from the primary for this long
+REPLICA_PIN_SECONDS = int(os.environ.get('KX_REPLICA_PIN_SECONDS', 5))
+
+# Logging: restaurant.* (exports, feedback flushes, ...) to the console
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'restaurant': {
+            'handlers': ['console'],
+            'level': os.environ.get('KX_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+# Test databases get the unmanaged tables too (see restaurant/test_runner.py)
+TEST_RUNNER = 'restaurant.test_runner.UnmanagedSchemaTestRunner'
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMemCache is per process. When running several workers, point these at a
+# shared local cache (e.g. KX_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache,
+# KX_CACHE_LOCATION=redis://127.0.0.1:6379) so invalidations reach every worker.
+# The throttle counters, principal credential versions and the catalog
+# version are shared by default: without KX_CACHE_BACKEND they live in a
+# directory every worker on the host uses (atomic add/incr).
+
+def _shared_cache(name):
+    if 'KX_CACHE_BACKEND' in os.environ:
+        return {
+            'BACKEND': os.environ['KX_CACHE_BACKEND'],
+            'LOCATION': os.environ.get(f'KX_{name.upper()}_CACHE_LOCATION', os.environ.get('KX_CACHE_LOCATION', '')),
+        }
+    return {
+        'BACKEND': 'restaurant.cache_backends.LockedFileCache',
+        'LOCATION': os.environ.get(
+            f'KX_{name.upper()}_CACHE_LOCATION', os.path.join(tempfile.gettempdir(), f'kusinaexpress-{name}'),
+        ),
+        # Culling would drop live throttle counters and versions
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('KX_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('KX_CACHE_LOCATION', 'kusinaexpress'),
+    },
+    'sessions': {
+        'BACKEND': os.environ.get('KX_SESSION_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('KX_SESSION_CACHE_LOCATION', 'kusinaexpress-sessions'),
+    },
+    'throttle': _shared_cache('throttle'),
+    'principals': _shared_cache('principals'),
+    'catalog': _shared_cache('catalog'),
+}
+
+
+# Sessions
+# 'cached': reads come from the sessions cache, and the DB is written only when
+# a session changes. 'db': every request reads django_session.
+# 'cached' needs a sessions cache every worker shares (KX_SESSION_CACHE_BACKEND):
+# over a per-process LocMemCache a logout on one worker would leave the session
+# valid in the others. It is the default only when such a cache is configured.
+
+_SHARED_SESSION_CACHE = CACHES['sessions']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache'
+SESSION_STORAGE_MODE = os.environ.get('KX_SESSION_STORAGE', 'cached' if _SHARED_SESSION_CACHE else 'db')
+if SESSION_STORAGE_MODE == 'cached' and not _SHARED_SESSION_CACHE:
+    raise ImproperlyConfigured(
+        "KX_SESSION_STORAGE=cached needs a shared sessions cache; set KX_SESSION_CACHE_BACKEND "
+        "(e.g. django.core.cache.backends.redis.RedisCache) and KX_SESSION_CACHE_LOCATION."
+    )
+SESSION_ENGINE = {
+    'cached': 'django.contrib.sessions.backends.cached_db',
+    'db': 'django.contrib.sessions.backends.db',
+}[SESSION_STORAGE_MODE]
+SESSION_CACHE_ALIAS = 'sessions'
+
 
 
 # Password validation
@@ -106,6 +269,25 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing load protection
+# Fixed-window counters per client IP and per email: (attempts per window, window seconds)
+
+PASSWORD_THROTTLE_RATES = {
+    'email': (5, 60),
+    'ip': (30, 60),
+}
+THROTTLE_USE_X_FORWARDED_FOR = False
+
+# Concurrent PBKDF2 hashes, and how many more may wait before requests are refused
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_QUEUE = 8
+
+# Feedback is queued per process and written with bulk_create once this many
+# are waiting or the oldest has waited this many seconds (1 = write at once)
+FEEDBACK_BUFFER_SIZE = int(os.environ.get('KX_FEEDBACK_BUFFER_SIZE', 200))
+FEEDBACK_FLUSH_SECONDS = float(os.environ.get('KX_FEEDBACK_FLUSH_SECONDS', 2.0))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
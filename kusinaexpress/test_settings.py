@@ -0,0 +1,16 @@
+"""
+Settings for the test suite: SQLite, with a second SQLite database standing
+in for a branch shard ('north', alias shard_north).
+
+    python manage.py test --settings=kusinaexpress.test_settings
+"""
+import json
+import os
+
+os.environ.setdefault('KX_DB_ENGINE', 'sqlite')
+os.environ.setdefault('KX_BRANCH_SHARDS', json.dumps({'north': {'index': 1, 'NAME': 'kx_shard_north.sqlite3'}}))
+
+from .settings import *  # noqa: E402,F401,F403
+
+# Hashing speed is not under test
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
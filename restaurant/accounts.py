@@ -0,0 +1,51 @@
+# restaurant/accounts.py
+#
+# Admin-side user directory.
+# - Prefix search on email / first name / last name (LIKE 'term%', so the
+#   users_*_idx indexes can serve it)
+# - Keyset pagination on (date_joined, user_id), newest first, so page N
+#   costs the same as page 1
+
+from django.db.models import Q
+
+from .models import Users
+from .pagination import decode_keyset, encode_keyset
+
+USER_PAGE_SIZE = 50
+USER_LIST_FIELDS = ['user_id', 'email', 'first_name', 'last_name', 'role', 'date_joined', 'is_active']
+
+
+def search_users(query=''):
+    """Users matching every word of the query as a prefix of email, first or last name."""
+    users = Users.objects.all()
+    for term in query.split():
+        users = users.filter(
+            Q(email__istartswith=term) |
+            Q(first_name__istartswith=term) |
+            Q(last_name__istartswith=term)
+        )
+    return users
+
+def users_page(query='', cursor=None, limit=USER_PAGE_SIZE):
+    """
+    Return (rows, next_cursor) for one page of the user directory.
+    Rows without date_joined sort last (NULL is lowest in MySQL and SQLite).
+    """
+    users = search_users(query)
+    if cursor:
+        joined, user_id = decode_keyset(cursor)
+        if joined is None:
+            users = users.filter(date_joined__isnull=True, user_id__lt=user_id)
+        else:
+            users = users.filter(
+                Q(date_joined__lt=joined) |
+                Q(date_joined=joined, user_id__lt=user_id) |
+                Q(date_joined__isnull=True)
+            )
+
+    rows = list(users.order_by('-date_joined', '-user_id').values(*USER_LIST_FIELDS)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_keyset(last['date_joined'], last['user_id'])
+    return rows[:limit], next_cursor
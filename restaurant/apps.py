@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RestaurantConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'restaurant'
+
+    def ready(self):
+        # Connect signal receivers (search index, principal cache invalidation)
+        from . import search, principals  # noqa: F401
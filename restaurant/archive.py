@@ -0,0 +1,117 @@
+# restaurant/archive.py
+#
+# Hot/cold split for orders. Delivered orders older than N days move from
+# orders / OrderItems / deliveries / payments (and their order_summary and
+# search rows) into archived_orders / archived_order_items.
+# - Each batch of orders moves in one transaction, so an interrupted run
+#   leaves every order either fully live or fully archived, and the next
+#   run simply picks up the orders that are still live
+# - Readers (profile history, exports) add the archive only when the date
+#   range they need reaches back past the newest archived delivery
+# - Candidates are picked shard by shard, so every batch touches a single
+#   branch database (plus the summary / archive tables on 'default')
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import (
+    Orders, OrderItems, Deliveries, Payments, OrderSummary, OrderSearchToken,
+    ArchivedOrder, ArchivedOrderItem,
+)
+from .order_summary import refresh_order_summaries, order_lines, ORDER_LINES_CHUNK, SUMMARY_FIELDS
+from .shards import on_shard, shard_aliases
+
+ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_BATCH_SIZE = 500
+
+
+def archive_candidates(cutoff, limit=ARCHIVE_BATCH_SIZE, alias='default'):
+    """IDs of the shard's live orders delivered before cutoff, oldest order ID first."""
+    return list(
+        on_shard(Deliveries, alias).filter(status='delivered', delivered_at__lt=cutoff)
+        .order_by('order_id').values_list('order_id', flat=True).distinct()[:limit]
+    )
+
+def archive_order_batch(order_ids, alias='default'):
+    """Move the given orders (all on one shard) into the archive tables in one transaction. Returns how many moved."""
+    order_ids = list(order_ids)
+    with transaction.atomic(), transaction.atomic(using=alias):
+        refresh_order_summaries(order_ids)
+        payment_dates = dict(
+            Payments.objects.using(alias).filter(order_id__in=order_ids)
+            .values('order_id').annotate(first=Min('payment_date'))
+            .values_list('order_id', 'first')
+        )
+        archived = [
+            ArchivedOrder(
+                order_id=summary.order_id,
+                payment_date=payment_dates.get(summary.order_id),
+                **{field: getattr(summary, field) for field in SUMMARY_FIELDS},
+            )
+            for summary in OrderSummary.objects.filter(order_id__in=order_ids)
+        ]
+        ArchivedOrder.objects.bulk_create(archived, ignore_conflicts=True)
+        ArchivedOrderItem.objects.bulk_create(
+            [
+                ArchivedOrderItem(
+                    order_item_id=line['order_item_id'],
+                    order_id=line['order_id'],
+                    item_id=line['item_id'],
+                    item_name=line['name'] or '',
+                    price=line['price'] or 0,
+                    quantity=line['quantity'],
+                    subtotal=line['subtotal'],
+                )
+                for lines in order_lines(order_ids).values()
+                for line in lines
+            ],
+            ignore_conflicts=True,
+        )
+
+        OrderSearchToken.objects.filter(order_id__in=order_ids).delete()
+        OrderSummary.objects.filter(order_id__in=order_ids).delete()
+        for model in (OrderItems, Payments, Deliveries, Orders):
+            model.objects.using(alias).filter(order_id__in=order_ids).delete()
+    return len(archived)
+
+def archive_orders(days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE):
+    """Archive every order delivered more than `days` ago, batch by batch. Yields the running count."""
+    cutoff = timezone.now() - timedelta(days=days)
+    total = 0
+    for alias in shard_aliases():
+        while True:
+            order_ids = archive_candidates(cutoff, batch_size, alias)
+            if not order_ids:
+                break
+            total += archive_order_batch(order_ids, alias)
+            yield total
+
+def archive_horizon():
+    """Newest delivered_at in the archive (None when it is empty)."""
+    return ArchivedOrder.objects.aggregate(newest=Max('delivered_at'))['newest']
+
+def archive_needed(since=None):
+    """Whether a read of deliveries from `since` onwards (None = all time) has to include the archive."""
+    horizon = archive_horizon()
+    return horizon is not None and (since is None or since <= horizon)
+
+def attach_archived_lines(orders):
+    """Evaluate archived orders and set .lines ([{'name', 'quantity', 'price'}]) on each, one query per ORDER_LINES_CHUNK orders."""
+    orders = list(orders)
+    order_ids = [order.order_id for order in orders]
+    lines = {}
+    for start in range(0, len(order_ids), ORDER_LINES_CHUNK):
+        for line in (
+            ArchivedOrderItem.objects.filter(order_id__in=order_ids[start:start + ORDER_LINES_CHUNK])
+            .order_by('order_item_id')
+            .values('order_id', 'item_name', 'quantity', 'price')
+        ):
+            lines.setdefault(line['order_id'], []).append(
+                {'name': line['item_name'], 'quantity': line['quantity'], 'price': line['price']}
+            )
+    for order in orders:
+        order.lines = lines.get(order.order_id, [])
+    return orders
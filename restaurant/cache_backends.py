@@ -0,0 +1,35 @@
+# restaurant/cache_backends.py
+#
+# LockedFileCache: a cache every worker on one host shares without running
+# a cache server. It is Django's FileBasedCache with add() and incr() made
+# atomic across processes by an exclusive lock on one file in the cache
+# directory. Used by default for the 'throttle' and 'principals' caches.
+
+import os
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+
+class LockedFileCache(FileBasedCache):
+    """FileBasedCache whose add() and incr() hold a lock file, so they are atomic across processes."""
+
+    @contextmanager
+    def _locked(self):
+        self._createdir()
+        with open(os.path.join(self._dir, 'lock'), 'a+b') as f:
+            locks.lock(f, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(f)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._locked():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self._locked():
+            return super().incr(key, delta, version)
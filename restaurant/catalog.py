@@ -0,0 +1,220 @@
+# restaurant/catalog.py
+
+# ============================================================================
+# IMPORTS
+# ============================================================================
+import csv
+import io
+import json
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import MenuItems, Cart
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_FIELDS = ['item_id', 'name', 'description', 'price', 'category', 'image_url', 'is_available']
+CATALOG_FORMATS = ('csv', 'json')
+MENU_CATEGORIES = ('meals', 'drinks', 'desserts')
+MENU_PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Sent once per catalog write with the touched item IDs (None = anything may have changed)
+catalog_changed = Signal()
+
+
+# ============================================================================
+# CATALOG VERSION
+# ============================================================================
+
+def get_catalog_version():
+    """
+    Return the current catalog version token, used to key catalog caches.
+    It lives in the 'catalog' cache, which every worker shares, so a bump on
+    one worker makes the others' search index and menu fragments stale too.
+    """
+    versions = caches['catalog']
+    version = versions.get(CATALOG_VERSION_KEY)
+    if version is None:
+        versions.add(CATALOG_VERSION_KEY, time.time_ns(), None)
+        version = versions.get(CATALOG_VERSION_KEY)
+    return version
+
+def bump_catalog_version(item_ids=None):
+    """Move the catalog to a new version once the current transaction commits."""
+    def _bump():
+        previous = caches['catalog'].get(CATALOG_VERSION_KEY)
+        version = time.time_ns()
+        caches['catalog'].set(CATALOG_VERSION_KEY, version, None)
+        catalog_changed.send(sender=MenuItems, item_ids=item_ids, version=version, previous=previous)
+
+    transaction.on_commit(_bump)
+
+
+# ============================================================================
+# CATALOG QUERIES
+# ============================================================================
+
+def catalog_items():
+    """Return menu items visible in the catalog (archived items excluded)."""
+    return MenuItems.objects.filter(is_deleted=0)
+
+def catalog_by_category():
+    """Fetch the catalog once and group it by category."""
+    grouped = {category: [] for category in MENU_CATEGORIES}
+    for item in catalog_items():
+        grouped.setdefault((item.category or '').lower(), []).append(item)
+    return grouped
+
+def archive_menu_item(item_id):
+    """Soft-delete a menu item with one row UPDATE; OrderItems history is kept."""
+    archived = MenuItems.objects.filter(item_id=item_id, is_deleted=0).update(
+        is_deleted=1,
+        deleted_at=timezone.now()
+    )
+    if archived:
+        # Archived items can no longer be ordered
+        Cart.objects.filter(item_id=item_id).delete()
+        bump_catalog_version([item_id])
+    return bool(archived)
+
+def set_availability(item_ids, is_available):
+    """Flip is_available for many items with one UPDATE. Returns the row count."""
+    updated = catalog_items().filter(item_id__in=item_ids).update(
+        is_available=1 if is_available else 0
+    )
+    if updated:
+        bump_catalog_version(list(item_ids))
+    return updated
+
+
+# ============================================================================
+# CART REPRICING
+# ============================================================================
+
+def _reprice(cart_queryset):
+    """Set every subtotal in the queryset to quantity x current menu price in one UPDATE."""
+    current_price = MenuItems.objects.filter(item_id=OuterRef('item_id')).values('price')[:1]
+    return cart_queryset.update(
+        subtotal=Coalesce(F('quantity'), 0) * Subquery(current_price)
+    )
+
+def reprice_cart_items(item_id):
+    """Reprice every cart line holding the given menu item."""
+    return _reprice(Cart.objects.filter(item_id=item_id))
+
+def reprice_user_cart(user_id):
+    """Reprice every line in one user's cart."""
+    return _reprice(Cart.objects.filter(user_id=user_id))
+
+def cart_totals(user_id):
+    """Return (stored, current) cart totals for a user from one aggregate query."""
+    money = DecimalField(max_digits=12, decimal_places=2)
+    totals = Cart.objects.filter(user_id=user_id).aggregate(
+        stored=Sum('subtotal', output_field=money),
+        current=Sum(Coalesce(F('quantity'), 0) * F('item__price'), output_field=money),
+    )
+    return (
+        totals['stored'] or Decimal('0.00'),
+        totals['current'] or Decimal('0.00'),
+    )
+
+
+# ============================================================================
+# BULK IMPORT / EXPORT
+# ============================================================================
+
+def export_catalog():
+    """Return the live catalog as a list of plain dicts."""
+    return list(catalog_items().order_by('item_id').values(*CATALOG_FIELDS))
+
+def render_catalog(rows, fmt):
+    """Serialize catalog rows as CSV or JSON text."""
+    if fmt == 'json':
+        return json.dumps(rows, cls=DjangoJSONEncoder, indent=2)
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=CATALOG_FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue()
+
+def parse_catalog(text, fmt):
+    """Parse CSV or JSON catalog text into a list of dicts."""
+    if fmt == 'json':
+        rows = json.loads(text)
+        if not isinstance(rows, list):
+            raise ValueError("JSON catalog must be a list of items")
+        return rows
+    return list(csv.DictReader(io.StringIO(text)))
+
+def _clean_row(row, line):
+    name = (row.get('name') or '').strip()
+    if not name:
+        raise ValueError(f"Row {line}: name is required")
+    try:
+        price = Decimal(str(row.get('price')).strip())
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"Row {line}: invalid price {row.get('price')!r}")
+    if not price.is_finite() or price < 0:
+        raise ValueError(f"Row {line}: invalid price {row.get('price')!r}")
+    item_id = str(row.get('item_id') or '').strip()
+    if item_id and not item_id.isdigit():
+        raise ValueError(f"Row {line}: invalid item_id {item_id!r}")
+    # A blank or missing cell keeps the default (available)
+    is_available = str(row.get('is_available', '')).strip().lower() or '1'
+    return {
+        'item_id': int(item_id) if item_id else None,
+        'name': name,
+        'description': row.get('description') or '',
+        'price': price,
+        'category': (row.get('category') or '').strip().lower() or None,
+        'image_url': row.get('image_url') or '',
+        'is_available': 0 if is_available in ('0', 'false', 'no') else 1,
+    }
+
+def import_catalog(rows, batch_size=500):
+    """
+    Create or update catalog items in bulk.
+    - Rows whose item_id matches a live item update it (bulk_update)
+    - Rows with a blank item_id become new items (bulk_create)
+    - An item_id that is unknown or archived is an error, so re-importing an
+      old export never duplicates items
+    Returns (created, updated).
+    """
+    cleaned = [_clean_row(row, line) for line, row in enumerate(rows, start=1)]
+    existing = catalog_items().in_bulk([row['item_id'] for row in cleaned if row['item_id']])
+
+    to_create, to_update, repriced = [], [], []
+    for line, row in enumerate(cleaned, start=1):
+        item_id = row.pop('item_id')
+        if item_id is None:
+            to_create.append(MenuItems(**row))
+            continue
+        item = existing.get(item_id)
+        if item is None:
+            raise ValueError(
+                f"Row {line}: item {item_id} does not exist or is archived; "
+                "leave item_id blank to add a new item"
+            )
+        if item.price != row['price']:
+            repriced.append(item.item_id)
+        for field, value in row.items():
+            setattr(item, field, value)
+        to_update.append(item)
+
+    with transaction.atomic():
+        MenuItems.objects.bulk_create(to_create, batch_size=batch_size)
+        MenuItems.objects.bulk_update(to_update, CATALOG_FIELDS[1:], batch_size=batch_size)
+        if repriced:
+            _reprice(Cart.objects.filter(item_id__in=repriced))
+        if to_create or to_update:
+            # New rows have no IDs on MySQL, so treat a create as a full change
+            bump_catalog_version(None if to_create else [item.item_id for item in to_update])
+
+    return len(to_create), len(to_update)
@@ -0,0 +1,111 @@
+# restaurant/export_db.py
+#
+# Exports and analytics run on their own connection ('exports') with a
+# time budget per statement, so a huge date range fails fast instead of
+# holding locks and database threads that checkout needs.
+# - Views wrapped in @export_reads send their reads to the 'exports' alias
+#   (READ COMMITTED, see settings.py); shard reads keep their own alias but
+#   get the same budget
+# - MySQL: SELECTs carry a MAX_EXECUTION_TIME optimizer hint (the alias
+#   also sets max_execution_time for the session)
+# - SQLite: a progress handler interrupts the statement at its deadline
+# A statement over budget raises ExportTimeout.
+
+import contextvars
+import time
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .shards import is_shard_alias, shard_aliases
+
+EXPORTS_DB_ALIAS = 'exports'
+# SQLite VM instructions between deadline checks
+SQLITE_PROGRESS_STEPS = 10_000
+# ER_QUERY_TIMEOUT: maximum statement execution time exceeded
+MYSQL_QUERY_TIMEOUT = 3024
+
+_export_reads = contextvars.ContextVar('kx_export_reads', default=False)
+
+
+class ExportTimeout(Exception):
+    """Raised when an export statement runs past EXPORT_STATEMENT_SECONDS."""
+
+    def __init__(self):
+        super().__init__("The export took too long and was stopped. Please try a smaller date range or report.")
+
+
+def exports_available():
+    return EXPORTS_DB_ALIAS in settings.DATABASES
+
+def _timed_out(error):
+    cause = error.__cause__ or error
+    if getattr(cause, 'args', None) and cause.args[0] == MYSQL_QUERY_TIMEOUT:
+        return True
+    return 'interrupted' in str(error)
+
+
+class StatementBudget:
+    """execute_wrapper() that cuts every statement on one connection off after `seconds`."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.deadline = None
+
+    def __call__(self, execute, sql, params, many, context):
+        connection = context['connection']
+        if connection.vendor == 'mysql' and sql.lstrip()[:6].upper() == 'SELECT':
+            sql = f'SELECT /*+ MAX_EXECUTION_TIME({int(self.seconds * 1000)}) */' + sql.lstrip()[6:]
+        elif connection.vendor == 'sqlite':
+            # Rows are fetched after execute() returns; the handler stays until close()
+            self.deadline = time.monotonic() + self.seconds
+            connection.connection.set_progress_handler(self._expired, SQLITE_PROGRESS_STEPS)
+        try:
+            return execute(sql, params, many, context)
+        except DatabaseError as e:
+            if _timed_out(e):
+                raise ExportTimeout() from e
+            raise
+
+    def _expired(self):
+        return int(self.deadline is not None and time.monotonic() > self.deadline)
+
+    def close(self, connection):
+        if connection.vendor == 'sqlite' and connection.connection is not None:
+            connection.connection.set_progress_handler(None, 0)
+
+
+def export_reads(func):
+    """Run func with its reads on the 'exports' connection, every statement under the time budget."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _export_reads.set(True)
+        aliases = [EXPORTS_DB_ALIAS if exports_available() else DEFAULT_DB_ALIAS]
+        aliases += [alias for alias in shard_aliases() if is_shard_alias(alias)]
+        try:
+            with ExitStack() as stack:
+                for alias in aliases:
+                    budget = StatementBudget(settings.EXPORT_STATEMENT_SECONDS)
+                    stack.enter_context(connections[alias].execute_wrapper(budget))
+                    stack.callback(budget.close, connections[alias])
+                return func(*args, **kwargs)
+        finally:
+            _export_reads.reset(token)
+    return wrapper
+
+
+class ExportRouter:
+    def db_for_read(self, model, **hints):
+        if not _export_reads.get() or not exports_available():
+            return None
+        # Reads inside a transaction on the primary must see that transaction
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return EXPORTS_DB_ALIAS
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == EXPORTS_DB_ALIAS:
+            return False
+        return None
@@ -0,0 +1,261 @@
+# restaurant/feedback.py
+#
+# Feedback rating aggregates and the admin feedback listing.
+# - FeedbackRatingStats holds one counter per (day, rating); every new
+#   feedback bumps one row, so the summary header reads a few dozen rows
+#   instead of scanning feedback
+# - The listing is keyset-paginated on feedback_id (newest first) with the
+#   author's name joined in, not loaded per row
+# - Submissions go through feedback_buffer, which acknowledges at once and
+#   writes them with bulk_create when the buffer fills up or ages out
+
+import atexit
+import logging
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Feedback, FeedbackRatingStats
+
+FEEDBACK_PAGE_SIZE = 24
+ROLLING_DAYS = 30
+RATINGS = (5, 4, 3, 2, 1)
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# RATING AGGREGATES
+# ============================================================================
+
+def _bump_bucket(day, rating, amount):
+    bucket = FeedbackRatingStats.objects.filter(day=day, rating=rating)
+    if bucket.update(count=F('count') + amount):
+        return
+    try:
+        with transaction.atomic():
+            FeedbackRatingStats.objects.create(day=day, rating=rating, count=amount)
+    except IntegrityError:
+        # Another process created the bucket first
+        bucket.update(count=F('count') + amount)
+
+def record_feedback(*feedback):
+    """Count new feedback in its (day, rating) buckets. Call inside the creating transaction."""
+    buckets = Counter(
+        (timezone.localdate(item.date_submitted or timezone.now()), item.rating or 0)
+        for item in feedback
+    )
+    for (day, rating), amount in buckets.items():
+        _bump_bucket(day, rating, amount)
+
+def rebuild_rating_stats():
+    """Recount every bucket from the feedback table. Returns the number of buckets."""
+    rows = (
+        Feedback.objects.annotate(day=TruncDate('date_submitted'))
+        .values('day', 'rating')
+        .annotate(count=Count('feedback_id'))
+    )
+    buckets = {}
+    for row in rows:
+        key = (row['day'] or timezone.localdate(), row['rating'] or 0)
+        buckets[key] = buckets.get(key, 0) + row['count']
+
+    with transaction.atomic():
+        FeedbackRatingStats.objects.all().delete()
+        FeedbackRatingStats.objects.bulk_create([
+            FeedbackRatingStats(day=day, rating=rating, count=count)
+            for (day, rating), count in buckets.items()
+        ])
+    return len(buckets)
+
+def _average(histogram):
+    rated = sum(histogram.values())
+    if not rated:
+        return None
+    return round(sum(rating * count for rating, count in histogram.items()) / rated, 2)
+
+def rating_summary(days=ROLLING_DAYS):
+    """Histogram, overall average and rolling average from the stats table."""
+    histogram = dict.fromkeys(RATINGS, 0)
+    recent = dict.fromkeys(RATINGS, 0)
+    unrated = 0
+    since = timezone.localdate() - timedelta(days=days - 1)
+
+    totals = FeedbackRatingStats.objects.values('rating').annotate(total=Sum('count'))
+    recent_totals = (
+        FeedbackRatingStats.objects.filter(day__gte=since, rating__gt=0)
+        .values('rating').annotate(total=Sum('count'))
+    )
+    for row in totals:
+        if row['rating'] in histogram:
+            histogram[row['rating']] = row['total']
+        else:
+            unrated += row['total']
+    for row in recent_totals:
+        if row['rating'] in recent:
+            recent[row['rating']] = row['total']
+
+    rated = sum(histogram.values())
+    return {
+        'total': rated + unrated,
+        'rated': rated,
+        'average': _average(histogram),
+        'rolling_average': _average(recent),
+        'rolling_days': days,
+        'histogram': [
+            {'rating': rating, 'count': count, 'percent': round(count * 100 / rated) if rated else 0}
+            for rating, count in histogram.items()
+        ],
+    }
+
+
+# ============================================================================
+# INGESTION
+# ============================================================================
+
+def clean_feedback(message, rating):
+    """Validate a submission. Returns (message, rating) or raises ValueError."""
+    message = (message or '').strip()
+    if not message:
+        raise ValueError('Message is required')
+    if rating in (None, ''):
+        return message, None
+    try:
+        rating = int(rating)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid rating value')
+    if rating < 1 or rating > 5:
+        raise ValueError('Rating must be between 1 and 5')
+    return message, rating
+
+
+class FeedbackBuffer:
+    """
+    In-memory feedback queue for this process.
+    Flushed with one bulk_create when it reaches max_size items or when the
+    oldest item is max_age seconds old, and once more at interpreter exit.
+    A flush that fails on a database error puts its items back in the queue
+    to be retried max_age seconds later. Items still buffered when the
+    process is killed outright are lost.
+    """
+
+    def __init__(self, max_size, max_age):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+
+    def submit(self, user_id, message, rating=None):
+        """Validate and queue one feedback; raises ValueError when invalid."""
+        message, rating = clean_feedback(message, rating)
+        item = Feedback(user_id=user_id, message=message, rating=rating, date_submitted=timezone.now())
+        with self._lock:
+            self._pending.append(item)
+            full = len(self._pending) >= self.max_size
+            if not full:
+                self._schedule()
+        if full:
+            try:
+                self.flush()
+            except DatabaseError:
+                # Already acknowledged and back in the queue; the timer retries
+                logger.exception("Feedback flush failed, will retry")
+
+    def _schedule(self):
+        # Call with self._lock held
+        if self._timer is None:
+            self._timer = threading.Timer(self.max_age, self._flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _requeue(self, items):
+        """Put unsaved items back at the front of the queue and retry after max_age."""
+        for item in items:
+            # bulk_create may have set primary keys before the rollback
+            item.pk = None
+            item._state.adding = True
+        with self._lock:
+            self._pending[:0] = items
+            self._schedule()
+
+    def flush(self):
+        """Write everything queued so far. Returns the number of feedback saved."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+
+        try:
+            with transaction.atomic():
+                Feedback.objects.bulk_create(pending)
+                record_feedback(*pending)
+            return len(pending)
+        except IntegrityError:
+            pass
+        except DatabaseError:
+            self._requeue(pending)
+            raise
+
+        # e.g. an author deleted meanwhile: save row by row, skip the bad ones
+        saved = 0
+        for index, item in enumerate(pending):
+            try:
+                with transaction.atomic():
+                    item.save(force_insert=True)
+                    record_feedback(item)
+                saved += 1
+            except IntegrityError:
+                logger.warning("Dropped feedback from user %s", item.user_id, exc_info=True)
+            except DatabaseError:
+                self._requeue(pending[index:])
+                raise
+        return saved
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Feedback flush failed")
+        finally:
+            # Timer threads get their own DB connections; don't leak them
+            connections.close_all()
+
+
+feedback_buffer = FeedbackBuffer(
+    max_size=getattr(settings, 'FEEDBACK_BUFFER_SIZE', 200),
+    max_age=getattr(settings, 'FEEDBACK_FLUSH_SECONDS', 2.0),
+)
+atexit.register(feedback_buffer.flush)
+
+
+# ============================================================================
+# ADMIN LISTING
+# ============================================================================
+
+def feedback_page(before=None, limit=FEEDBACK_PAGE_SIZE):
+    """
+    Return (feedback, next_before) for one page, newest first.
+    feedback_id follows submission order, so it doubles as the keyset.
+    """
+    feedback = (
+        Feedback.objects.select_related('user')
+        .only('feedback_id', 'message', 'rating', 'date_submitted',
+              'user__first_name', 'user__last_name')
+        .order_by('-feedback_id')
+    )
+    if before:
+        feedback = feedback.filter(feedback_id__lt=before)
+
+    rows = list(feedback[:limit + 1])
+    next_before = rows[limit - 1].feedback_id if len(rows) > limit else None
+    return rows[:limit], next_before
@@ -0,0 +1,60 @@
+# restaurant/hashing.py
+#
+# PBKDF2 hashing through a small bounded thread pool.
+# At most PASSWORD_HASHING_WORKERS hashes run at once, and at most
+# PASSWORD_HASHING_QUEUE more may wait; anything beyond that is refused
+# immediately (HashingBusy) instead of piling up and eating every worker's CPU.
+# Async views await acheck_password() / amake_password(), so under ASGI a
+# login that is hashing holds no thread that sync views need.
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+WORKERS = getattr(settings, 'PASSWORD_HASHING_WORKERS', 2)
+QUEUE = getattr(settings, 'PASSWORD_HASHING_QUEUE', 8)
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='pwhash')
+_slots = threading.BoundedSemaphore(WORKERS + QUEUE)
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool is saturated."""
+
+    def __init__(self):
+        super().__init__("Server is busy, please try again in a moment.")
+
+
+def _submit(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+    future = _executor.submit(fn, *args)
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+def check_password(password, encoded):
+    """Drop-in for django.contrib.auth.hashers.check_password, run in the pool."""
+    return _submit(hashers.check_password, password, encoded).result()
+
+def make_password(password):
+    """Drop-in for django.contrib.auth.hashers.make_password, run in the pool."""
+    return _submit(hashers.make_password, password).result()
+
+async def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        _slots.release()
+
+async def acheck_password(password, encoded):
+    """Awaitable check_password for async views; the event loop never hashes."""
+    return await _run(hashers.check_password, password, encoded)
+
+async def amake_password(password):
+    """Awaitable make_password for async views."""
+    return await _run(hashers.make_password, password)
@@ -0,0 +1,84 @@
+# restaurant/history.py
+#
+# A customer's delivered-order history, one page at a time.
+# - Keyset pagination on (delivered_at, order_id), newest first
+# - Live deliveries come from every branch shard (one query each, merged);
+#   archived orders (see archive.py) are read only for the part of the
+#   page's date range the live rows don't cover
+# - Order lines come from one query per source
+
+from django.db.models import Q
+from django.utils import dateformat, timezone
+
+from .models import Deliveries, ArchivedOrder, ArchivedOrderItem
+from .order_summary import order_lines
+from .pagination import decode_keyset, encode_keyset
+from .shards import for_each_shard, on_shard
+
+HISTORY_PAGE_SIZE = 10
+
+
+def _before(rows, cursor):
+    """Apply the (delivered_at, order_id) keyset cursor to a queryset."""
+    if not cursor:
+        return rows
+    delivered_at, order_id = decode_keyset(cursor)
+    return rows.filter(
+        Q(delivered_at__lt=delivered_at) |
+        Q(delivered_at=delivered_at, order_id__lt=order_id)
+    )
+
+def order_history_page(user_id, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """Return (orders, next_cursor) for one page of a user's delivered orders."""
+    live = for_each_shard(lambda alias: (
+        _before(on_shard(Deliveries, alias).filter(order__user_id=user_id, delivered_at__isnull=False), cursor)
+        .order_by('-delivered_at', '-order_id')
+        .values('order_id', 'delivered_at', 'order__total_amount')[:limit + 1]
+    ))
+    live.sort(key=lambda row: (row['delivered_at'], row['order_id']), reverse=True)
+    live = live[:limit + 1]
+    rows = [
+        {'order_id': row['order_id'], 'delivered_at': row['delivered_at'], 'total_amount': row['order__total_amount'], 'archived': False}
+        for row in live
+    ]
+
+    archived = _before(ArchivedOrder.objects.filter(user_id=user_id), cursor)
+    if len(live) > limit:
+        # A full live page only needs archived orders as new as its oldest row
+        archived = archived.filter(delivered_at__gte=live[-1]['delivered_at'])
+    rows += [
+        dict(row, archived=True)
+        for row in archived.order_by('-delivered_at', '-order_id')
+        .values('order_id', 'delivered_at', 'total_amount')[:limit + 1]
+    ]
+    rows.sort(key=lambda row: (row['delivered_at'], row['order_id']), reverse=True)
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_keyset(last['delivered_at'], last['order_id'])
+    rows = rows[:limit]
+
+    lines = {
+        order_id: [{'name': line['name'], 'quantity': line['quantity']} for line in order_items]
+        for order_id, order_items in order_lines([row['order_id'] for row in rows if not row['archived']]).items()
+    }
+    archived_ids = [row['order_id'] for row in rows if row['archived']]
+    if archived_ids:
+        for line in (
+            ArchivedOrderItem.objects.filter(order_id__in=archived_ids)
+            .order_by('order_item_id')
+            .values('order_id', 'item_name', 'quantity')
+        ):
+            lines.setdefault(line['order_id'], []).append({'name': line['item_name'], 'quantity': line['quantity']})
+
+    orders = [
+        {
+            'order_id': row['order_id'],
+            'delivered_at': dateformat.format(timezone.localtime(row['delivered_at']), 'M d, Y H:i'),
+            'total_amount': row['total_amount'],
+            'items': lines.get(row['order_id'], []),
+        }
+        for row in rows
+    ]
+    return orders, next_cursor
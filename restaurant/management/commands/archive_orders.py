@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from restaurant.archive import archive_orders, ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Move delivered orders older than --days into the archive tables, one batch per transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        total = 0
+        for total in archive_orders(days=options['days'], batch_size=options['batch_size']):
+            self.stdout.write(f"Archived {total} orders...")
+        self.stdout.write(self.style.SUCCESS(f"Done. {total} orders archived."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from restaurant.schema import ensure_schema
+from restaurant.shards import is_shard_alias, schema_models, seed_shard_sequences
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the unmanaged tables (users, orders, deliveries, ...) with their "
+        "indexes where missing, and add missing columns and indexes to existing ones. "
+        "On a branch shard only the order tables are created, with IDs starting at the shard's range."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--sql', action='store_true',
+                            help="Print the DDL instead of running it")
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        connection = connections[alias]
+        with connection.schema_editor(collect_sql=options['sql'], atomic=not options['sql']) as editor:
+            actions = ensure_schema(editor, schema_models(alias))
+
+        if options['sql']:
+            for statement in editor.collected_sql:
+                self.stdout.write(statement)
+            return
+        if is_shard_alias(alias):
+            seed_shard_sequences(alias)
+        for action in actions:
+            self.stdout.write(action)
+        self.stdout.write(self.style.SUCCESS(f"Done. {len(actions)} schema changes applied."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from restaurant.catalog import CATALOG_FORMATS, export_catalog, render_catalog
+
+
+class Command(BaseCommand):
+    help = "Export the menu catalog as CSV or JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help="Output file (defaults to stdout)")
+        parser.add_argument('--format', choices=CATALOG_FORMATS, default='csv')
+
+    def handle(self, *args, **options):
+        rows = export_catalog()
+        content = render_catalog(rows, options['format'])
+
+        if options['path']:
+            with open(options['path'], 'w', encoding='utf-8', newline='') as f:
+                f.write(content)
+            self.stdout.write(self.style.SUCCESS(f"Exported {len(rows)} menu items to {options['path']}"))
+        else:
+            self.stdout.write(content)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from restaurant.catalog import CATALOG_FORMATS, import_catalog, parse_catalog
+
+
+class Command(BaseCommand):
+    help = "Create or update menu items in bulk from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=CATALOG_FORMATS,
+                            help="Defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('json' if path.lower().endswith('.json') else 'csv')
+
+        try:
+            with open(path, encoding='utf-8-sig') as f:
+                rows = parse_catalog(f.read(), fmt)
+            created, updated = import_catalog(rows, batch_size=options['batch_size'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f"Imported menu: {created} added, {updated} updated"))
@@ -0,0 +1,143 @@
+import csv
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from restaurant.models import Users
+
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+USER_FORMATS = ('csv', 'jsonl')
+
+
+def _init_worker():
+    # Needed where worker processes are spawned rather than forked
+    django.setup()
+
+def _hash(password):
+    return make_password(password)
+
+
+def read_rows(f, fmt):
+    """Yield user dicts from a CSV or JSONL file one at a time."""
+    if fmt == 'csv':
+        yield from csv.DictReader(f)
+        return
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+def existing_emails(emails):
+    """The given (lowercase) emails that already belong to a user, compared case-insensitively."""
+    return set(
+        Users.objects.annotate(email_lower=Lower('email')).filter(email_lower__in=emails)
+        .values_list('email_lower', flat=True)
+    )
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = "Create users in bulk from a CSV or JSONL file (email, password, first_name, last_name)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=USER_FORMATS,
+                            help="Defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Processes used for password hashing")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.lower().endswith(('.jsonl', '.json')) else 'csv')
+        batch_size = options['batch_size']
+
+        seen = set()
+        created = skipped = line = 0
+        started = time.monotonic()
+
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as f, \
+                    ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+                for chunk in chunked(read_rows(f, fmt), batch_size):
+                    rows = []
+                    for row in chunk:
+                        line += 1
+                        cleaned = self._clean_row(row, line)
+                        if cleaned is None or cleaned['email'] in seen:
+                            skipped += 1
+                            continue
+                        seen.add(cleaned['email'])
+                        rows.append(cleaned)
+
+                    # One query per chunk instead of one per row
+                    existing = existing_emails([row['email'] for row in rows])
+                    rows = [row for row in rows if row['email'] not in existing]
+                    skipped += len(existing)
+                    if not rows:
+                        continue
+
+                    hashes = pool.map(_hash, [row.pop('password') for row in rows],
+                                      chunksize=max(1, len(rows) // (options['workers'] * 4)))
+                    now = timezone.now()
+                    users = [
+                        Users(password=hashed, role='user', date_joined=now, is_active=1, **row)
+                        for row, hashed in zip(rows, hashes)
+                    ]
+                    emails = [user.email for user in users]
+                    with transaction.atomic():
+                        # ignore_conflicts covers sign-ups that land while the import runs;
+                        # those rows are not ours, so count the emails this batch added
+                        before = existing_emails(emails)
+                        Users.objects.bulk_create(users, batch_size=batch_size, ignore_conflicts=True)
+                        inserted = len(existing_emails(emails) - before)
+
+                    created += inserted
+                    skipped += len(users) - inserted
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(f"{created} users created ({created / elapsed:.0f}/s)...")
+        except (OSError, ValueError, csv.Error) as e:
+            raise CommandError(str(e))
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. {created} users created, {skipped} skipped in {elapsed:.1f}s "
+            f"({created / elapsed if elapsed else 0:.0f} users/s)"
+        ))
+
+    def _clean_row(self, row, line):
+        # Logins match emails case-insensitively, so duplicates must too
+        email = (row.get('email') or '').strip().lower()
+        password = row.get('password') or ''
+        first_name = (row.get('first_name') or '').strip()
+        last_name = (row.get('last_name') or '').strip()
+
+        if not EMAIL_RE.match(email):
+            self.stderr.write(f"Row {line}: invalid email {email!r}, skipped")
+            return None
+        if len(password) < 8:
+            self.stderr.write(f"Row {line}: password must be at least 8 characters, skipped")
+            return None
+        if not first_name or not last_name:
+            self.stderr.write(f"Row {line}: first and last name are required, skipped")
+            return None
+
+        return {
+            'email': email,
+            'password': password,
+            'first_name': first_name[:50],
+            'last_name': last_name[:50],
+        }
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import KEY_PREFIX
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Delete expired sessions in small batches (instead of one big DELETE)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help="Seconds to pause between batches to go easy on the DB")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        session_cache = caches[settings.SESSION_CACHE_ALIAS]
+        now = timezone.now()
+        total = 0
+
+        while True:
+            # expire_date is indexed, so each batch is a short range scan
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                break
+
+            Session.objects.filter(session_key__in=keys).delete()
+            session_cache.delete_many([KEY_PREFIX + key for key in keys])
+            total += len(keys)
+            self.stdout.write(f"Purged {total} expired sessions...")
+
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {total} expired sessions deleted."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from restaurant.feedback import rebuild_rating_stats
+
+
+class Command(BaseCommand):
+    help = "Recount the feedback rating buckets from the feedback table (run once after migrating)."
+
+    def handle(self, *args, **options):
+        buckets = rebuild_rating_stats()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} feedback rating buckets"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from restaurant.order_summary import rebuild_order_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the order_summary read model from orders, deliveries, payments and order items."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = 0
+        for total in rebuild_order_summaries(batch_size=options['batch_size']):
+            self.stdout.write(f"Rebuilt {total} order summaries...")
+        self.stdout.write(self.style.SUCCESS(f"Done. {total} order summaries rebuilt."))
@@ -0,0 +1,151 @@
+# restaurant/metrics.py
+#
+# Per-request cost, by view. MetricsMiddleware times every request, counts
+# its queries and their time on every database alias, and adds the time
+# spent rendering templates (InstrumentedTemplates backend). Each request
+# gets a Server-Timing header and is added to in-memory histograms that
+# /metrics serves in the Prometheus text format.
+# - Template time includes queries a template triggers while rendering
+# - Histograms keep one counter per bucket (no samples), so recording is a
+#   bisect and a few additions under a lock
+# - Counters are per process: with several workers, scrape each one or
+#   sum them in Prometheus
+# - Labels are URL names (restaurant:admin-orders), never raw paths, so
+#   the number of series stays bounded
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+UNMATCHED_VIEW = 'unmatched'
+
+_request_timing = contextvars.ContextVar('kx_request_timing', default=None)
+
+
+class RequestTiming:
+    """What one request spent: queries, database time and template time."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper() hook, installed on every connection for the request
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_seconds += time.perf_counter() - start
+
+    def server_timing(self, total):
+        return (
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries", '
+            f'tpl;dur={self.template_seconds * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # view -> [per-bucket counts (+inf last), sum, count]
+        self.series = {}
+
+    def observe(self, view, value):
+        series = self.series.get(view)
+        if series is None:
+            series = self.series.setdefault(view, [[0] * (len(self.buckets) + 1), 0, 0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for view, (counts, total, count) in sorted(self.series.items()):
+            label = view.replace('\\', '\\\\').replace('"', '\\"')
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+            total = f'{total:.6f}' if isinstance(total, float) else total
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {count}')
+        return lines
+
+
+_lock = threading.Lock()
+REQUEST_SECONDS = Histogram('kx_request_duration_seconds', 'Total request time.', SECONDS_BUCKETS)
+DB_SECONDS = Histogram('kx_request_db_seconds', 'Time spent in database queries per request.', SECONDS_BUCKETS)
+DB_QUERIES = Histogram('kx_request_db_queries', 'Database queries per request.', QUERY_BUCKETS)
+TEMPLATE_SECONDS = Histogram('kx_request_template_seconds', 'Time spent rendering templates per request.', SECONDS_BUCKETS)
+HISTOGRAMS = (REQUEST_SECONDS, DB_SECONDS, DB_QUERIES, TEMPLATE_SECONDS)
+
+
+def begin_request():
+    """Start timing a request; returns (timing, token) for end_request()."""
+    timing = RequestTiming()
+    return timing, _request_timing.set(timing)
+
+def end_request(view, timing, token):
+    """Stop timing the request, record it under `view` and return its total seconds."""
+    _request_timing.reset(token)
+    total = time.perf_counter() - timing.started
+    with _lock:
+        REQUEST_SECONDS.observe(view, total)
+        DB_SECONDS.observe(view, timing.db_seconds)
+        DB_QUERIES.observe(view, timing.db_queries)
+        TEMPLATE_SECONDS.observe(view, timing.template_seconds)
+    return total
+
+def track_queries(timing):
+    """Context manager counting the queries of every database alias into timing."""
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(timing))
+    return stack
+
+def render_metrics():
+    """All histograms in the Prometheus text exposition format."""
+    with _lock:
+        lines = [line for histogram in HISTOGRAMS for line in histogram.render()]
+    return '\n'.join(lines) + '\n'
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        timing = _request_timing.get()
+        if timing is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            timing.template_seconds += time.perf_counter() - start
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    """DjangoTemplates that adds each render's time to the current request's timing."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
@@ -0,0 +1,68 @@
+# restaurant/middleware.py
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from . import metrics
+from .principals import request_principal
+from .routers import PIN_COOKIE, begin_request, end_request, replica_available
+
+
+class PrincipalMiddleware:
+    """
+    Expose the logged-in principals as lazy request.kx_user / request.kx_admin.
+    Nothing is looked up until a view touches them. Must run after
+    SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.kx_user = SimpleLazyObject(lambda: request_principal(request, 'user'))
+        request.kx_admin = SimpleLazyObject(lambda: request_principal(request, 'admin'))
+        return self.get_response(request)
+
+
+class ReplicaPinningMiddleware:
+    """
+    Read-your-writes for the replica router (see routers.py): a request that
+    writes sets a short-lived cookie, and requests carrying it read from the
+    primary. Must run after SessionMiddleware so session saves don't count.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = begin_request(pinned=PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            state = end_request(token)
+        if state.wrote and replica_available():
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Time each request (total, database, templates), label it with its URL
+    name, send the numbers back as Server-Timing and add them to the
+    /metrics histograms (see metrics.py). Goes first, so it times everything.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing, token = metrics.begin_request()
+        try:
+            with metrics.track_queries(timing):
+                response = self.get_response(request)
+        finally:
+            match = getattr(request, 'resolver_match', None)
+            total = metrics.end_request(match.view_name if match else metrics.UNMATCHED_VIEW, timing, token)
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = timing.server_timing(total)
+        return response
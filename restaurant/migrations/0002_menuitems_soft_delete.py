@@ -0,0 +1,176 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:13
+
+from decimal import Decimal
+from django.db import migrations, models
+
+from restaurant.schema import add_missing_field, add_missing_index, remove_index_if_present
+
+
+CATALOG_INDEX = models.Index(fields=['is_deleted', 'category'], name='menu_items_catalog_idx')
+
+
+def add_soft_delete_columns(apps, schema_editor):
+    MenuItems = apps.get_model('restaurant', 'MenuItems')
+    add_missing_field(schema_editor, MenuItems, 'is_deleted')
+    add_missing_field(schema_editor, MenuItems, 'deleted_at')
+    add_missing_index(schema_editor, MenuItems, CATALOG_INDEX)
+
+
+def drop_catalog_index(apps, schema_editor):
+    MenuItems = apps.get_model('restaurant', 'MenuItems')
+    remove_index_if_present(schema_editor, MenuItems, CATALOG_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Admin',
+            fields=[
+                ('admin_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('email', models.EmailField(max_length=100, unique=True)),
+                ('password', models.CharField(max_length=255)),
+                ('name', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'admin',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Cart',
+            fields=[
+                ('cart_id', models.AutoField(primary_key=True, serialize=False)),
+                ('quantity', models.IntegerField(blank=True, null=True)),
+                ('subtotal', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+            ],
+            options={
+                'db_table': 'cart',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ContactMessage',
+            fields=[
+                ('message_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254)),
+                ('message', models.TextField()),
+                ('rating', models.IntegerField(blank=True, null=True)),
+                ('date_submitted', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'contact_message',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Deliveries',
+            fields=[
+                ('delivery_id', models.AutoField(primary_key=True, serialize=False)),
+                ('delivery_address', models.TextField(blank=True, null=True)),
+                ('contact_number', models.CharField(blank=True, max_length=20, null=True)),
+                ('delivery_option', models.CharField(blank=True, max_length=50, null=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(blank=True, max_length=32, null=True)),
+                ('confirmed_at', models.DateTimeField(blank=True, null=True)),
+                ('preparing_at', models.DateTimeField(blank=True, null=True)),
+                ('out_for_delivery_at', models.DateTimeField(blank=True, null=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'deliveries',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Feedback',
+            fields=[
+                ('feedback_id', models.AutoField(primary_key=True, serialize=False)),
+                ('message', models.TextField()),
+                ('rating', models.IntegerField(blank=True, null=True)),
+                ('date_submitted', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'feedback',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='MenuItems',
+            fields=[
+                ('item_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('category', models.CharField(blank=True, max_length=8, null=True)),
+                ('image_url', models.CharField(blank=True, max_length=255, null=True)),
+                ('is_available', models.IntegerField(blank=True, null=True)),
+                ('is_deleted', models.IntegerField(default=0)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'menu_items',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderItems',
+            fields=[
+                ('order_item_id', models.AutoField(primary_key=True, serialize=False)),
+                ('quantity', models.IntegerField()),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10)),
+            ],
+            options={
+                'db_table': 'OrderItems',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Orders',
+            fields=[
+                ('order_id', models.AutoField(primary_key=True, serialize=False)),
+                ('order_date', models.DateTimeField(blank=True, null=True)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+            ],
+            options={
+                'db_table': 'orders',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Payments',
+            fields=[
+                ('payment_id', models.AutoField(primary_key=True, serialize=False)),
+                ('payment_method', models.CharField(blank=True, max_length=50, null=True)),
+                ('payment_date', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'payments',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Users',
+            fields=[
+                ('user_id', models.AutoField(primary_key=True, serialize=False)),
+                ('email', models.CharField(max_length=100, unique=True)),
+                ('password', models.CharField(max_length=255)),
+                ('first_name', models.CharField(blank=True, max_length=50, null=True)),
+                ('last_name', models.CharField(blank=True, max_length=50, null=True)),
+                ('role', models.CharField(blank=True, max_length=5, null=True)),
+                ('date_joined', models.DateTimeField(blank=True, null=True)),
+                ('is_active', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'users',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(add_soft_delete_columns, drop_catalog_index),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+from restaurant.schema import add_missing_index, remove_index_if_present
+
+
+USER_INDEXES = [
+    models.Index(fields=['first_name'], name='users_first_name_idx'),
+    models.Index(fields=['last_name'], name='users_last_name_idx'),
+    models.Index(fields=['date_joined', 'user_id'], name='users_joined_idx'),
+]
+
+
+def add_user_indexes(apps, schema_editor):
+    Users = apps.get_model('restaurant', 'Users')
+    for index in USER_INDEXES:
+        add_missing_index(schema_editor, Users, index)
+
+
+def drop_user_indexes(apps, schema_editor):
+    Users = apps.get_model('restaurant', 'Users')
+    for index in USER_INDEXES:
+        remove_index_if_present(schema_editor, Users, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0002_menuitems_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_user_indexes, drop_user_indexes),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0003_users_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackRatingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('rating', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'feedback_rating_stats',
+                'constraints': [models.UniqueConstraint(fields=('day', 'rating'), name='feedback_rating_stats_day_rating')],
+            },
+        ),
+    ]
@@ -0,0 +1,152 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:33
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models, router
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from restaurant.schema import table_exists
+
+
+BACKFILL_BATCH_SIZE = 500
+DELIVERY_COLUMNS = [
+    'delivery_address', 'contact_number', 'delivery_option', 'notes',
+    'confirmed_at', 'preparing_at', 'out_for_delivery_at', 'delivered_at',
+]
+STAGE_STATUSES = [
+    ('delivered_at', 'delivered'), ('out_for_delivery_at', 'out_for_delivery'),
+    ('preparing_at', 'preparing'), ('confirmed_at', 'confirmed'),
+]
+
+
+def _select(connection, sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _datetime(value):
+    # Raw rows skip the ORM's converters: datetimes are stored in UTC
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value is not None and settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value, datetime.timezone.utc)
+    return value
+
+
+def _summaries(connection, OrderSummary, Users, orders):
+    """OrderSummary rows for one batch of (order_id, user_id, order_date, total_amount) rows."""
+    quote = connection.ops.quote_name
+    order_ids = [order[0] for order in orders]
+    placeholders = ', '.join(['%s'] * len(order_ids))
+
+    item_counts = dict(_select(
+        connection,
+        f'SELECT order_id, COUNT(*) FROM {quote("OrderItems")} WHERE order_id IN ({placeholders}) GROUP BY order_id',
+        order_ids,
+    ))
+    # The first delivery and payment of each order, as refresh_order_summaries() picks them
+    deliveries = {}
+    for row in _select(
+        connection,
+        f'SELECT order_id, status, {", ".join(quote(column) for column in DELIVERY_COLUMNS)} '
+        f'FROM {quote("deliveries")} WHERE order_id IN ({placeholders}) ORDER BY delivery_id DESC',
+        order_ids,
+    ):
+        deliveries[row[0]] = dict(zip(['status'] + DELIVERY_COLUMNS, row[1:]))
+    payments = dict(_select(
+        connection,
+        f'SELECT order_id, payment_method FROM {quote("payments")} WHERE order_id IN ({placeholders}) ORDER BY payment_id DESC',
+        order_ids,
+    ))
+    customers = Users.objects.in_bulk({order[1] for order in orders})
+
+    summaries = []
+    for order_id, user_id, order_date, total_amount in orders:
+        delivery = deliveries.get(order_id, {})
+        customer = customers.get(user_id)
+        # Rows without a status: the one their stage timestamps imply (see 0006)
+        status = delivery.get('status') or next(
+            (status for column, status in STAGE_STATUSES if delivery.get(column)), 'pending'
+        )
+        summaries.append(OrderSummary(
+            order_id=order_id,
+            user_id=user_id,
+            customer_name=f"{customer.first_name or ''} {customer.last_name or ''}".strip() if customer else '',
+            customer_email=customer.email if customer else '',
+            order_date=_datetime(order_date),
+            total_amount=total_amount,
+            item_count=item_counts.get(order_id, 0),
+            status=status,
+            payment_method=payments.get(order_id) or '',
+            **{
+                column: _datetime(delivery.get(column)) if column.endswith('_at') else delivery.get(column) or ''
+                for column in DELIVERY_COLUMNS
+            },
+        ))
+    return summaries
+
+
+def backfill_order_summary(apps, schema_editor):
+    """Fill order_summary from the existing orders, so the admin pages see them right after deploy."""
+    OrderSummary = apps.get_model('restaurant', 'OrderSummary')
+    Users = apps.get_model('restaurant', 'Users')
+    connection = schema_editor.connection
+    if not router.allow_migrate_model(connection.alias, OrderSummary):
+        return
+    # A fresh database gets its order tables from ensure_schema, after migrate
+    if not all(table_exists(connection, table) for table in ('orders', 'OrderItems', 'deliveries', 'payments', 'users')):
+        return
+
+    last_id = 0
+    while True:
+        orders = _select(
+            connection,
+            f'SELECT order_id, user_id, order_date, total_amount FROM {connection.ops.quote_name("orders")} '
+            f'WHERE order_id > %s ORDER BY order_id LIMIT {BACKFILL_BATCH_SIZE}',
+            [last_id],
+        )
+        if not orders:
+            break
+        OrderSummary.objects.bulk_create(_summaries(connection, OrderSummary, Users, orders))
+        last_id = orders[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0004_feedback_rating_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSummary',
+            fields=[
+                ('order_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('user_id', models.IntegerField()),
+                ('customer_name', models.CharField(blank=True, max_length=101)),
+                ('customer_email', models.CharField(blank=True, max_length=100)),
+                ('order_date', models.DateTimeField(blank=True, null=True)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('item_count', models.IntegerField(default=0)),
+                ('status', models.CharField(default='pending', max_length=32)),
+                ('payment_method', models.CharField(blank=True, max_length=50)),
+                ('delivery_address', models.TextField(blank=True)),
+                ('contact_number', models.CharField(blank=True, max_length=20)),
+                ('delivery_option', models.CharField(blank=True, max_length=50)),
+                ('notes', models.TextField(blank=True)),
+                ('confirmed_at', models.DateTimeField(blank=True, null=True)),
+                ('preparing_at', models.DateTimeField(blank=True, null=True)),
+                ('out_for_delivery_at', models.DateTimeField(blank=True, null=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'order_summary',
+                'indexes': [models.Index(fields=['status', 'order_date'], name='order_summary_status_idx'), models.Index(fields=['delivered_at'], name='order_summary_delivered_idx'), models.Index(fields=['user_id', 'order_date'], name='order_summary_user_idx'), models.Index(fields=['order_date'], name='order_summary_date_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_order_summary, migrations.RunPython.noop),
+    ]
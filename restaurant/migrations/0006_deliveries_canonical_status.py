@@ -0,0 +1,38 @@
+from django.db import migrations, models
+from django.db.models import Case, Q, Value, When
+
+from restaurant.schema import add_missing_index, remove_index_if_present, table_exists
+
+
+STATUS_INDEX = models.Index(fields=['status'], name='deliveries_status_idx')
+
+
+def backfill_status(apps, schema_editor):
+    Deliveries = apps.get_model('restaurant', 'Deliveries')
+    if not table_exists(schema_editor.connection, Deliveries._meta.db_table):
+        return
+    # Rows without a status get the one their stage timestamps imply
+    Deliveries.objects.filter(Q(status__isnull=True) | Q(status='')).update(status=Case(
+        When(delivered_at__isnull=False, then=Value('delivered')),
+        When(out_for_delivery_at__isnull=False, then=Value('out_for_delivery')),
+        When(preparing_at__isnull=False, then=Value('preparing')),
+        When(confirmed_at__isnull=False, then=Value('confirmed')),
+        default=Value('pending'),
+    ))
+    add_missing_index(schema_editor, Deliveries, STATUS_INDEX)
+
+
+def drop_status_index(apps, schema_editor):
+    Deliveries = apps.get_model('restaurant', 'Deliveries')
+    remove_index_if_present(schema_editor, Deliveries, STATUS_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0005_order_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_status, drop_status_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0006_deliveries_canonical_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusEvent',
+            fields=[
+                ('event_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('order_id', models.IntegerField()),
+                ('status', models.CharField(max_length=32)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'order_status_events',
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:40
+
+from django.db import migrations, models, router
+
+from restaurant.order_search import phone_key, tokenize
+
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def backfill_search_keys(apps, schema_editor):
+    """Index the orders already in order_summary: phone_rev and their name / address tokens."""
+    OrderSummary = apps.get_model('restaurant', 'OrderSummary')
+    OrderSearchToken = apps.get_model('restaurant', 'OrderSearchToken')
+    if not router.allow_migrate_model(schema_editor.connection.alias, OrderSummary):
+        return
+
+    last_id = 0
+    while True:
+        summaries = list(
+            OrderSummary.objects.filter(order_id__gt=last_id).order_by('order_id')
+            .only('order_id', 'customer_name', 'delivery_address', 'contact_number')[:BACKFILL_BATCH_SIZE]
+        )
+        if not summaries:
+            break
+        for summary in summaries:
+            summary.phone_rev = phone_key(summary.contact_number)
+        OrderSummary.objects.bulk_update(summaries, ['phone_rev'])
+        OrderSearchToken.objects.bulk_create([
+            OrderSearchToken(order_id=summary.order_id, token=token)
+            for summary in summaries
+            for token in tokenize(summary.customer_name, summary.delivery_address)
+        ], ignore_conflicts=True)
+        last_id = summaries[-1].order_id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0007_order_status_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.IntegerField()),
+                ('token', models.CharField(max_length=32)),
+            ],
+            options={
+                'db_table': 'order_search_tokens',
+            },
+        ),
+        migrations.AddField(
+            model_name='ordersummary',
+            name='phone_rev',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='ordersummary',
+            index=models.Index(fields=['phone_rev'], name='order_summary_phone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordersearchtoken',
+            index=models.Index(fields=['order_id'], name='order_search_tokens_order_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='ordersearchtoken',
+            constraint=models.UniqueConstraint(fields=('token', 'order_id'), name='order_search_tokens_token_order'),
+        ),
+        migrations.RunPython(backfill_search_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0008_order_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('order_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('user_id', models.IntegerField()),
+                ('customer_name', models.CharField(blank=True, max_length=101)),
+                ('customer_email', models.CharField(blank=True, max_length=100)),
+                ('order_date', models.DateTimeField(blank=True, null=True)),
+                ('total_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('item_count', models.IntegerField(default=0)),
+                ('status', models.CharField(default='pending', max_length=32)),
+                ('payment_method', models.CharField(blank=True, max_length=50)),
+                ('delivery_address', models.TextField(blank=True)),
+                ('contact_number', models.CharField(blank=True, max_length=20)),
+                ('phone_rev', models.CharField(blank=True, max_length=20)),
+                ('delivery_option', models.CharField(blank=True, max_length=50)),
+                ('notes', models.TextField(blank=True)),
+                ('confirmed_at', models.DateTimeField(blank=True, null=True)),
+                ('preparing_at', models.DateTimeField(blank=True, null=True)),
+                ('out_for_delivery_at', models.DateTimeField(blank=True, null=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('payment_date', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'archived_orders',
+                'indexes': [models.Index(fields=['user_id', 'delivered_at'], name='archived_orders_user_idx'), models.Index(fields=['delivered_at'], name='archived_orders_delivered_idx'), models.Index(fields=['order_date'], name='archived_orders_date_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('order_item_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('order_id', models.IntegerField()),
+                ('item_id', models.IntegerField()),
+                ('item_name', models.CharField(max_length=100)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('quantity', models.IntegerField()),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10)),
+            ],
+            options={
+                'db_table': 'archived_order_items',
+                'indexes': [models.Index(fields=['order_id'], name='archived_order_items_order_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+from restaurant.schema import add_missing_column_index, remove_column_index_if_present
+
+
+# The migration state of the unmanaged models has no foreign keys, so the
+# indexes are spelled out as (table, name, columns); keep them in step with
+# models.py Meta.indexes
+HOT_QUERY_INDEXES = [
+    ('deliveries', 'deliveries_order_status_idx', ['order_id', 'status']),
+    ('orders', 'orders_user_date_idx', ['user_id', 'order_date']),
+    ('cart', 'cart_user_item_idx', ['user_id', 'item_id']),
+    ('OrderItems', 'order_items_item_idx', ['item_id']),
+]
+
+
+def add_hot_query_indexes(apps, schema_editor):
+    for table, name, columns in HOT_QUERY_INDEXES:
+        add_missing_column_index(schema_editor, table, name, columns)
+
+
+def drop_hot_query_indexes(apps, schema_editor):
+    for table, name, columns in HOT_QUERY_INDEXES:
+        remove_column_index_if_present(schema_editor, table, name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0009_order_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_hot_query_indexes, drop_hot_query_indexes),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:49
+
+from django.db import migrations, models
+
+from restaurant.schema import add_missing_field
+
+
+def add_branch_column(apps, schema_editor):
+    Orders = apps.get_model('restaurant', 'Orders')
+    add_missing_field(schema_editor, Orders, 'branch')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0010_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorder',
+            name='branch',
+            field=models.CharField(default='main', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='ordersummary',
+            name='branch',
+            field=models.CharField(default='main', max_length=32),
+        ),
+        # orders is unmanaged: AddField only records the field, the
+        # column itself is added (where missing) below
+        migrations.AddField(
+            model_name='orders',
+            name='branch',
+            field=models.CharField(default='main', max_length=32),
+        ),
+        migrations.RunPython(add_branch_column, migrations.RunPython.noop),
+    ]
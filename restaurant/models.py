@@ -1,6 +1,20 @@
 from django.db import models
+from django.dispatch import Signal
 from decimal import Decimal
-from django.contrib.auth.hashers import make_password, check_password
+from .hashing import make_password, check_password
+
+# Sent after a queryset update() of Users / Admin rows with the updated pks
+# (update() sends no post_save, so cached principals would go stale)
+principals_updated = Signal()
+
+
+class PrincipalQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        pks = list(self.values_list('pk', flat=True))
+        updated = super().update(**kwargs)
+        if pks:
+            principals_updated.send(sender=self.model, pks=pks)
+        return updated
 
 class Deliveries(models.Model):
     delivery_id = models.AutoField(primary_key=True)
@@ -11,7 +25,7 @@ class Deliveries(models.Model):
     delivery_option = models.CharField(max_length=50, blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
 
-    # Mirror Orders status/timestamps
+    # Canonical order status + the time each stage was reached
     status = models.CharField(max_length=32, blank=True, null=True)
     confirmed_at = models.DateTimeField(blank=True, null=True)
     preparing_at = models.DateTimeField(blank=True, null=True)
@@ -21,6 +35,11 @@ class Deliveries(models.Model):
     class Meta:
         managed = False  # kung gusto mong hindi i-migrate ng Django
         db_table = 'deliveries'
+        indexes = [
+            # status is the canonical order status (see order_status.py)
+            models.Index(fields=['status'], name='deliveries_status_idx'),
+            models.Index(fields=['order', 'status'], name='deliveries_order_status_idx'),
+        ]
 
 
 
@@ -46,9 +65,16 @@ class MenuItems(models.Model):
     image_url = models.CharField(max_length=255, blank=True, null=True)
     is_available = models.IntegerField(blank=True, null=True)
 
+    # Soft delete: archived items stay for OrderItems history
+    is_deleted = models.IntegerField(default=0)
+    deleted_at = models.DateTimeField(blank=True, null=True)
+
     class Meta:
         managed = False
         db_table = 'menu_items'
+        indexes = [
+            models.Index(fields=['is_deleted', 'category'], name='menu_items_catalog_idx'),
+        ]
 
 
 class Cart(models.Model):
@@ -61,6 +87,9 @@ class Cart(models.Model):
     class Meta:
         managed = False  
         db_table = 'cart'
+        indexes = [
+            models.Index(fields=['user', 'item'], name='cart_user_item_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.item} (x{self.quantity})"
@@ -72,9 +101,15 @@ class Orders(models.Model):
     order_date = models.DateTimeField(blank=True, null=True)
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
 
+    # Kitchen branch; decides which database holds the order (see shards.py)
+    branch = models.CharField(max_length=32, default='main')
+
     class Meta:
         managed = False
         db_table = 'orders'
+        indexes = [
+            models.Index(fields=['user', 'order_date'], name='orders_user_date_idx'),
+        ]
 
 
 
@@ -100,6 +135,9 @@ class OrderItems(models.Model):
     class Meta:
         db_table = 'OrderItems'  # This must match your MySQL table name
         managed = False
+        indexes = [
+            models.Index(fields=['item'], name='order_items_item_idx'),
+        ]
 
 
 class Payments(models.Model):
@@ -125,9 +163,17 @@ class Users(models.Model):
     date_joined = models.DateTimeField(blank=True, null=True)
     is_active = models.IntegerField(blank=True, null=True)
 
+    objects = PrincipalQuerySet.as_manager()
+
     class Meta:
         managed = False
         db_table = 'users'
+        indexes = [
+            # Admin user directory: prefix search and newest-first keyset pages
+            models.Index(fields=['first_name'], name='users_first_name_idx'),
+            models.Index(fields=['last_name'], name='users_last_name_idx'),
+            models.Index(fields=['date_joined', 'user_id'], name='users_joined_idx'),
+        ]
 
 
 class Admin(models.Model):
@@ -137,6 +183,8 @@ class Admin(models.Model):
     name = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = PrincipalQuerySet.as_manager()
+
     class Meta:
         db_table = 'admin'   # IMPORTANT: existing table
         managed = False      # dahil gumawa ka na ng table sa MySQL
@@ -167,3 +215,122 @@ class ContactMessage(models.Model):
         db_table = 'contact_message'  
         managed = False               
 
+
+
+class FeedbackRatingStats(models.Model):
+    # Feedback count per day and rating (0 = no rating), kept up to date on
+    # every submission so the admin summary never scans the feedback table
+    day = models.DateField()
+    rating = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'feedback_rating_stats'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'rating'], name='feedback_rating_stats_day_rating'),
+        ]
+
+
+class OrderRecord(models.Model):
+    # One denormalized row per order (order + customer + delivery + payment
+    # + line count). OrderSummary holds the live orders, ArchivedOrder the
+    # delivered orders moved out by archive_orders; both read the same way
+    order_id = models.IntegerField(primary_key=True)
+    user_id = models.IntegerField()
+    branch = models.CharField(max_length=32, default='main')
+    customer_name = models.CharField(max_length=101, blank=True)
+    customer_email = models.CharField(max_length=100, blank=True)
+    order_date = models.DateTimeField(blank=True, null=True)
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    item_count = models.IntegerField(default=0)
+    status = models.CharField(max_length=32, default='pending')
+    payment_method = models.CharField(max_length=50, blank=True)
+    delivery_address = models.TextField(blank=True)
+    contact_number = models.CharField(max_length=20, blank=True)
+    # contact_number digits reversed, so "ends with 4567" is an index prefix scan
+    phone_rev = models.CharField(max_length=20, blank=True)
+    delivery_option = models.CharField(max_length=50, blank=True)
+    notes = models.TextField(blank=True)
+    confirmed_at = models.DateTimeField(blank=True, null=True)
+    preparing_at = models.DateTimeField(blank=True, null=True)
+    out_for_delivery_at = models.DateTimeField(blank=True, null=True)
+    delivered_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class OrderSummary(OrderRecord):
+    # Written in the same transaction as the order or its status change;
+    # admin lists and reports read this instead of joining
+    class Meta:
+        db_table = 'order_summary'
+        indexes = [
+            models.Index(fields=['status', 'order_date'], name='order_summary_status_idx'),
+            models.Index(fields=['delivered_at'], name='order_summary_delivered_idx'),
+            models.Index(fields=['user_id', 'order_date'], name='order_summary_user_idx'),
+            models.Index(fields=['order_date'], name='order_summary_date_idx'),
+            models.Index(fields=['phone_rev'], name='order_summary_phone_idx'),
+        ]
+
+
+class OrderStatusEvent(models.Model):
+    # Append-only log of order status changes. event_id is the monotonic
+    # sequence that "changes since" polling reads ranges of
+    event_id = models.BigAutoField(primary_key=True)
+    order_id = models.IntegerField()
+    status = models.CharField(max_length=32)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'order_status_events'
+
+
+class OrderSearchToken(models.Model):
+    # Normalized words of each order's customer name and delivery address,
+    # maintained with order_summary; admin order search prefix-scans token
+    order_id = models.IntegerField()
+    token = models.CharField(max_length=32)
+
+    class Meta:
+        db_table = 'order_search_tokens'
+        constraints = [
+            models.UniqueConstraint(fields=['token', 'order_id'], name='order_search_tokens_token_order'),
+        ]
+        indexes = [
+            models.Index(fields=['order_id'], name='order_search_tokens_order_idx'),
+        ]
+
+
+class ArchivedOrder(OrderRecord):
+    # Delivered orders moved out of orders / deliveries / payments /
+    # OrderItems (see archive.py); history and exports read them from here
+    payment_date = models.DateTimeField(blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'archived_orders'
+        indexes = [
+            models.Index(fields=['user_id', 'delivered_at'], name='archived_orders_user_idx'),
+            models.Index(fields=['delivered_at'], name='archived_orders_delivered_idx'),
+            models.Index(fields=['order_date'], name='archived_orders_date_idx'),
+        ]
+
+
+class ArchivedOrderItem(models.Model):
+    # OrderItems rows of archived orders, with the menu item's name and price
+    # at archive time
+    order_item_id = models.IntegerField(primary_key=True)
+    order_id = models.IntegerField()
+    item_id = models.IntegerField()
+    item_name = models.CharField(max_length=100)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.IntegerField()
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        db_table = 'archived_order_items'
+        indexes = [
+            models.Index(fields=['order_id'], name='archived_order_items_order_idx'),
+        ]
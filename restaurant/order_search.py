@@ -0,0 +1,71 @@
+# restaurant/order_search.py
+#
+# Admin order search by order ID, phone, customer name and address.
+# - Phone: order_summary.phone_rev holds the contact number's digits
+#   reversed, so "number ends with 4567" becomes LIKE '7654%' on an index
+# - Name / address: order_search_tokens holds one row per normalized word;
+#   every query word must prefix-match a token of the order
+# Both are written by refresh_order_summaries(), in the same transaction as
+# the order change. Archived orders leave order_summary and their tokens are
+# dropped, so search covers live orders only (the admin page says so).
+
+import re
+
+from .models import OrderSummary, OrderSearchToken
+
+ORDER_SEARCH_LIMIT = 20
+TOKEN_MAX_LENGTH = 32
+MIN_PHONE_DIGITS = 4
+# Compare at most the last 10 digits, so 0917..., 917... and +63 917... match
+PHONE_MATCH_DIGITS = 10
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+PHONE_QUERY_RE = re.compile(r'^[\d\s()+#.-]+$')
+
+
+def phone_key(contact_number):
+    """Digits of a phone number, reversed (the phone_rev lookup key)."""
+    return re.sub(r'\D', '', contact_number or '')[::-1][:20]
+
+def tokenize(*texts):
+    """Distinct lowercase alphanumeric words (2+ characters) of the given texts."""
+    tokens = set()
+    for text in texts:
+        for token in TOKEN_RE.findall((text or '').lower()):
+            if len(token) >= 2:
+                tokens.add(token[:TOKEN_MAX_LENGTH])
+    return tokens
+
+def index_order_tokens(summaries):
+    """Replace the search tokens of the given OrderSummary rows."""
+    order_ids = [summary.order_id for summary in summaries]
+    OrderSearchToken.objects.filter(order_id__in=order_ids).delete()
+    OrderSearchToken.objects.bulk_create([
+        OrderSearchToken(order_id=summary.order_id, token=token)
+        for summary in summaries
+        for token in tokenize(summary.customer_name, summary.delivery_address)
+    ])
+
+def search_orders(query, limit=ORDER_SEARCH_LIMIT):
+    """Newest order summaries matching the query (order ID / phone, or name and address words)."""
+    query = (query or '').strip()
+    summaries = OrderSummary.objects.none()
+
+    if PHONE_QUERY_RE.match(query):
+        digits = re.sub(r'\D', '', query)
+        if not digits:
+            return summaries
+        summaries = OrderSummary.objects.filter(order_id=int(digits[:10]))
+        if len(digits) >= MIN_PHONE_DIGITS:
+            summaries = summaries | OrderSummary.objects.filter(phone_rev__startswith=digits[::-1][:PHONE_MATCH_DIGITS])
+    else:
+        words = tokenize(query)
+        if not words:
+            return summaries
+        summaries = OrderSummary.objects.all()
+        for word in words:
+            summaries = summaries.filter(
+                order_id__in=OrderSearchToken.objects.filter(token__startswith=word).values('order_id')
+            )
+
+    return summaries.order_by('-order_date')[:limit]
@@ -0,0 +1,199 @@
+# restaurant/order_status.py
+#
+# Order state machine. Deliveries.status is the canonical order status
+# (indexed); the stage timestamps record when each stage was reached.
+# Every transition is one conditional UPDATE:
+#
+#   UPDATE deliveries SET status = <new>, <new>_at = now,
+#          <earlier>_at = COALESCE(<earlier>_at, now), ...
+#   WHERE order_id IN (...) AND status IN (<allowed previous>)
+#
+# so two admins acting on the same order can't overwrite each other, and an
+# order can't move backwards. bulk_transition() does the same for a batch of
+# orders and reports what happened to each one.
+#
+# Every status change also appends a row to order_status_events, whose
+# event_id sequence lets admin pages poll for "what changed since N".
+#
+# Orders live on their branch's shard (see shards.py): a batch is split by
+# shard and each part moves in its own transaction on that shard, together
+# with its events and summaries on 'default'.
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Deliveries, Orders, OrderStatusEvent
+from .order_summary import refresh_order_summaries
+from .shards import group_by_shard
+
+ORDER_STATUSES = ('pending', 'confirmed', 'preparing', 'out_for_delivery', 'delivered')
+
+# status -> timestamp column stamped when the order reaches it
+STAGE_TIMESTAMPS = {
+    'confirmed': 'confirmed_at',
+    'preparing': 'preparing_at',
+    'out_for_delivery': 'out_for_delivery_at',
+    'delivered': 'delivered_at',
+}
+
+
+def allowed_previous(new_status):
+    """Statuses an order may move to new_status from (every earlier stage)."""
+    return ORDER_STATUSES[:ORDER_STATUSES.index(new_status)]
+
+CHANGES_PAGE_SIZE = 200
+# Event ids are assigned at INSERT but become visible at COMMIT, so a lower
+# id can show up after a higher one was read. Polling cursors only move past
+# events older than this; newer ones are sent again on the next poll.
+CHANGES_SETTLE_SECONDS = 5
+
+
+def record_status_events(order_ids, status):
+    """Append one status event per order (call inside the transaction that changed them)."""
+    OrderStatusEvent.objects.bulk_create([
+        OrderStatusEvent(order_id=order_id, status=status) for order_id in order_ids
+    ])
+
+def _settled_before():
+    return timezone.now() - timedelta(seconds=CHANGES_SETTLE_SECONDS)
+
+def status_changes(since, limit=CHANGES_PAGE_SIZE):
+    """
+    Return (events, cursor) for up to limit events after event id since,
+    oldest first. The cursor stops before events written in the last
+    CHANGES_SETTLE_SECONDS, which the next call returns again: no event is
+    skipped as long as its transaction commits within that window, and
+    callers must tolerate seeing an event twice.
+    """
+    rows = list(
+        OrderStatusEvent.objects.filter(event_id__gt=since).order_by('event_id')
+        .values_list('event_id', 'order_id', 'status', 'created_at')[:limit]
+    )
+    settled = _settled_before()
+    cursor = since
+    for event_id, _, _, created_at in rows:
+        if created_at > settled:
+            break
+        cursor = event_id
+    return [row[:3] for row in rows], cursor
+
+def latest_event_id():
+    """
+    Cursor for "from now on": the newest event id, settled or not, or 0
+    before the first one. A page seeded with it already shows every change
+    committed when it was rendered, including the admin's own; an event with
+    a lower id still committing at that moment is not reported to it.
+    """
+    latest = OrderStatusEvent.objects.order_by('-event_id').values_list('event_id', flat=True).first()
+    return latest or 0
+
+def _stage_changes(new_status, now):
+    """UPDATE assignments for moving to new_status (earlier stages keep their first timestamp)."""
+    stage = ORDER_STATUSES.index(new_status)
+    changes = {'status': new_status, STAGE_TIMESTAMPS[new_status]: now}
+    for earlier in ORDER_STATUSES[1:stage]:
+        field = STAGE_TIMESTAMPS[earlier]
+        changes[field] = Coalesce(field, Value(now))
+    return changes
+
+def _movable(order_ids, new_status, alias='default'):
+    """Deliveries of the given orders (on one shard) that are still before new_status."""
+    return Deliveries.objects.using(alias).filter(
+        Q(status__in=allowed_previous(new_status)) | Q(status__isnull=True),
+        order_id__in=order_ids,
+    )
+
+def transition_orders(order_ids, new_status):
+    """
+    Move orders to new_status with one conditional UPDATE per shard and
+    refresh their summaries in the same transaction. Returns how many orders moved.
+    Orders already at or past new_status are left alone.
+    """
+    if new_status not in STAGE_TIMESTAMPS:
+        raise ValueError(f"Unknown order status: {new_status!r}")
+    moved = 0
+    for alias, shard_ids in group_by_shard(order_ids).items():
+        with transaction.atomic(), transaction.atomic(using=alias):
+            # Lock the rows that will move so the event log names exactly those
+            moving = list(
+                _movable(shard_ids, new_status, alias).select_for_update()
+                .values_list('order_id', flat=True)
+            )
+            if not moving:
+                continue
+            _movable(moving, new_status, alias).update(**_stage_changes(new_status, timezone.now()))
+            record_status_events(moving, new_status)
+            refresh_order_summaries(moving)
+        moved += len(moving)
+    return moved
+
+def transition_order(order_id, new_status):
+    """Single-order transition. Returns True if the order moved."""
+    return transition_orders([order_id], new_status) > 0
+
+def _bulk_transition_shard(order_ids, new_status, now, alias):
+    """bulk_transition() for orders on one shard; runs inside its transaction."""
+    current = dict(
+        Deliveries.objects.using(alias).select_for_update()
+        .filter(order_id__in=order_ids).order_by('order_id')
+        .values_list('order_id', 'status')
+    )
+    movable = set(allowed_previous(new_status))
+    results = {}
+    for order_id, status in current.items():
+        if status is None or status in movable:
+            results[order_id] = ('moved', new_status)
+        else:
+            results[order_id] = ('unchanged', status)
+
+    _movable(order_ids, new_status, alias).update(**_stage_changes(new_status, now))
+
+    missing = [order_id for order_id in order_ids if order_id not in current]
+    if missing:
+        existing = set(Orders.objects.using(alias).filter(order_id__in=missing).values_list('order_id', flat=True))
+        if new_status == 'confirmed':
+            Deliveries.objects.using(alias).bulk_create([
+                Deliveries(order_id=order_id, status='confirmed', confirmed_at=now)
+                for order_id in missing if order_id in existing
+            ])
+        for order_id in missing:
+            if order_id not in existing:
+                results[order_id] = ('not_found', None)
+            elif new_status == 'confirmed':
+                results[order_id] = ('moved', new_status)
+            else:
+                # No delivery row yet: the order is still pending
+                results[order_id] = ('unchanged', 'pending')
+
+    changed = [order_id for order_id, (result, _) in results.items() if result == 'moved']
+    if changed:
+        record_status_events(changed, new_status)
+        refresh_order_summaries(changed)
+    return results
+
+def bulk_transition(order_ids, new_status):
+    """
+    Move a batch of orders to new_status in one transaction and return
+    {order_id: (result, status)}, where result is 'moved', 'unchanged' (already
+    at or past new_status) or 'not_found'.
+
+    Each shard's delivery rows are locked first, so the per-order results
+    match what the set-based UPDATE actually did. Orders placed without a delivery
+    row get one when they are confirmed.
+    """
+    if new_status not in STAGE_TIMESTAMPS:
+        raise ValueError(f"Unknown order status: {new_status!r}")
+    order_ids = list(dict.fromkeys(order_ids))
+    if not order_ids:
+        return {}
+
+    now = timezone.now()
+    results = {}
+    for alias, shard_ids in group_by_shard(order_ids).items():
+        with transaction.atomic(), transaction.atomic(using=alias):
+            results.update(_bulk_transition_shard(shard_ids, new_status, now, alias))
+    return {order_id: results[order_id] for order_id in order_ids}
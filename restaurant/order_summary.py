@@ -0,0 +1,169 @@
+# restaurant/order_summary.py
+#
+# Maintains the order_summary read model (one flat row per order).
+# Writers call refresh_order_summaries() inside the same transaction as the
+# order / delivery change; readers filter one narrow, indexed table. The
+# order search keys (phone_rev, order_search_tokens) are refreshed with it.
+# Orders are read from their branch shard, customers and menu items from
+# 'default'; order_summary itself lives on 'default' for every branch.
+
+from django.db import connections, router
+from django.db.models import Count, Min
+
+from .models import Orders, OrderItems, Deliveries, Payments, OrderSummary, Users, MenuItems
+from .order_search import index_order_tokens, phone_key
+from .shards import group_by_shard, on_shard, shard_aliases
+
+SUMMARY_FIELDS = [
+    field.name for field in OrderSummary._meta.concrete_fields
+    if field.name not in ('order_id', 'updated_at')
+]
+DELIVERY_FIELDS = [
+    'delivery_address', 'contact_number', 'delivery_option', 'notes',
+    'confirmed_at', 'preparing_at', 'out_for_delivery_at', 'delivered_at',
+]
+# Order IDs per IN (...) when fetching lines, so a large export never sends
+# one giant statement
+ORDER_LINES_CHUNK = 500
+
+
+def _shard_rows(alias, order_ids):
+    """(orders, item_counts, deliveries, payments) of orders on one shard."""
+    orders = list(
+        on_shard(Orders, alias).filter(order_id__in=order_ids)
+        .values('order_id', 'user_id', 'branch', 'order_date', 'total_amount')
+    )
+    item_counts = dict(
+        on_shard(OrderItems, alias).filter(order_id__in=order_ids)
+        .values('order_id').annotate(count=Count('order_item_id'))
+        .values_list('order_id', 'count')
+    )
+    # An order has at most one delivery/payment in practice; take the first one
+    first_delivery = (
+        on_shard(Deliveries, alias).filter(order_id__in=order_ids)
+        .values('order_id').annotate(first=Min('delivery_id')).values('first')
+    )
+    deliveries = {
+        row['order_id']: row
+        for row in on_shard(Deliveries, alias).filter(delivery_id__in=first_delivery).values('order_id', 'status', *DELIVERY_FIELDS)
+    }
+    payments = {}
+    for order_id, method in (
+        on_shard(Payments, alias).filter(order_id__in=order_ids).order_by('-payment_id')
+        .values_list('order_id', 'payment_method')
+    ):
+        payments[order_id] = method
+    return orders, item_counts, deliveries, payments
+
+def refresh_order_summaries(order_ids):
+    """Recompute the summary rows of the given orders with a fixed number of queries per shard."""
+    order_ids = list(order_ids)
+    if not order_ids:
+        return 0
+
+    orders, item_counts, deliveries, payments = [], {}, {}, {}
+    for alias, shard_ids in group_by_shard(order_ids).items():
+        shard_orders, shard_counts, shard_deliveries, shard_payments = _shard_rows(alias, shard_ids)
+        orders += shard_orders
+        item_counts.update(shard_counts)
+        deliveries.update(shard_deliveries)
+        payments.update(shard_payments)
+    # Customers live on 'default', never joined from a shard
+    customers = Users.objects.only('first_name', 'last_name', 'email').in_bulk(
+        {order['user_id'] for order in orders}
+    )
+
+    summaries = []
+    for order in orders:
+        delivery = deliveries.get(order['order_id'])
+        customer = customers.get(order['user_id'])
+        summary = OrderSummary(
+            order_id=order['order_id'],
+            user_id=order['user_id'],
+            branch=order['branch'],
+            customer_name=f"{customer.first_name or ''} {customer.last_name or ''}".strip() if customer else '',
+            customer_email=customer.email if customer else '',
+            order_date=order['order_date'],
+            total_amount=order['total_amount'],
+            item_count=item_counts.get(order['order_id'], 0),
+            status=(delivery['status'] if delivery else None) or 'pending',
+            payment_method=payments.get(order['order_id']) or '',
+        )
+        for field in DELIVERY_FIELDS:
+            value = delivery[field] if delivery else None
+            if value is None and not field.endswith('_at'):
+                value = ''
+            setattr(summary, field, value)
+        summary.phone_rev = phone_key(summary.contact_number)
+        summaries.append(summary)
+
+    # MySQL upserts on any unique key (ON DUPLICATE KEY UPDATE) and rejects
+    # a conflict target; PostgreSQL / SQLite need one
+    upsert = {'update_conflicts': True, 'update_fields': SUMMARY_FIELDS + ['updated_at']}
+    if connections[router.db_for_write(OrderSummary)].features.supports_update_conflicts_with_target:
+        upsert['unique_fields'] = ['order_id']
+    OrderSummary.objects.bulk_create(summaries, **upsert)
+    # Orders that no longer exist drop out of the read model
+    OrderSummary.objects.filter(order_id__in=order_ids).exclude(
+        order_id__in=[summary.order_id for summary in summaries]
+    ).delete()
+    index_order_tokens(summaries)
+    return len(summaries)
+
+def refresh_customer_summaries(user_id):
+    """Re-denormalize a customer's name and email (and search tokens) after a profile change."""
+    return refresh_order_summaries(
+        OrderSummary.objects.filter(user_id=user_id).values_list('order_id', flat=True)
+    )
+
+def order_lines(order_ids):
+    """
+    {order_id: [{'name', 'quantity', 'price', ...}]} for live orders: one
+    query per shard and ORDER_LINES_CHUNK orders, plus one for the menu
+    (names and prices live on 'default').
+    """
+    rows = []
+    for alias, shard_ids in group_by_shard(order_ids).items():
+        for start in range(0, len(shard_ids), ORDER_LINES_CHUNK):
+            rows += on_shard(OrderItems, alias).filter(
+                order_id__in=shard_ids[start:start + ORDER_LINES_CHUNK]
+            ).values('order_item_id', 'order_id', 'item_id', 'quantity', 'subtotal')
+    menu = MenuItems.objects.only('name', 'price').in_bulk({row['item_id'] for row in rows})
+    lines = {}
+    for row in sorted(rows, key=lambda row: row['order_item_id']):
+        item = menu.get(row['item_id'])
+        lines.setdefault(row['order_id'], []).append({
+            **row,
+            'name': item.name if item else None,
+            'price': item.price if item else None,
+        })
+    return lines
+
+def attach_order_lines(summaries):
+    """Evaluate summaries and set .lines ([{'name', 'quantity', 'price'}]) on each."""
+    summaries = list(summaries)
+    lines = order_lines([summary.order_id for summary in summaries])
+    for summary in summaries:
+        summary.lines = lines.get(summary.order_id, [])
+    return summaries
+
+def rebuild_order_summaries(batch_size=1000):
+    """Recompute every summary row, shard by shard, in batches of order IDs. Yields the running count."""
+    live = set()
+    total = 0
+    for alias in shard_aliases():
+        last_id = 0
+        while True:
+            order_ids = list(
+                on_shard(Orders, alias).filter(order_id__gt=last_id).order_by('order_id')
+                .values_list('order_id', flat=True)[:batch_size]
+            )
+            if not order_ids:
+                break
+            live.update(order_ids)
+            total += refresh_order_summaries(order_ids)
+            last_id = order_ids[-1]
+            yield total
+    # Summaries of orders that no longer exist anywhere
+    stale = set(OrderSummary.objects.values_list('order_id', flat=True)) - live
+    OrderSummary.objects.filter(order_id__in=stale).delete()
@@ -0,0 +1,40 @@
+# restaurant/pagination.py
+
+import base64
+import json
+
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import CursorPagination
+
+
+class MenuCursorPagination(CursorPagination):
+    """
+    Cursor pagination over menu items ordered by item_id.
+    Only used when the client asks for it (?cursor= or ?page_size=), so
+    plain /api/menu/ keeps returning a flat list for existing pages.
+    """
+    ordering = 'item_id'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+def encode_keyset(when, pk):
+    """Opaque cursor for a (datetime, id) keyset position; when may be None."""
+    payload = {'d': when.isoformat() if when else None, 'id': pk}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_keyset(cursor):
+    """Return (datetime, id) from a cursor; raises ValueError if malformed."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        when = parse_datetime(payload['d']) if payload['d'] else None
+        return when, int(payload['id'])
+    except (TypeError, KeyError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,101 @@
+# restaurant/principals.py
+#
+# Logged-in user/admin lookups without a DB hit per request.
+# - Memoized on the request (one lookup per request at most)
+# - Backed by a short-TTL cache keyed by ID + credential version
+# - Saving a Users/Admin row (or a queryset update() of them) bumps the
+#   version, so password changes, profile edits and deactivation are seen
+#   on the very next request
+# - Versions live in the 'principals' cache, which every worker shares, so
+#   a bump on one worker reaches all of them; the principals themselves
+#   stay in the per-process default cache
+
+import time
+
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Users, Admin, principals_updated
+
+PRINCIPAL_TTL = 60
+
+# kind -> (model, session key holding its ID, session key prefix)
+PRINCIPALS = {
+    'user': (Users, 'user_session_id', 'user_'),
+    'admin': (Admin, 'admin_session_id', 'admin_'),
+}
+
+
+def _version_key(kind, pk):
+    return f'principal:{kind}:{pk}:version'
+
+def credential_version(kind, pk):
+    """Return the current credential version token for a principal."""
+    versions = caches['principals']
+    key = _version_key(kind, pk)
+    version = versions.get(key)
+    if version is None:
+        versions.add(key, time.time_ns(), None)
+        version = versions.get(key)
+    return version
+
+def invalidate_principal(kind, pk):
+    """Drop cached copies of a principal by moving it to a new credential version."""
+    def _bump():
+        caches['principals'].set(_version_key(kind, pk), time.time_ns(), None)
+
+    _bump()
+    # Again once the change is visible, in case another worker cached the
+    # old row under the new version before the commit
+    transaction.on_commit(_bump)
+
+def load_principal(kind, pk):
+    """Return the Users/Admin row for an ID, from cache when possible."""
+    model = PRINCIPALS[kind][0]
+    key = f'principal:{kind}:{pk}:{credential_version(kind, pk)}'
+    principal = cache.get(key)
+    if principal is None:
+        principal = model.objects.filter(pk=pk).first()
+        if principal is None:
+            return None
+        cache.set(key, principal, PRINCIPAL_TTL)
+    return principal
+
+def request_principal(request, kind):
+    """Return the logged-in principal for this request, looked up at most once."""
+    attr = f'_kx_{kind}'
+    if hasattr(request, attr):
+        return getattr(request, attr)
+
+    model, session_key, prefix = PRINCIPALS[kind]
+    principal = None
+    pk = request.session.get(session_key)
+    if pk:
+        principal = load_principal(kind, pk)
+        if principal is None or getattr(principal, 'is_active', 1) == 0:
+            # Account gone or deactivated: clear only this principal's session keys
+            principal = None
+            for key in [k for k in request.session.keys() if k.startswith(prefix)]:
+                del request.session[key]
+
+    setattr(request, attr, principal)
+    return principal
+
+
+@receiver(post_save, sender=Users)
+@receiver(post_delete, sender=Users)
+def _invalidate_user(sender, instance, **kwargs):
+    invalidate_principal('user', instance.pk)
+
+@receiver(post_save, sender=Admin)
+@receiver(post_delete, sender=Admin)
+def _invalidate_admin(sender, instance, **kwargs):
+    invalidate_principal('admin', instance.pk)
+
+@receiver(principals_updated)
+def _invalidate_updated(sender, pks, **kwargs):
+    kind = 'admin' if sender is Admin else 'user'
+    for pk in pks:
+        invalidate_principal(kind, pk)
@@ -0,0 +1,82 @@
+# restaurant/routers.py
+#
+# Read-replica routing. Heavy read paths (catalog, dashboards, exports,
+# order history) are wrapped in @replica_reads; their queries go to the
+# 'replica' alias when settings.DATABASES has one. Everything else, and
+# every write, uses 'default'.
+#
+# Read-your-writes: once a request writes, its remaining reads go to the
+# primary, and ReplicaPinningMiddleware keeps the client on the primary for
+# REPLICA_PIN_SECONDS so the page it is redirected to sees its own write
+# even if the replica lags.
+
+import contextvars
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = 'replica'
+PIN_COOKIE = 'kx_primary'
+
+_replica_reads = contextvars.ContextVar('kx_replica_reads', default=False)
+_request_state = contextvars.ContextVar('kx_request_db_state', default=None)
+
+
+class RequestDBState:
+    """Per-request routing state: pinned to the primary, and whether it wrote."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def replica_reads(func):
+    """Run func with its reads routed to the replica (a view, a method or any helper)."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _replica_reads.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+def begin_request(pinned=False):
+    """Start tracking a request's writes; returns the token for end_request()."""
+    return _request_state.set(RequestDBState(pinned))
+
+def end_request(token):
+    """Stop tracking the request; returns its RequestDBState."""
+    state = _request_state.get()
+    _request_state.reset(token)
+    return state
+
+def replica_available():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or not replica_available():
+            return None
+        state = _request_state.get()
+        if state is not None and (state.pinned or state.wrote):
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction on the primary must see that transaction
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_DB_ALIAS
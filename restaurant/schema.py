@@ -0,0 +1,117 @@
+# restaurant/schema.py
+#
+# Helpers for migrations that touch the unmanaged (hand-created) tables.
+# Django skips schema operations for managed = False models, so these add
+# columns and indexes directly, and only when the live table lacks them.
+# ensure_schema() does all of it for every unmanaged model: it creates
+# missing tables (e.g. a fresh local or test database) and brings existing
+# ones up to models.py's columns and Meta.indexes.
+
+def _table_columns(connection, table):
+    with connection.cursor() as cursor:
+        if table not in connection.introspection.table_names(cursor):
+            return None
+        description = connection.introspection.get_table_description(cursor, table)
+    return {column.name for column in description}
+
+def _table_constraints(connection, table):
+    with connection.cursor() as cursor:
+        if table not in connection.introspection.table_names(cursor):
+            return None
+        return connection.introspection.get_constraints(cursor, table)
+
+def table_exists(connection, table):
+    """True if the live database has the table."""
+    with connection.cursor() as cursor:
+        return table in connection.introspection.table_names(cursor)
+
+def add_missing_field(schema_editor, model, field_name):
+    """Add a model field's column if the table exists and does not have it yet."""
+    columns = _table_columns(schema_editor.connection, model._meta.db_table)
+    field = model._meta.get_field(field_name)
+    if columns is not None and field.column not in columns:
+        schema_editor.add_field(model, field)
+
+def add_missing_index(schema_editor, model, index):
+    """Create an index if the table exists and has no index by that name."""
+    constraints = _table_constraints(schema_editor.connection, model._meta.db_table)
+    if constraints is not None and index.name not in constraints:
+        schema_editor.add_index(model, index)
+
+def remove_index_if_present(schema_editor, model, index):
+    """Drop an index by name if it exists."""
+    constraints = _table_constraints(schema_editor.connection, model._meta.db_table)
+    if constraints and index.name in constraints:
+        schema_editor.remove_index(model, index)
+
+def add_missing_column_index(schema_editor, table, name, columns):
+    """
+    Create an index on raw columns if the table exists and has no index by
+    that name. For columns the migration state has no field for (the foreign
+    keys of the unmanaged models).
+    """
+    constraints = _table_constraints(schema_editor.connection, table)
+    if constraints is not None and name not in constraints:
+        quote = schema_editor.quote_name
+        schema_editor.execute('CREATE INDEX %s ON %s (%s)' % (
+            quote(name), quote(table), ', '.join(quote(column) for column in columns),
+        ))
+
+def remove_column_index_if_present(schema_editor, table, name):
+    """Drop an index on raw columns by name if it exists."""
+    constraints = _table_constraints(schema_editor.connection, table)
+    if constraints and name in constraints:
+        quote = schema_editor.quote_name
+        schema_editor.execute(schema_editor.sql_delete_index % {'table': quote(table), 'name': quote(name)})
+
+def unmanaged_models(app_label='restaurant'):
+    """The app's managed = False models, each after the models it has foreign keys to."""
+    from django.apps import apps
+
+    pending = [model for model in apps.get_app_config(app_label).get_models() if not model._meta.managed]
+    ordered = []
+    while pending:
+        for model in pending:
+            targets = {
+                field.related_model for field in model._meta.concrete_fields
+                if field.is_relation and field.related_model is not model
+            }
+            if not targets & set(pending):
+                ordered.append(model)
+                pending.remove(model)
+                break
+        else:
+            # Circular references: the rest in declaration order
+            ordered.extend(pending)
+            break
+    return ordered
+
+def ensure_schema(schema_editor, models):
+    """
+    Create the missing tables, columns and Meta.indexes of the given models.
+    Returns a list of what was (or, with a collect_sql editor, would be) done.
+    """
+    actions = []
+    for model in models:
+        table = model._meta.db_table
+        if not table_exists(schema_editor.connection, table):
+            schema_editor.create_model(model)
+            actions.append(f"create table {table}")
+            # create_model() leaves out every index of an unmanaged model,
+            # including the foreign key ones; add those here, Meta.indexes below
+            for field in model._meta.local_concrete_fields:
+                for statement in schema_editor._field_indexes_sql(model, field):
+                    schema_editor.execute(statement)
+            constraints = {}
+        else:
+            columns = _table_columns(schema_editor.connection, table)
+            for field in model._meta.local_concrete_fields:
+                if field.column not in columns:
+                    schema_editor.add_field(model, field)
+                    actions.append(f"add column {table}.{field.column}")
+            constraints = _table_constraints(schema_editor.connection, table)
+        for index in model._meta.indexes:
+            if index.name not in constraints:
+                schema_editor.add_index(model, index)
+                actions.append(f"add index {index.name} on {table}")
+    return actions
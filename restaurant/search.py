@@ -0,0 +1,216 @@
+# restaurant/search.py
+#
+# In-process full-text index over the menu catalog (name, description,
+# category). Queries never touch the DB; the index follows the catalog
+# version and reindexes only the items a catalog write reports as changed.
+
+# ============================================================================
+# IMPORTS
+# ============================================================================
+import bisect
+import re
+import threading
+from collections import defaultdict
+from decimal import Decimal
+
+from django.dispatch import receiver
+
+from .catalog import catalog_changed, catalog_items, get_catalog_version
+
+# Field weights used for ranking: a hit in the name beats one in the description
+FIELD_WEIGHTS = {'name': 3, 'category': 2, 'description': 1}
+DOC_FIELDS = ['item_id', 'name', 'description', 'price', 'category', 'image_url', 'is_available']
+MIN_TRIGRAM_SIMILARITY = 0.3
+
+_word_re = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lowercase words in a piece of text."""
+    return _word_re.findall((text or '').lower())
+
+def trigrams(term):
+    """Character trigrams of a term, padded so short words still get some."""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ============================================================================
+# INDEX
+# ============================================================================
+
+class MenuSearchIndex:
+    """Inverted index: term -> {item_id: weight}, plus a trigram index over terms."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs = {}
+        self._postings = defaultdict(dict)
+        self._trigrams = defaultdict(set)
+        self._terms = []  # sorted, for prefix lookups
+        self._version = None
+
+    # --- maintenance --------------------------------------------------------
+
+    def rebuild(self):
+        """Reindex the whole catalog."""
+        version = get_catalog_version()
+        rows = list(catalog_items().values(*DOC_FIELDS))
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._trigrams.clear()
+            self._terms = []
+            for row in rows:
+                self._add(row)
+            self._version = version
+
+    def refresh_items(self, item_ids, version, previous=None):
+        """Reindex only the given items (removing any that left the catalog)."""
+        with self._lock:
+            if self._version is None or self._version != previous:
+                # Never built, or other changes were missed: rebuild on next query
+                self._version = None
+                return
+        rows = {row['item_id']: row for row in catalog_items().filter(item_id__in=item_ids).values(*DOC_FIELDS)}
+        with self._lock:
+            for item_id in item_ids:
+                self._remove(item_id)
+                if item_id in rows:
+                    self._add(rows[item_id])
+            self._version = version
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def ensure_current(self):
+        """Rebuild if another process (or a bulk write) moved the catalog version."""
+        if self._version is None or self._version != get_catalog_version():
+            self.rebuild()
+
+    def _doc_terms(self, row):
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(row.get(field)):
+                weights[term] = max(weights.get(term, 0), weight)
+        return weights
+
+    def _add(self, row):
+        item_id = row['item_id']
+        self._docs[item_id] = row
+        for term, weight in self._doc_terms(row).items():
+            if term not in self._postings:
+                bisect.insort(self._terms, term)
+                for gram in trigrams(term):
+                    self._trigrams[gram].add(term)
+            self._postings[term][item_id] = weight
+
+    def _remove(self, item_id):
+        row = self._docs.pop(item_id, None)
+        if row is None:
+            return
+        for term in self._doc_terms(row):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(item_id, None)
+            if not postings:
+                del self._postings[term]
+                self._terms.pop(bisect.bisect_left(self._terms, term))
+                for gram in trigrams(term):
+                    self._trigrams[gram].discard(term)
+
+    # --- lookups -------------------------------------------------------------
+
+    def _prefix_terms(self, token):
+        start = bisect.bisect_left(self._terms, token)
+        end = bisect.bisect_left(self._terms, token + '\uffff')
+        return self._terms[start:end]
+
+    def _fuzzy_terms(self, token):
+        grams = trigrams(token)
+        overlap = defaultdict(int)
+        for gram in grams:
+            for term in self._trigrams.get(gram, ()):
+                overlap[term] += 1
+        matches = []
+        for term, shared in overlap.items():
+            similarity = shared / len(grams | trigrams(term))
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                matches.append(term)
+        return matches
+
+    def _match_token(self, token):
+        """Return {item_id: score} for one query token: prefix hits, else typo-tolerant hits."""
+        scores = {}
+        terms = self._prefix_terms(token)
+        factor = 1.0
+        if not terms:
+            terms = self._fuzzy_terms(token)
+            factor = 0.5
+        for term in terms:
+            bonus = 1.0 if term == token else 0.8
+            for item_id, weight in self._postings[term].items():
+                score = weight * bonus * factor
+                if score > scores.get(item_id, 0):
+                    scores[item_id] = score
+        return scores
+
+    def search(self, query='', category=None, min_price=None, max_price=None,
+               available_only=False, limit=None):
+        """Return matching catalog rows, best match first."""
+        self.ensure_current()
+        with self._lock:
+            tokens = tokenize(query)
+            if tokens:
+                scores = None
+                for token in tokens:
+                    token_scores = self._match_token(token)
+                    if scores is None:
+                        scores = token_scores
+                    else:
+                        scores = {item_id: scores[item_id] + token_scores[item_id]
+                                  for item_id in scores.keys() & token_scores.keys()}
+                    if not scores:
+                        return []
+            else:
+                scores = dict.fromkeys(self._docs, 0)
+
+            results = []
+            for item_id, score in scores.items():
+                doc = self._docs[item_id]
+                if category and (doc['category'] or '').lower() != category:
+                    continue
+                if min_price is not None and doc['price'] < min_price:
+                    continue
+                if max_price is not None and doc['price'] > max_price:
+                    continue
+                if available_only and doc['is_available'] != 1:
+                    continue
+                results.append((score, doc))
+
+        results.sort(key=lambda pair: (-pair[0], pair[1]['name'].lower()))
+        docs = [doc for _, doc in results]
+        # A negative limit would slice from the end
+        return docs[:max(limit, 1)] if limit else docs
+
+
+menu_index = MenuSearchIndex()
+
+
+@receiver(catalog_changed)
+def _reindex_changed_items(sender, item_ids=None, version=None, previous=None, **kwargs):
+    if item_ids is None:
+        menu_index.invalidate()
+    else:
+        menu_index.refresh_items(item_ids, version, previous)
+
+
+def parse_price(value):
+    """Parse an optional price filter; returns None when missing or invalid (NaN / Infinity too)."""
+    try:
+        price = Decimal(value) if value not in (None, '') else None
+    except ArithmeticError:
+        return None
+    return price if price is not None and price.is_finite() else None
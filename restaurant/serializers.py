@@ -1,11 +1,21 @@
 from rest_framework import serializers
 from .models import MenuItems, Cart, Orders
+from .catalog import catalog_items
 
 # Serializer for Menu Items
 class MenuItemsSerializer(serializers.ModelSerializer):
     class Meta:
         model = MenuItems
         fields = '__all__'
+        read_only_fields = ['is_deleted', 'deleted_at']
+
+    def __init__(self, *args, **kwargs):
+        # Optional sparse fieldset, e.g. fields=['item_id', 'name', 'price']
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 
 # Serializer for individual Cart Items
@@ -13,7 +23,7 @@ class CartSerializer(serializers.ModelSerializer):
     # Include nested menu item details
     item = MenuItemsSerializer(read_only=True)
     item_id = serializers.PrimaryKeyRelatedField(
-        queryset=MenuItems.objects.all(), source='item', write_only=True
+        queryset=catalog_items(), source='item', write_only=True
     )
 
     # Add flattened image_url field for frontend
@@ -0,0 +1,153 @@
+# restaurant/shards.py
+#
+# Branch sharding for order storage. Each kitchen branch's orders, order
+# items, deliveries and payments live on that branch's database alias
+# (settings.BRANCH_SHARDS); users, the menu, carts and the order_summary /
+# event / archive tables stay on 'default'.
+# - Order IDs are range-partitioned: shard N hands out IDs from
+#   N * SHARD_ID_SPAN + 1, so an order's shard follows from its ID alone
+# - Shard queries name their alias explicitly (.using()); nothing joins
+#   across databases, names and prices are looked up on 'default'
+# - Admin-wide reads go through order_summary, which every shard writes
+#   into; for_each_shard() is the scatter-gather for the rest
+
+from django.apps.registry import Apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models
+
+SHARD_ID_SPAN = 100_000_000
+SHARDED_MODELS = ('Orders', 'OrderItems', 'Deliveries', 'Payments')
+
+
+def branch_shard(branch):
+    """Database alias of a branch. Raises KeyError for unknown branches."""
+    return settings.BRANCH_SHARDS[branch]['alias']
+
+def shard_aliases():
+    """Every shard alias, in shard index order."""
+    shards = sorted(settings.BRANCH_SHARDS.values(), key=lambda shard: shard['index'])
+    return list(dict.fromkeys(shard['alias'] for shard in shards))
+
+def is_shard_alias(alias):
+    """True for the extra branch databases (not 'default', which is shard 0 as well)."""
+    return alias != DEFAULT_DB_ALIAS and alias in shard_aliases()
+
+def shard_index(alias):
+    for shard in settings.BRANCH_SHARDS.values():
+        if shard['alias'] == alias:
+            return shard['index']
+    return 0
+
+def order_shard(order_id):
+    """Database alias holding the order (by its ID range)."""
+    index = int(order_id) // SHARD_ID_SPAN
+    for shard in settings.BRANCH_SHARDS.values():
+        if shard['index'] == index:
+            return shard['alias']
+    return DEFAULT_DB_ALIAS
+
+def group_by_shard(order_ids):
+    """{alias: [order_id, ...]} for the given orders."""
+    groups = {}
+    for order_id in order_ids:
+        groups.setdefault(order_shard(order_id), []).append(order_id)
+    return groups
+
+def on_shard(model, alias):
+    """model's queryset on a shard; the 'default' shard is left to the routers (replica reads)."""
+    return model.objects.all() if alias == DEFAULT_DB_ALIAS else model.objects.using(alias)
+
+def for_each_shard(fetch):
+    """Scatter-gather: call fetch(alias) on every shard and chain the results."""
+    results = []
+    for alias in shard_aliases():
+        results.extend(fetch(alias))
+    return results
+
+def is_sharded(model):
+    return model._meta.app_label == 'restaurant' and model.__name__ in SHARDED_MODELS
+
+
+def shard_models():
+    """
+    Copies of the sharded models for creating their tables on a shard:
+    foreign keys to tables that stay on 'default' (users, menu_items) become
+    plain indexed integer columns, since no database can check them.
+    """
+    from . import models as app_models
+
+    registry = Apps()
+    copies = {}
+    for name in SHARDED_MODELS:
+        model = getattr(app_models, name)
+        attrs = {'__module__': __name__}
+        for field in model._meta.local_fields:
+            if field.is_relation and field.related_model.__name__ not in SHARDED_MODELS:
+                attrs[field.name] = models.IntegerField(db_column=field.column, db_index=True)
+            elif field.is_relation:
+                attrs[field.name] = models.ForeignKey(
+                    field.related_model.__name__, models.DO_NOTHING,
+                    db_column=field.column, related_name='+',
+                )
+            else:
+                attrs[field.name] = field.clone()
+        attrs['Meta'] = type('Meta', (), {
+            'app_label': 'restaurant_shard',
+            'apps': registry,
+            'db_table': model._meta.db_table,
+            'managed': False,
+            'indexes': [index.clone() for index in model._meta.indexes],
+        })
+        copies[name] = type(name, (models.Model,), attrs)
+    return list(copies.values())
+
+def schema_models(alias):
+    """The unmanaged models whose tables belong on a database alias."""
+    from .schema import unmanaged_models
+
+    return shard_models() if is_shard_alias(alias) else unmanaged_models()
+
+def seed_shard_sequences(alias):
+    """Start the shard's ID sequences at the beginning of its ID range (no-op for shard 0)."""
+    start = shard_index(alias) * SHARD_ID_SPAN
+    if not start:
+        return
+    connection = connections[alias]
+    from . import models as app_models
+
+    with connection.cursor() as cursor:
+        for name in SHARDED_MODELS:
+            model = getattr(app_models, name)
+            table, pk = model._meta.db_table, model._meta.pk.column
+            cursor.execute(f'SELECT MAX({connection.ops.quote_name(pk)}) FROM {connection.ops.quote_name(table)}')
+            if (cursor.fetchone()[0] or 0) >= start:
+                continue
+            if connection.vendor == 'sqlite':
+                cursor.execute('DELETE FROM sqlite_sequence WHERE name = %s', [table])
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, start])
+            else:
+                cursor.execute(f'ALTER TABLE {connection.ops.quote_name(table)} AUTO_INCREMENT = {start + 1}')
+
+
+class ShardRouter:
+    """
+    Keeps shard aliases to the sharded tables: migrations never run there,
+    and objects reached from a sharded row (order.user, item.item) are read
+    from 'default' instead of the row's shard.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        source = instance._state.db if instance is not None else None
+        if source is None or not is_shard_alias(source):
+            return None
+        # order.items stays on the order's shard, order.user comes from 'default'
+        return source if is_sharded(model) else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_read(model, **hints)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if is_shard_alias(db):
+            return False
+        return None
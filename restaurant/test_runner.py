@@ -0,0 +1,21 @@
+# restaurant/test_runner.py
+#
+# Most models are managed = False, so Django's test database would have no
+# users / orders / deliveries tables. This runner builds them (with their
+# Meta.indexes) right after the test databases are migrated; branch shard
+# databases get just the order tables (see shards.py).
+from django.test.runner import DiscoverRunner
+
+from .schema import ensure_schema
+from .shards import is_shard_alias, schema_models, seed_shard_sequences
+
+
+class UnmanagedSchemaTestRunner(DiscoverRunner):
+    def setup_databases(self, **kwargs):
+        old_config = super().setup_databases(**kwargs)
+        for connection, _, _ in old_config:
+            with connection.schema_editor() as editor:
+                ensure_schema(editor, schema_models(connection.alias))
+            if is_shard_alias(connection.alias):
+                seed_shard_sequences(connection.alias)
+        return old_config
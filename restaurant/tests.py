@@ -1,3 +1,820 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.sessions.backends.cached_db import KEY_PREFIX
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .archive import archive_orders
+from .catalog import CATALOG_VERSION_KEY, archive_menu_item, catalog_items, import_catalog
+from .feedback import FeedbackBuffer, feedback_page, rating_summary, rebuild_rating_stats
+from .hashing import HashingBusy, acheck_password, amake_password
+from .history import order_history_page
+from .models import (
+    Admin, ArchivedOrder, Cart, Deliveries, Feedback, FeedbackRatingStats, MenuItems, OrderItems, Orders,
+    OrderStatusEvent, OrderSummary, Users,
+)
+from .order_status import bulk_transition, latest_event_id, record_status_events, status_changes, transition_order
+from .order_search import search_orders
+from .order_summary import order_lines
+from .principals import credential_version, load_principal
+from .routers import ReplicaRouter, begin_request, end_request, replica_reads
+from .schema import unmanaged_models
+from .search import menu_index
+from .shards import SHARD_ID_SPAN, ShardRouter, order_shard
+from .throttle import consume
+
+SHARD = 'shard_north'
+
+
+@unittest.skipUnless(SHARD in settings.DATABASES, "needs --settings=kusinaexpress.test_settings")
+class BranchShardTests(TestCase):
+    """Orders of the 'north' branch live on shard_north, 'main' orders on default."""
+
+    databases = {'default', SHARD}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Users.objects.create(
+            email='ana@example.com', password=make_password('Passw0rd!'),
+            first_name='Ana', last_name='Cruz', date_joined=timezone.now(), is_active=1,
+        )
+        # Admin.save() hashes a plain password itself
+        Admin.objects.create(email='admin@example.com', password='Passw0rd!', name='Admin')
+        cls.adobo = MenuItems.objects.create(name='Adobo', price=100, category='meals', is_available=1)
+        cls.sinigang = MenuItems.objects.create(name='Sinigang', price=150, category='meals', is_available=1)
+
+    def setUp(self):
+        # Login attempts are throttled through the 'throttle' cache
+        for cache in caches.all():
+            cache.clear()
+        self.client.post('/login/', {'email': 'ana@example.com', 'password': 'Passw0rd!', 'role': 'user'})
+
+    def place_order(self, branch, item, quantity=1, **delivery):
+        self.client.post(
+            '/api/cart/add/', json.dumps({'item_id': item.item_id, 'quantity': quantity}),
+            content_type='application/json',
+        )
+        body = {'payment_method': 'gcash', 'address': 'QC', **delivery}
+        if branch:
+            body['branch'] = branch
+        response = self.client.post('/api/orders/', json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['order_id']
+
+    def test_order_is_placed_on_its_branch_shard(self):
+        main_id = self.place_order(None, self.adobo)
+        north_id = self.place_order('north', self.sinigang, 2)
+
+        self.assertLess(main_id, SHARD_ID_SPAN)
+        self.assertEqual(north_id, SHARD_ID_SPAN + 1)
+        self.assertEqual(order_shard(main_id), 'default')
+        self.assertEqual(order_shard(north_id), SHARD)
+        self.assertFalse(Orders.objects.filter(pk=north_id).exists())
+        order = Orders.objects.using(SHARD).get(pk=north_id)
+        self.assertEqual(order.branch, 'north')
+        self.assertEqual(OrderItems.objects.using(SHARD).filter(order_id=north_id).count(), 1)
+        self.assertTrue(Deliveries.objects.using(SHARD).filter(order_id=north_id, status='pending').exists())
+
+        summary = OrderSummary.objects.get(order_id=north_id)
+        self.assertEqual((summary.branch, summary.customer_name, summary.item_count), ('north', 'Ana Cruz', 1))
+
+    def test_order_lines_are_fetched_in_chunks(self):
+        main_ids = [self.place_order(None, self.adobo), self.place_order(None, self.sinigang, 3)]
+        north_id = self.place_order('north', self.sinigang, 2)
+
+        with mock.patch('restaurant.order_summary.ORDER_LINES_CHUNK', 1):
+            # One query per main order, then the menu; the north order is on its shard
+            with self.assertNumQueries(3), self.assertNumQueries(1, using=SHARD):
+                lines = order_lines(main_ids + [north_id])
+        self.assertEqual(
+            [(lines[order_id][0]['name'], lines[order_id][0]['quantity']) for order_id in main_ids + [north_id]],
+            [('Adobo', 1), ('Sinigang', 3), ('Sinigang', 2)],
+        )
+
+    def test_unknown_branch_is_rejected(self):
+        self.client.post(
+            '/api/cart/add/', json.dumps({'item_id': self.adobo.item_id, 'quantity': 1}),
+            content_type='application/json',
+        )
+        response = self.client.post('/api/orders/', json.dumps({'branch': 'south'}), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_router_keeps_related_reads_on_the_right_database(self):
+        north_id = self.place_order('north', self.adobo)
+        order = Orders.objects.using(SHARD).get(pk=north_id)
+        router = ShardRouter()
+
+        self.assertEqual(router.db_for_read(OrderItems, instance=order), SHARD)
+        self.assertEqual(router.db_for_read(Users, instance=order), 'default')
+        self.assertIsNone(router.db_for_read(Orders))
+        self.assertFalse(router.allow_migrate(SHARD, 'restaurant'))
+        # order.items follows the order to its shard, item.item comes from 'default'
+        self.assertEqual([line.item.name for line in order.items.all()], ['Adobo'])
+
+    def test_bulk_transition_across_shards(self):
+        main_id = self.place_order(None, self.adobo)
+        north_id = self.place_order('north', self.sinigang)
+        missing_id = SHARD_ID_SPAN + 999
+
+        results = bulk_transition([main_id, north_id, missing_id], 'preparing')
+
+        self.assertEqual(results, {
+            main_id: ('moved', 'preparing'),
+            north_id: ('moved', 'preparing'),
+            missing_id: ('not_found', None),
+        })
+        self.assertEqual(Deliveries.objects.get(order_id=main_id).status, 'preparing')
+        self.assertEqual(Deliveries.objects.using(SHARD).get(order_id=north_id).status, 'preparing')
+        self.assertEqual(
+            set(OrderSummary.objects.values_list('order_id', 'status')),
+            {(main_id, 'preparing'), (north_id, 'preparing')},
+        )
+        self.assertEqual(OrderStatusEvent.objects.filter(status='preparing').count(), 2)
+        self.assertEqual(bulk_transition([north_id], 'confirmed'), {north_id: ('unchanged', 'preparing')})
+
+    def test_transition_only_moves_orders_forward(self):
+        order_id = self.place_order('north', self.adobo)
+
+        self.assertTrue(transition_order(order_id, 'preparing'))
+        delivery = Deliveries.objects.using(SHARD).get(order_id=order_id)
+        self.assertEqual(delivery.status, 'preparing')
+        # Skipped stages are stamped with the same time
+        self.assertEqual(delivery.confirmed_at, delivery.preparing_at)
+
+        # A second admin acting on a stale page: wrong previous status, nothing changes
+        self.assertFalse(transition_order(order_id, 'confirmed'))
+        self.assertFalse(transition_order(order_id, 'preparing'))
+        self.assertEqual(Deliveries.objects.using(SHARD).get(order_id=order_id).status, 'preparing')
+        self.assertEqual(OrderSummary.objects.get(order_id=order_id).status, 'preparing')
+        self.assertEqual(OrderStatusEvent.objects.exclude(status='pending').count(), 1)
+
+        with self.assertRaises(ValueError):
+            transition_order(order_id, 'cancelled')
+
+    def test_search_by_phone_suffix_and_name_or_address_words(self):
+        first = self.place_order(None, self.adobo, contact='0917 123 4567', address='12 Mabini St, Quezon City')
+        second = self.place_order('north', self.sinigang, contact='+63 918 765 4321', address='Rizal Ave, Makati')
+
+        def found(query):
+            return [summary.order_id for summary in search_orders(query)]
+
+        self.assertEqual(found('4567'), [first])
+        self.assertEqual(found('+63 917 123 4567'), [first])
+        self.assertEqual(found('ana mab'), [first])
+        self.assertEqual(found('MAKATI'), [second])
+        self.assertEqual(found('cruz'), [second, first])
+        self.assertEqual(found(str(second)), [second])
+        self.assertEqual(found('45'), [])
+
+        admin = self.client_class()
+        admin.post('/login/', {'email': 'admin@example.com', 'password': 'Passw0rd!', 'role': 'admin'})
+        results = admin.get('/admin-orders/search/', {'q': '4321'}).json()['results']
+        self.assertEqual([(row['order_id'], row['contact_number']) for row in results], [(second, '+63 918 765 4321')])
+
+    def test_history_and_dashboard_gather_every_shard(self):
+        main_id = self.place_order(None, self.adobo, 3)
+        north_id = self.place_order('north', self.adobo, 2)
+        self.place_order('north', self.sinigang, 1)
+        bulk_transition([main_id, north_id], 'delivered')
+
+        orders, next_cursor = order_history_page(self.user.user_id)
+        self.assertEqual({order['order_id'] for order in orders}, {main_id, north_id})
+        self.assertIsNone(next_cursor)
+        lines = {order['order_id']: order['items'] for order in orders}
+        self.assertEqual(lines[north_id], [{'name': 'Adobo', 'quantity': 2}])
+
+        admin = self.client_class()
+        admin.post('/login/', {'email': 'admin@example.com', 'password': 'Passw0rd!', 'role': 'admin'})
+        response = admin.get('/admin-dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_orders'], 3)
+        self.assertEqual(
+            [(row['item__name'], row['total_ordered']) for row in response.context['best_sellers']],
+            [('Adobo', 5), ('Sinigang', 1)],
+        )
+
+    def test_history_pages_through_live_and_archived_orders(self):
+        old_id = self.place_order(None, self.adobo)
+        north_id = self.place_order('north', self.sinigang)
+        new_id = self.place_order(None, self.sinigang, 2)
+        bulk_transition([old_id, north_id, new_id], 'delivered')
+        now = timezone.now()
+        Deliveries.objects.filter(order_id=old_id).update(delivered_at=now - timedelta(days=200))
+        Deliveries.objects.using(SHARD).filter(order_id=north_id).update(delivered_at=now - timedelta(days=2))
+        Deliveries.objects.filter(order_id=new_id).update(delivered_at=now - timedelta(days=1))
+        archive_orders(days=90)
+
+        orders, cursor = order_history_page(self.user.user_id, limit=2)
+        self.assertEqual([order['order_id'] for order in orders], [new_id, north_id])
+        orders, next_cursor = order_history_page(self.user.user_id, cursor=cursor, limit=2)
+        self.assertEqual(orders[0]['order_id'], old_id)
+        self.assertEqual(orders[0]['items'], [{'name': 'Adobo', 'quantity': 1}])
+        self.assertIsNone(next_cursor)
+
+        response = self.client.get('/profile/orders/', {'cursor': cursor})
+        self.assertEqual([order['order_id'] for order in response.json()['results']], [old_id])
+        self.assertEqual(self.client.get('/profile/orders/', {'cursor': 'nope'}).status_code, 400)
+
+    def test_archive_runs_per_shard(self):
+        main_id = self.place_order(None, self.adobo)
+        north_id = self.place_order('north', self.sinigang, 2)
+        live_id = self.place_order('north', self.adobo)
+        bulk_transition([main_id, north_id, live_id], 'delivered')
+        long_ago = timezone.now() - timedelta(days=200)
+        Deliveries.objects.filter(order_id=main_id).update(delivered_at=long_ago)
+        Deliveries.objects.using(SHARD).filter(order_id=north_id).update(delivered_at=long_ago)
+
+        self.assertEqual(list(archive_orders(days=90)), [1, 2])
+
+        self.assertFalse(Orders.objects.filter(pk=main_id).exists())
+        self.assertEqual(list(Orders.objects.using(SHARD).values_list('order_id', flat=True)), [live_id])
+        self.assertEqual(
+            set(ArchivedOrder.objects.values_list('order_id', 'branch')),
+            {(main_id, 'main'), (north_id, 'north')},
+        )
+        self.assertEqual(list(OrderSummary.objects.values_list('order_id', flat=True)), [live_id])
+
+        # Archived lines still count towards the best sellers
+        admin = self.client_class()
+        admin.post('/login/', {'email': 'admin@example.com', 'password': 'Passw0rd!', 'role': 'admin'})
+        self.assertEqual(
+            {row['item__name']: row['total_ordered'] for row in admin.get('/admin-dashboard/').context['best_sellers']},
+            {'Adobo': 2, 'Sinigang': 2},
+        )
+
+
+class UnmanagedSchemaTests(TestCase):
+    def constraints(self, table):
+        with connection.cursor() as cursor:
+            return connection.introspection.get_constraints(cursor, table)
+
+    def test_test_database_has_every_unmanaged_table_and_index(self):
+        for model in unmanaged_models():
+            constraints = self.constraints(model._meta.db_table)
+            for index in model._meta.indexes:
+                self.assertIn(index.name, constraints, model.__name__)
+        # Foreign key columns are indexed too
+        self.assertTrue(any(
+            info['index'] and info['columns'] == ['user_id'] for info in self.constraints('cart').values()
+        ))
+
+
+class EnsureSchemaTests(TransactionTestCase):
+    """Schema edits on SQLite can't run inside TestCase's transaction."""
+
+    def test_missing_index_is_restored(self):
+        with connection.schema_editor() as editor:
+            editor.remove_index(Deliveries, Deliveries._meta.indexes[0])
+        self.addCleanup(call_command, 'ensure_schema', stdout=io.StringIO())
+
+        out = io.StringIO()
+        call_command('ensure_schema', stdout=out)
+        self.assertIn("add index deliveries_status_idx on deliveries", out.getvalue())
+        with connection.cursor() as cursor:
+            self.assertIn('deliveries_status_idx', connection.introspection.get_constraints(cursor, 'deliveries'))
+
+        out = io.StringIO()
+        call_command('ensure_schema', stdout=out)
+        self.assertIn("Done. 0 schema changes applied.", out.getvalue())
+
+
+class FeedbackBufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Users.objects.create(
+            email='ben@example.com', password=make_password('Passw0rd!'),
+            first_name='Ben', last_name='Reyes', date_joined=timezone.now(), is_active=1,
+        )
+
+    def setUp(self):
+        # max_age is long enough that the timer never fires during a test
+        self.buffer = FeedbackBuffer(max_size=3, max_age=60)
+        self.addCleanup(self.cancel_timer)
+
+    def cancel_timer(self):
+        if self.buffer._timer is not None:
+            self.buffer._timer.cancel()
+
+    def test_flushes_when_the_buffer_fills_up(self):
+        self.buffer.submit(self.user.user_id, 'Great adobo', 5)
+        self.buffer.submit(self.user.user_id, 'A bit salty', 3)
+        self.assertEqual(Feedback.objects.count(), 0)
+
+        self.buffer.submit(self.user.user_id, 'Fast delivery', 5)
+
+        self.assertEqual(Feedback.objects.count(), 3)
+        self.assertEqual(self.buffer._pending, [])
+        self.assertIsNone(self.buffer._timer)
+        self.assertEqual(dict(FeedbackRatingStats.objects.values_list('rating', 'count')), {5: 2, 3: 1})
+
+    def test_failed_flush_keeps_the_batch(self):
+        self.buffer.submit(self.user.user_id, 'Great adobo', 5)
+        self.buffer.submit(self.user.user_id, 'A bit salty', 3)
+
+        with mock.patch.object(Feedback.objects, 'bulk_create', side_effect=OperationalError('gone away')):
+            with self.assertRaises(OperationalError):
+                self.buffer.flush()
+
+        self.assertEqual([item.message for item in self.buffer._pending], ['Great adobo', 'A bit salty'])
+        self.assertIsNotNone(self.buffer._timer)
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(Feedback.objects.count(), 2)
+
+    def test_failed_flush_at_the_threshold_still_accepts_the_submission(self):
+        self.buffer.submit(self.user.user_id, 'Great adobo', 5)
+        self.buffer.submit(self.user.user_id, 'A bit salty', 3)
+
+        with mock.patch.object(Feedback.objects, 'bulk_create', side_effect=OperationalError('gone away')), \
+                self.assertLogs('restaurant.feedback', level='ERROR') as logs:
+            self.buffer.submit(self.user.user_id, 'Fast delivery', 5)
+
+        self.assertEqual([record.getMessage() for record in logs.records], ['Feedback flush failed, will retry'])
+        self.assertEqual(len(self.buffer._pending), 3)
+        self.assertEqual(self.buffer.flush(), 3)
+
+
+class FeedbackListingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = Users.objects.create(
+            email='ben@example.com', password='x', first_name='Ben', last_name='Reyes',
+            date_joined=timezone.now(), is_active=1,
+        )
+        now = timezone.now()
+        for rating, days_ago in ((1, 60), (5, 0), (3, 0), (None, 0)):
+            Feedback.objects.create(user=user, message=f'Rated {rating}', rating=rating,
+                                    date_submitted=now - timedelta(days=days_ago))
+        rebuild_rating_stats()
+
+    def test_summary_reads_the_daily_buckets(self):
+        with self.assertNumQueries(2):
+            summary = rating_summary()
+        self.assertEqual((summary['total'], summary['rated']), (4, 3))
+        self.assertEqual((summary['average'], summary['rolling_average']), (3.0, 4.0))
+        self.assertEqual([row['count'] for row in summary['histogram']], [1, 0, 1, 0, 1])
+
+    def test_pages_are_newest_first_with_the_author_joined(self):
+        with self.assertNumQueries(1):
+            page, before = feedback_page(limit=3)
+            self.assertEqual([item.user.first_name for item in page], ['Ben'] * 3)
+        self.assertEqual([item.rating for item in page], [None, 3, 5])
+
+        page, before = feedback_page(before, limit=3)
+        self.assertEqual([item.rating for item in page], [1])
+        self.assertIsNone(before)
+
+
+@override_settings(PASSWORD_THROTTLE_RATES={'email': (5, 60), 'ip': (30, 60)})
+class ThrottleTests(SimpleTestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+
+    def test_window_limit(self):
+        self.assertEqual([consume('email', 'ana@example.com') for _ in range(7)], [True] * 5 + [False] * 2)
+        self.assertTrue(consume('email', 'ben@example.com'))
+
+    def test_concurrent_attempts_share_one_counter(self):
+        results = []
+        start = threading.Barrier(20)
+
+        def attempt():
+            start.wait()
+            results.append(consume('email', 'burst@example.com'))
+
+        threads = [threading.Thread(target=attempt) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 5)
+
+
+@mock.patch('restaurant.routers.replica_available', return_value=True)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def read_db(self):
+        return self.router.db_for_read(MenuItems)
+
+    def test_only_wrapped_reads_go_to_the_replica(self, available):
+        self.assertIsNone(self.read_db())
+        self.assertEqual(replica_reads(self.read_db)(), 'replica')
+        self.assertEqual(self.router.db_for_write(MenuItems), 'default')
+
+        available.return_value = False
+        self.assertIsNone(replica_reads(self.read_db)())
+
+    def test_a_request_reads_its_own_writes_from_the_primary(self, available):
+        token = begin_request()
+        try:
+            self.assertEqual(replica_reads(self.read_db)(), 'replica')
+            self.router.db_for_write(MenuItems)
+            self.assertEqual(replica_reads(self.read_db)(), 'default')
+        finally:
+            self.assertTrue(end_request(token).wrote)
+
+        # The pin cookie keeps the next request on the primary too
+        token = begin_request(pinned=True)
+        try:
+            self.assertEqual(replica_reads(self.read_db)(), 'default')
+        finally:
+            end_request(token)
+
+
+class AsyncHashingTests(SimpleTestCase):
+    def test_awaitable_helpers_hash_in_the_pool(self):
+        encoded = async_to_sync(amake_password)('Passw0rd!')
+        self.assertTrue(async_to_sync(acheck_password)('Passw0rd!', encoded))
+        self.assertFalse(async_to_sync(acheck_password)('wrong', encoded))
+
+    def test_saturated_pool_is_refused(self):
+        with mock.patch('restaurant.hashing._slots', threading.BoundedSemaphore(1)) as slots:
+            slots.acquire()
+            with self.assertRaises(HashingBusy):
+                async_to_sync(acheck_password)('Passw0rd!', 'md5$x$y')
+
+
+class MetricsEndpointTests(TestCase):
+    def test_requests_show_up_in_metrics(self):
+        response = self.client.get('/about/')
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+        with override_settings(METRICS_TOKEN='s3cret'):
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('kx_request_duration_seconds_count{view="restaurant:about"}', response.content.decode())
+
+    def test_metrics_need_a_token_or_an_admin(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        with override_settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+
+        caches['throttle'].clear()
+        Admin.objects.create(email='admin@example.com', password='Passw0rd!', name='Admin')
+        self.client.post('/login/', {'email': 'admin@example.com', 'password': 'Passw0rd!', 'role': 'admin'})
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+
+class StatusChangesTests(TestCase):
+    def test_cursor_waits_for_recent_events_to_settle(self):
+        record_status_events([1, 2], 'confirmed')
+        first, second = OrderStatusEvent.objects.order_by('event_id').values_list('event_id', flat=True)
+        OrderStatusEvent.objects.filter(event_id=first).update(created_at=timezone.now() - timedelta(minutes=1))
+
+        events, cursor = status_changes(0)
+        self.assertEqual([event[1] for event in events], [1, 2])
+        self.assertEqual(cursor, first)
+        # A freshly rendered page already shows both changes
+        self.assertEqual(latest_event_id(), second)
+
+        # The unsettled event comes again until it is old enough
+        events, cursor = status_changes(cursor)
+        self.assertEqual([event[1] for event in events], [2])
+        self.assertEqual(cursor, first)
+
+        OrderStatusEvent.objects.filter(event_id=second).update(created_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(status_changes(cursor)[1], second)
+
+
+class MenuArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Users.objects.create(
+            email='ana@example.com', password=make_password('Passw0rd!'),
+            first_name='Ana', last_name='Cruz', date_joined=timezone.now(), is_active=1,
+        )
+        cls.adobo = MenuItems.objects.create(name='Adobo', price=100, category='meals', is_available=1)
+        cls.sinigang = MenuItems.objects.create(name='Sinigang', price=150, category='meals', is_available=1)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        Admin.objects.create(email='admin@example.com', password='Passw0rd!', name='Admin')
+        self.client.post('/login/', {'email': 'admin@example.com', 'password': 'Passw0rd!', 'role': 'admin'})
+
+    def test_deleted_item_is_archived_and_leaves_the_carts(self):
+        Cart.objects.create(user=self.user, item=self.adobo, quantity=2, subtotal=200)
+        Cart.objects.create(user=self.user, item=self.sinigang, quantity=1, subtotal=150)
+
+        response = self.client.post(f'/admin-menu/delete/{self.adobo.item_id}/')
+
+        self.assertRedirects(response, '/admin-menu/', fetch_redirect_response=False)
+        self.adobo.refresh_from_db()
+        self.assertEqual(self.adobo.is_deleted, 1)
+        self.assertIsNotNone(self.adobo.deleted_at)
+        self.assertEqual(list(catalog_items()), [self.sinigang])
+        self.assertEqual(list(Cart.objects.values_list('item_id', flat=True)), [self.sinigang.item_id])
+        self.assertEqual([item['name'] for item in self.client.get('/api/menu/').json()], ['Sinigang'])
+
+    def test_archiving_twice_is_a_no_op(self):
+        self.assertTrue(archive_menu_item(self.adobo.item_id))
+        self.assertFalse(archive_menu_item(self.adobo.item_id))
+
+
+class CatalogImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.adobo = MenuItems.objects.create(name='Adobo', price=100, category='meals', is_available=1)
+
+    def test_blank_id_creates_and_known_id_updates(self):
+        created, updated = import_catalog([
+            {'item_id': str(self.adobo.item_id), 'name': 'Adobo', 'price': '120'},
+            {'item_id': '', 'name': 'Halo-halo', 'price': '90', 'category': 'desserts'},
+        ])
+        self.assertEqual((created, updated), (1, 1))
+        self.adobo.refresh_from_db()
+        self.assertEqual(self.adobo.price, 120)
+
+    def test_non_finite_or_negative_price_is_an_error(self):
+        for price in ('NaN', 'Infinity', '-1'):
+            with self.assertRaisesMessage(ValueError, "Row 1: invalid price"):
+                import_catalog([{'item_id': '', 'name': 'Halo-halo', 'price': price}])
+        self.assertEqual(MenuItems.objects.count(), 1)
+
+    def test_blank_availability_keeps_items_on_sale(self):
+        import_catalog([
+            {'item_id': '', 'name': 'Halo-halo', 'price': '90', 'is_available': ''},
+            {'item_id': '', 'name': 'Leche flan', 'price': '80', 'is_available': 0},
+        ])
+        self.assertEqual(
+            dict(MenuItems.objects.filter(name__in=['Halo-halo', 'Leche flan']).values_list('name', 'is_available')),
+            {'Halo-halo': 1, 'Leche flan': 0},
+        )
+
+    def test_unknown_or_archived_id_is_an_error(self):
+        archive_menu_item(self.adobo.item_id)
+        for item_id in (self.adobo.item_id, self.adobo.item_id + 1000):
+            with self.assertRaisesMessage(ValueError, f"Row 1: item {item_id} does not exist or is archived"):
+                import_catalog([{'item_id': item_id, 'name': 'Adobo', 'price': '100'}])
+        self.assertEqual(MenuItems.objects.count(), 1)
+
+
+class AdminRequestValidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.adobo = MenuItems.objects.create(name='Adobo', price=100, category='meals', is_available=1)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        Admin.objects.create(email='admin@example.com', password='Passw0rd!', name='Admin')
+        self.client.post('/login/', {'email': 'admin@example.com', 'password': 'Passw0rd!', 'role': 'admin'})
+
+    def test_order_search_states_that_archived_orders_are_not_searched(self):
+        self.assertContains(self.client.get('/admin-orders/', {'q': 'ana'}), 'Search covers live orders only')
+
+    def test_edit_with_missing_or_invalid_price_is_rejected(self):
+        url = f'/admin-menu/edit/{self.adobo.item_id}/'
+        for price in (None, 'abc', 'NaN', '-5'):
+            body = {'name': 'Adobo', 'category': 'meals'}
+            if price is not None:
+                body['price'] = price
+            self.assertEqual(self.client.post(url, body).status_code, 400, price)
+        self.adobo.refresh_from_db()
+        self.assertEqual(self.adobo.price, 100)
+
+        self.assertEqual(self.client.post(url, {'name': 'Adobo', 'category': 'meals', 'price': '110'}).status_code, 302)
+        self.adobo.refresh_from_db()
+        self.assertEqual(self.adobo.price, 110)
+
+    def test_bulk_update_rejects_a_non_object_body_or_non_list_ids(self):
+        for body in ([1, 2], {'order_ids': '12', 'status': 'preparing'}):
+            response = self.client.post('/admin-orders/bulk-update/', json.dumps(body),
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_availability_rejects_a_non_object_body(self):
+        response = self.client.post('/admin-menu/availability/', json.dumps([self.adobo.item_id]),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class PrincipalCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Users.objects.create(
+            email='ana@example.com', password=make_password('Passw0rd!'),
+            first_name='Ana', last_name='Cruz', date_joined=timezone.now(), is_active=1,
+        )
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_queryset_update_moves_to_a_new_version(self):
+        version = credential_version('user', self.user.pk)
+        self.assertEqual(load_principal('user', self.user.pk).is_active, 1)
+
+        Users.objects.filter(pk=self.user.pk).update(is_active=0)
+        self.assertNotEqual(credential_version('user', self.user.pk), version)
+        with self.assertNumQueries(1):
+            self.assertEqual(load_principal('user', self.user.pk).is_active, 0)
+
+    def test_password_change_reloads_the_cached_principal(self):
+        self.client.post('/login/', {'email': 'ana@example.com', 'password': 'Passw0rd!', 'role': 'user'})
+        self.assertEqual(self.client.get('/dashboard/').status_code, 200)
+        change = {'current_password': 'Passw0rd!', 'new_password': 'N3wPassw0rd', 'confirm_password': 'N3wPassw0rd'}
+        self.assertEqual(self.client.post('/profile/change-password/', change).status_code, 200)
+
+        # The next request sees the new hash, not the cached row
+        response = self.client.post('/profile/change-password/', change)
+        self.assertEqual(response.json(), {'error': 'Current password is incorrect'})
+        self.assertTrue(check_password('N3wPassw0rd', load_principal('user', self.user.pk).password))
+
+        Users.objects.get(pk=self.user.pk).save()
+        with self.assertNumQueries(1):
+            load_principal('user', self.user.pk)
+
+    def test_versions_are_kept_in_the_shared_cache(self):
+        version = credential_version('user', self.user.pk)
+        self.assertEqual(caches['principals'].get(f'principal:user:{self.user.pk}:version'), version)
+
+
+class SessionTests(TestCase):
+    def test_purge_deletes_only_expired_sessions_in_batches(self):
+        now = timezone.now()
+        for n in range(5):
+            Session.objects.create(session_key=f'old{n}', session_data='', expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='live', session_data='', expire_date=now + timedelta(days=1))
+        caches[settings.SESSION_CACHE_ALIAS].set(KEY_PREFIX + 'old0', {'user_session_id': 1})
+
+        out = io.StringIO()
+        call_command('purge_sessions', '--batch-size', '2', stdout=out)
+
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+        self.assertIsNone(caches[settings.SESSION_CACHE_ALIAS].get(KEY_PREFIX + 'old0'))
+        self.assertIn("Purged 4 expired sessions...", out.getvalue())
+        self.assertIn("Done. 5 expired sessions deleted.", out.getvalue())
+
+
+class UserDirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        for n, (first, last) in enumerate([('Ana', 'Cruz'), ('Ben', 'Reyes'), ('Andres', 'Bonifacio'), ('Cara', 'Lim')]):
+            Users.objects.create(
+                email=f'{first.lower()}@example.com', password='x', first_name=first, last_name=last,
+                date_joined=now - timedelta(days=n), is_active=1,
+            )
+        # Imported without a join date: listed last
+        Users.objects.create(email='old@example.com', password='x', first_name='Old', last_name='Timer', is_active=1)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        Admin.objects.create(email='admin@example.com', password='Passw0rd!', name='Admin')
+        self.client.post('/login/', {'email': 'admin@example.com', 'password': 'Passw0rd!', 'role': 'admin'})
+
+    def test_pages_follow_the_cursor_newest_first(self):
+        emails, cursor = [], ''
+        while True:
+            page = self.client.get('/admin-users/search/', {'limit': 2, 'cursor': cursor}).json()
+            emails += [user['email'] for user in page['results']]
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(emails, [
+            'ana@example.com', 'ben@example.com', 'andres@example.com', 'cara@example.com', 'old@example.com',
+        ])
+
+    def test_every_word_prefix_matches_email_or_name(self):
+        page = self.client.get('/admin-users/search/', {'q': 'an'}).json()
+        self.assertEqual([user['email'] for user in page['results']], ['ana@example.com', 'andres@example.com'])
+        page = self.client.get('/admin-users/search/', {'q': 'an bon'}).json()
+        self.assertEqual([user['email'] for user in page['results']], ['andres@example.com'])
+
+    def test_malformed_cursor_is_rejected(self):
+        self.assertEqual(self.client.get('/admin-users/search/', {'cursor': 'nope'}).status_code, 400)
+
+
+class MenuSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.adobo = MenuItems.objects.create(name='Adobo', price=100, category='meals', is_available=1)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_index_follows_a_version_bumped_by_another_worker(self):
+        self.assertEqual([doc['name'] for doc in menu_index.search('adobo')], ['Adobo'])
+
+        # Another worker renames the item and bumps the shared catalog version
+        MenuItems.objects.filter(pk=self.adobo.pk).update(name='Kare-kare')
+        caches['catalog'].set(CATALOG_VERSION_KEY, 1, None)
+        self.assertEqual([doc['name'] for doc in menu_index.search('kare')], ['Kare-kare'])
+
+    def test_typos_and_filters_are_served_from_the_index(self):
+        MenuItems.objects.create(name='Halo-halo', description='Shaved ice', price=90, category='desserts', is_available=1)
+        MenuItems.objects.create(name='Leche flan', price=80, category='desserts', is_available=0)
+        menu_index.ensure_current()
+
+        with self.assertNumQueries(0):
+            self.assertEqual([doc['name'] for doc in menu_index.search('adbo')], ['Adobo'])
+            self.assertEqual([doc['name'] for doc in menu_index.search('ice')], ['Halo-halo'])
+
+        response = self.client.get('/api/menu/search/', {'category': 'desserts', 'available': '1', 'fields': 'name'})
+        self.assertEqual(response.json(), {'count': 1, 'results': [{'name': 'Halo-halo'}]})
+
+
+class MenuApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name, price in (('Adobo', 100), ('Sinigang', 150), ('Halo-halo', 90)):
+            MenuItems.objects.create(name=name, description=f'{name} of the day', price=price,
+                                     category='meals', is_available=1)
+
+    def test_fields_narrow_the_select_and_the_response(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/menu/', {'fields': 'name,price,bogus'})
+
+        self.assertEqual([set(item) for item in response.json()], [{'item_id', 'name', 'price'}] * 3)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0]['sql'])
+
+    def test_cursor_pages_only_when_asked_for(self):
+        self.assertEqual(len(self.client.get('/api/menu/').json()), 3)
+
+        first = self.client.get('/api/menu/', {'page_size': 2, 'fields': 'name'}).json()
+        self.assertEqual([item['name'] for item in first['results']], ['Adobo', 'Sinigang'])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([item['name'] for item in second['results']], ['Halo-halo'])
+        self.assertIsNone(second['next'])
+
+
+class PublicMenuTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.adobo = MenuItems.objects.create(name='Adobo', price=100, category='meals', is_available=1)
+        MenuItems.objects.create(name='Halo-halo', price=90, category='Desserts', is_available=1)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_categories_come_from_one_query_and_are_cached_per_version(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/public-menu/')
+        self.assertContains(response, 'Adobo')
+        self.assertContains(response, 'Halo-halo')
+
+        MenuItems.objects.filter(pk=self.adobo.pk).update(name='Kare-kare')
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get('/public-menu/'), 'Adobo')
+
+        caches['catalog'].set(CATALOG_VERSION_KEY, 1, None)
+        self.assertContains(self.client.get('/public-menu/'), 'Kare-kare')
+
+
+class ImportUsersTests(TestCase):
+    def import_users(self, text, suffix='.csv'):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False) as f:
+            f.write(text)
+        self.addCleanup(os.remove, f.name)
+        out = io.StringIO()
+        call_command('import_users', f.name, '--workers', '1', stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_emails_are_deduped_and_matched_case_insensitively(self):
+        Users.objects.create(
+            email='Ana@Example.com', password='x', first_name='Ana', last_name='Cruz',
+            date_joined=timezone.now(), is_active=1,
+        )
+        out = self.import_users(
+            "email,password,first_name,last_name\n"
+            "ANA@example.com,Passw0rd!,Ana,Cruz\n"
+            "Ben@Example.com,Passw0rd!,Ben,Reyes\n"
+            "ben@example.com,Passw0rd!,Ben,Reyes\n"
+        )
+        self.assertIn("Done. 1 users created, 2 skipped", out)
+        self.assertEqual(
+            sorted(Users.objects.values_list('email', flat=True)), ['Ana@Example.com', 'ben@example.com'],
+        )
+
+    def test_jsonl_rows_are_validated_and_hashed(self):
+        out = self.import_users(
+            '{"email": "cara@example.com", "password": "Passw0rd!", "first_name": "Cara", "last_name": "Lim"}\n'
+            '{"email": "not-an-email", "password": "Passw0rd!", "first_name": "X", "last_name": "Y"}\n'
+            '{"email": "dan@example.com", "password": "short", "first_name": "Dan", "last_name": "Go"}\n',
+            suffix='.jsonl',
+        )
+        self.assertIn("Done. 1 users created, 2 skipped", out)
+        user = Users.objects.get()
+        self.assertEqual((user.email, user.role, user.is_active), ('cara@example.com', 'user', 1))
+        self.assertTrue(check_password('Passw0rd!', user.password))
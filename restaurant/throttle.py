@@ -0,0 +1,58 @@
+# restaurant/throttle.py
+#
+# Fixed-window throttling for the password endpoints, kept in the shared
+# 'throttle' cache. Checked before any password hashing so a credential
+# stuffing burst is turned away for the price of a cache lookup.
+# Each window is one counter bumped with cache.incr(), which is atomic in
+# the Redis and Memcached backends and in the default LockedFileCache (see
+# cache_backends.py), so concurrent attempts can't all read the same count
+# and slip through together.
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+# scope -> (attempts allowed per window, window seconds)
+DEFAULT_RATES = {
+    'email': (5, 60),
+    'ip': (30, 60),
+}
+
+
+def _rates():
+    return getattr(settings, 'PASSWORD_THROTTLE_RATES', DEFAULT_RATES)
+
+def client_ip(request):
+    """Client IP, optionally taken from X-Forwarded-For when behind a trusted proxy."""
+    if getattr(settings, 'THROTTLE_USE_X_FORWARDED_FOR', False):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+def consume(scope, identity):
+    """Count one attempt in the current window. Returns False once the window's limit is used up."""
+    limit, period = _rates()[scope]
+    bucket_cache = caches['throttle']
+    window = int(time.time() // period)
+    key = 'throttle:%s:%s:%d' % (scope, hashlib.sha1(identity.encode()).hexdigest(), window)
+
+    # add() only creates a missing counter, so it never resets a running count
+    bucket_cache.add(key, 0, period)
+    try:
+        attempts = bucket_cache.incr(key)
+    except ValueError:
+        # The counter expired between add() and incr()
+        bucket_cache.add(key, 1, period)
+        attempts = 1
+    return attempts <= limit
+
+def allow_password_attempt(request, email=None):
+    """Check the per-IP bucket and, when given, the per-email bucket."""
+    if not consume('ip', client_ip(request)):
+        return False
+    if email and not consume('email', email.strip().lower()):
+        return False
+    return True
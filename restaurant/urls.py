@@ -65,11 +65,18 @@ urlpatterns = [
     path('admin-menu/add/', admin_add_menu, name='admin-add-menu'),
     path('admin-menu/edit/<int:item_id>/', admin_edit_menu, name='admin-edit-menu'),
     path('admin-menu/delete/<int:item_id>/', admin_delete_menu, name='admin-delete-menu'),
+    path('admin-menu/export/', views.admin_export_menu, name='admin-export-menu'),
+    path('admin-menu/import/', views.admin_import_menu, name='admin-import-menu'),
+    path('admin-menu/availability/', views.admin_menu_availability, name='admin-menu-availability'),
     path('admin-orders/', admin_orders, name='admin-orders'),
     path('admin-orders/confirm/<int:order_id>/', confirm_order, name='admin-confirm-order'),
     path('admin-orders/update/<int:order_id>/', admin_update_orders, name='admin-update-order-status'),
+    path('admin-orders/bulk-update/', views.admin_bulk_update_orders, name='admin-bulk-update-orders'),
+    path('admin-orders/changes/', views.admin_order_changes_api, name='admin-order-changes'),
+    path('admin-orders/search/', views.admin_order_search_api, name='admin-order-search'),
     path('admin-feedback/', admin_feedback, name='admin-feedback'),
     path('admin-users/', views.manage_users, name='admin-users'),
+    path('admin-users/search/', views.admin_users_api, name='admin-users-search'),
     path('admin-add-admin/', views.add_admin, name='add-admin'),
     path('admin-edit-admin/', views.edit_admin, name='edit-admin'),
     path('admin-delete-admin/', views.delete_admin, name='delete-admin'),
@@ -95,4 +102,8 @@ urlpatterns = [
     
     path('profile/update/', views.update_profile, name='update_profile'),
     path('profile/change-password/', views.change_password, name='change_password'),
+    path('profile/orders/', views.order_history_api, name='order_history'),
+
+    # Prometheus scrape endpoint
+    path('metrics', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
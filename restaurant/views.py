@@ -3,31 +3,67 @@
 # ============================================================================
 # IMPORTS
 # ============================================================================
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db import connection
+from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest
+from django.db import connection, transaction
 from django.db.models import Sum, Prefetch, Q
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
+from django.core.cache import cache
+from django.template.loader import render_to_string
+import hmac
+import logging
 import re
 from django.views.decorators.csrf import csrf_exempt
-from django.contrib.auth.hashers import make_password, check_password
+from .hashing import make_password, check_password, acheck_password, amake_password, HashingBusy
+from .throttle import allow_password_attempt
 
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
 
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 import json
 from datetime import datetime
+from itertools import chain
 
 from .models import (
     MenuItems, Users, Orders, Cart, OrderItems, 
-    ContactMessage, Feedback, Admin, Payments, Deliveries
+    ContactMessage, Feedback, Admin, Payments, Deliveries, OrderSummary,
+    ArchivedOrder, ArchivedOrderItem,
 )
 from .serializers import (
     MenuItemsSerializer, CartSerializer, OrdersSerializer, FeedbackSerializer
 )
+from .catalog import (
+    CATALOG_FORMATS, MENU_CATEGORIES, MENU_PAGE_CACHE_TIMEOUT,
+    catalog_items, catalog_by_category, get_catalog_version, archive_menu_item, set_availability,
+    bump_catalog_version, export_catalog, render_catalog, parse_catalog, import_catalog,
+    reprice_cart_items, reprice_user_cart, cart_totals
+)
+from .search import menu_index, parse_price, DOC_FIELDS
+from .pagination import MenuCursorPagination
+from .principals import request_principal
+from .routers import replica_reads
+from .export_db import export_reads, ExportTimeout
+from .metrics import render_metrics
+from .accounts import users_page, USER_PAGE_SIZE
+from .feedback import feedback_buffer, rating_summary, feedback_page
+from .history import order_history_page
+from .archive import archive_needed, attach_archived_lines
+from .order_search import search_orders
+from .order_summary import refresh_order_summaries, refresh_customer_summaries, attach_order_lines
+from .shards import branch_shard, order_shard, on_shard, for_each_shard
+from .order_status import (
+    transition_order, bulk_transition, record_status_events, status_changes, latest_event_id,
+    ORDER_STATUSES, STAGE_TIMESTAMPS, CHANGES_PAGE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
 
 
 # ============================================================================
@@ -35,32 +71,12 @@ from .serializers import (
 # ============================================================================
 
 def get_logged_in_user(request):
-    """Return currently logged-in regular user."""
-    user_id = request.session.get('user_session_id')
-    if not user_id:
-        return None
-    try:
-        return Users.objects.get(user_id=user_id)
-    except Users.DoesNotExist:
-        # Clear only user session keys
-        user_keys = [k for k in request.session.keys() if k.startswith('user_')]
-        for key in user_keys:
-            del request.session[key]
-        return None
+    """Return currently logged-in regular user (cached per request and by credential version)."""
+    return request_principal(request, 'user')
 
 def get_logged_in_admin(request):
-    """Return currently logged-in admin."""
-    admin_id = request.session.get('admin_session_id')
-    if not admin_id:
-        return None
-    try:
-        return Admin.objects.get(admin_id=admin_id)
-    except Admin.DoesNotExist:
-        # Clear only admin session keys
-        admin_keys = [k for k in request.session.keys() if k.startswith('admin_')]
-        for key in admin_keys:
-            del request.session[key]
-        return None
+    """Return currently logged-in admin (cached per request and by credential version)."""
+    return request_principal(request, 'admin')
 
 def format_time(dt):
     """Convert datetime to string format."""
@@ -71,123 +87,140 @@ def format_time(dt):
 # AUTHENTICATION VIEWS
 # ============================================================================
 
-def login_view(request):
-    """Handle user and admin login."""
-    if request.method == "POST":
-        email = request.POST.get("email")
-        password = request.POST.get("password")
-        role = request.POST.get("role")
+async def login_view(request):
+    """Handle user and admin login. The password check is awaited, so it holds no sync thread."""
+    if request.method != "POST":
+        return await sync_to_async(render)(request, 'restaurant/login.html')
 
-        if role.lower() == 'admin':
-            # Check Admin model
-            try:
-                admin = Admin.objects.get(email=email)
-                
-                if admin.check_password(password):
-                    # Set admin session keys
-                    request.session['admin_session_id'] = admin.admin_id
-                    request.session['admin_role'] = 'admin'
-                    request.session['admin_email'] = admin.email
-                    request.session['admin_name'] = admin.name
+    email = request.POST.get("email")
+    password = request.POST.get("password")
+    is_admin = (request.POST.get("role") or '').lower() == 'admin'
 
-                    messages.success(request, f"Welcome back, Admin {admin.name}!")
-                    return redirect('restaurant:admin-dashboard')
-                else:
-                    messages.error(request, "Invalid email or password")
-                    
-            except Admin.DoesNotExist:
-                messages.error(request, "No admin account found with this email")
-                
-        else:
-            # Check Users model
-            try:
-                user = Users.objects.get(email=email)
-                
-                if check_password(password, user.password):
-                    # Set user session keys
-                    request.session['user_session_id'] = user.user_id
-                    request.session['user_role'] = 'user'
-                    request.session['user_email'] = user.email
-                    request.session['user_first_name'] = user.first_name
-                    request.session['user_last_name'] = user.last_name
-
-                    messages.success(request, f"Welcome back, {user.first_name}!")
-                    return redirect('restaurant:dashboard')
-                else:
-                    messages.error(request, "Invalid email or password")
-                    
-            except Users.DoesNotExist:
-                messages.error(request, "Invalid email address")
+    # Cheap fixed-window check before any lookup or password hashing
+    if not await sync_to_async(allow_password_attempt)(request, email):
+        return await _login_page(request, "Too many login attempts. Please wait a minute and try again.", 429)
 
-    return render(request, 'restaurant/login.html')
+    account = await sync_to_async(_login_account)(email, is_admin)
+    if account is None:
+        return await _login_page(request, "No admin account found with this email" if is_admin else "Invalid email address")
+    if not is_admin and account.is_active == 0:
+        return await _login_page(request, "This account has been deactivated")
 
-def create_account(request):
-    """Create new user account."""
-    if request.method == 'POST':
-        email = request.POST.get('email', '').strip()
-        password = request.POST.get('password', '').strip()
-        confirm_password = request.POST.get('confirm_password', '').strip()
-        first_name = request.POST.get('first_name', '').strip()
-        last_name = request.POST.get('last_name', '').strip()
-        
-        # Validation
-        errors = []
-        
-        # Check if email is valid
-        if not email:
-            errors.append('Email is required')
-        elif not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
-            errors.append('Please enter a valid email address')
-        elif Users.objects.filter(email=email).exists():
-            errors.append('Email already exists')
-        
-        # Check password
-        if not password:
-            errors.append('Password is required')
-        elif len(password) < 8:
-            errors.append('Password must be at least 8 characters')
-        elif not re.search(r'[A-Z]', password):
-            errors.append('Password must contain at least one uppercase letter')
-        elif not re.search(r'[a-z]', password):
-            errors.append('Password must contain at least one lowercase letter')
-        elif not re.search(r'[0-9]', password):
-            errors.append('Password must contain at least one number')
-        
-        # Check password confirmation
-        if password != confirm_password:
-            errors.append('Passwords do not match')
-        
-        # Check names
-        if not first_name:
-            errors.append('First name is required')
-        if not last_name:
-            errors.append('Last name is required')
-        
-        if errors:
-            for error in errors:
-                messages.error(request, error)
-            return redirect('restaurant:login')
-        
-        try:
-            # Create user with hashed password
-            user = Users(
-                email=email,
-                password=make_password(password),
-                first_name=first_name,
-                last_name=last_name,
-                role='user',
-                date_joined=timezone.now(),
-                is_active=1
-            )
-            user.save()
-            
-            messages.success(request, 'Account created successfully! You can now log in.')
-            return redirect('restaurant:login')
-            
-        except Exception as e:
-            messages.error(request, f'Error creating account: {str(e)}')
-            return redirect('restaurant:login')
+    try:
+        valid = await acheck_password(password, account.password)
+    except HashingBusy as e:
+        return await _login_page(request, str(e), 503)
+    if not valid:
+        return await _login_page(request, "Invalid email or password")
+    return await sync_to_async(_start_session)(request, account, is_admin)
+
+def _login_account(email, is_admin):
+    model = Admin if is_admin else Users
+    return model.objects.filter(email=email).first()
+
+@sync_to_async
+def _login_page(request, error, status=200):
+    messages.error(request, error)
+    return render(request, 'restaurant/login.html', status=status)
+
+def _start_session(request, account, is_admin):
+    """Set the session keys for a checked login and redirect to the right dashboard."""
+    if is_admin:
+        request.session['admin_session_id'] = account.admin_id
+        request.session['admin_role'] = 'admin'
+        request.session['admin_email'] = account.email
+        request.session['admin_name'] = account.name
+
+        messages.success(request, f"Welcome back, Admin {account.name}!")
+        return redirect('restaurant:admin-dashboard')
+
+    request.session['user_session_id'] = account.user_id
+    request.session['user_role'] = 'user'
+    request.session['user_email'] = account.email
+    request.session['user_first_name'] = account.first_name
+    request.session['user_last_name'] = account.last_name
+
+    messages.success(request, f"Welcome back, {account.first_name}!")
+    return redirect('restaurant:dashboard')
+
+async def create_account(request):
+    """Create new user account; the new password is hashed without holding a sync thread."""
+    if request.method != 'POST':
+        return redirect('restaurant:login')
+
+    email = request.POST.get('email', '').strip()
+    password = request.POST.get('password', '').strip()
+    confirm_password = request.POST.get('confirm_password', '').strip()
+    first_name = request.POST.get('first_name', '').strip()
+    last_name = request.POST.get('last_name', '').strip()
+
+    if not await sync_to_async(allow_password_attempt)(request, email):
+        return await _back_to_login(request, ['Too many attempts. Please wait a minute and try again.'])
+
+    errors = await sync_to_async(_new_account_errors)(email, password, confirm_password, first_name, last_name)
+    if errors:
+        return await _back_to_login(request, errors)
+
+    try:
+        hashed = await amake_password(password)
+    except HashingBusy as e:
+        return await _back_to_login(request, [str(e)])
+    return await sync_to_async(_save_new_account)(request, email, hashed, first_name, last_name)
+
+def _new_account_errors(email, password, confirm_password, first_name, last_name):
+    errors = []
+    
+    # Check if email is valid
+    if not email:
+        errors.append('Email is required')
+    elif not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
+        errors.append('Please enter a valid email address')
+    elif Users.objects.filter(email=email).exists():
+        errors.append('Email already exists')
+    
+    # Check password
+    if not password:
+        errors.append('Password is required')
+    elif len(password) < 8:
+        errors.append('Password must be at least 8 characters')
+    elif not re.search(r'[A-Z]', password):
+        errors.append('Password must contain at least one uppercase letter')
+    elif not re.search(r'[a-z]', password):
+        errors.append('Password must contain at least one lowercase letter')
+    elif not re.search(r'[0-9]', password):
+        errors.append('Password must contain at least one number')
     
+    # Check password confirmation
+    if password != confirm_password:
+        errors.append('Passwords do not match')
+    
+    # Check names
+    if not first_name:
+        errors.append('First name is required')
+    if not last_name:
+        errors.append('Last name is required')
+    return errors
+
+@sync_to_async
+def _back_to_login(request, errors):
+    for error in errors:
+        messages.error(request, error)
+    return redirect('restaurant:login')
+
+def _save_new_account(request, email, hashed_password, first_name, last_name):
+    try:
+        Users.objects.create(
+            email=email,
+            password=hashed_password,
+            first_name=first_name,
+            last_name=last_name,
+            role='user',
+            date_joined=timezone.now(),
+            is_active=1
+        )
+        messages.success(request, 'Account created successfully! You can now log in.')
+    except Exception as e:
+        messages.error(request, f'Error creating account: {str(e)}')
     return redirect('restaurant:login')
 
 def user_logout_view(request):
@@ -213,13 +246,14 @@ def admin_logout_view(request):
 # PUBLIC PAGES
 # ============================================================================
 
+@replica_reads
 def home(request):
     """Render home page."""
     user = get_logged_in_user(request)
     
     # Get featured menu items
     try:
-        featured_items = MenuItems.objects.filter(
+        featured_items = catalog_items().filter(
             is_available=1,
             category='meals'
         )[:3]
@@ -236,7 +270,7 @@ def home(request):
             })
         
     except Exception as e:
-        print(f"Error fetching featured items: {e}")
+        logger.warning("Error fetching featured items: %s", e)
         featured_items_list = [
             {
                 'name': 'Adobo',
@@ -272,16 +306,17 @@ def contact_page(request):
     return render(request, 'restaurant/contact.html')
 
 def menu(request):
-    """Render menu page with categories."""
-    meals = MenuItems.objects.filter(category='meals')
-    drinks = MenuItems.objects.filter(category='drinks')
-    desserts = MenuItems.objects.filter(category='desserts')
-    
+    """
+    Render menu page with categories.
+    Category sections are cached per catalog version; the catalog is only
+    queried (once, for all categories) when a section has to be re-rendered.
+    """
+    grouped = SimpleLazyObject(catalog_by_category)
     context = {
-        'meals': meals,
-        'drinks': drinks,
-        'desserts': desserts
+        category: SimpleLazyObject(lambda category=category: grouped[category])
+        for category in MENU_CATEGORIES
     }
+    context['catalog_version'] = get_catalog_version()
     return render(request, 'restaurant/mainmenu.html', context)
 
 
@@ -289,13 +324,14 @@ def menu(request):
 # USER DASHBOARD & PROFILE
 # ============================================================================
 
+@replica_reads
 def dashboard(request):
     """Render dashboard for logged-in regular users."""
     user = get_logged_in_user(request)
     if not user:
         return redirect('restaurant:login')
     
-    featured_items = MenuItems.objects.filter(is_available=1)[:6]
+    featured_items = catalog_items().filter(is_available=1)[:6]
     
     context = {
         'user': user,
@@ -304,23 +340,36 @@ def dashboard(request):
     
     return render(request, 'restaurant/index_logged_in.html', context)
 
+@replica_reads
 def profile_view(request):
     """Render user profile page."""
     user = get_logged_in_user(request)
     if not user:
         return redirect('restaurant:login')
 
-    deliveries = Deliveries.objects.filter(
-        order__user=user,
-        delivered_at__isnull=False
-    ).select_related('order').prefetch_related('order__items').order_by('-delivered_at')
+    # First page only; the order modal fetches older orders from order_history_api
+    history, history_cursor = order_history_page(user.user_id)
 
     context = {
         'user': user,
-        'deliveries': deliveries,
+        'history': history,
+        'history_cursor': history_cursor,
     }
     return render(request, 'restaurant/profile.html', context)
 
+@replica_reads
+def order_history_api(request):
+    """Next page of the logged-in user's delivered orders (?cursor=)."""
+    user = get_logged_in_user(request)
+    if not user:
+        return JsonResponse({'detail': 'Authentication required'}, status=401)
+
+    try:
+        orders, next_cursor = order_history_page(user.user_id, cursor=request.GET.get('cursor') or None)
+    except ValueError:
+        return JsonResponse({'detail': 'Invalid cursor'}, status=400)
+    return JsonResponse({'results': orders, 'next_cursor': next_cursor})
+
 
 
 def update_profile(request):
@@ -331,8 +380,7 @@ def update_profile(request):
         return JsonResponse({'error': 'Authentication required'}, status=401)
     
     try:
-        # Get the user from database
-        db_user = Users.objects.get(user_id=user.user_id)
+        db_user = user
         
         # Get form data
         first_name = request.POST.get('first_name', '').strip()
@@ -358,7 +406,10 @@ def update_profile(request):
         # if phone:
         #     db_user.phone = phone
         
-        db_user.save()
+        with transaction.atomic():
+            db_user.save(update_fields=['first_name', 'last_name', 'email'])
+            # Order summaries carry the customer's name and email
+            refresh_customer_summaries(db_user.user_id)
         
         # Return success response with updated data
         return JsonResponse({
@@ -375,16 +426,15 @@ def update_profile(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
-def change_password(request):
-    """Change user password."""
+async def change_password(request):
+    """Change user password; both hashes are awaited, so they hold no sync thread."""
     # Use your custom function to get logged in user
-    user = get_logged_in_user(request)
+    user = await sync_to_async(get_logged_in_user)(request)
     if not user:
         return JsonResponse({'error': 'Authentication required'}, status=401)
     
     try:
-        # Get the user from database
-        db_user = Users.objects.get(user_id=user.user_id)
+        db_user = user
         
         # Get form data
         current_password = request.POST.get('current_password', '')
@@ -395,8 +445,11 @@ def change_password(request):
         if not current_password or not new_password or not confirm_password:
             return JsonResponse({'error': 'All fields are required'}, status=400)
         
+        if not await sync_to_async(allow_password_attempt)(request, db_user.email):
+            return JsonResponse({'error': 'Too many attempts. Please wait a minute and try again.'}, status=429)
+        
         # Verify current password
-        if not check_password(current_password, db_user.password):
+        if not await acheck_password(current_password, db_user.password):
             return JsonResponse({'error': 'Current password is incorrect'}, status=400)
         
         # Check if new password matches confirmation
@@ -408,7 +461,6 @@ def change_password(request):
             return JsonResponse({'error': 'Password must be at least 8 characters long'}, status=400)
         
         # Check for password complexity (optional but recommended)
-        import re
         if not re.search(r'[A-Z]', new_password):
             return JsonResponse({'error': 'Password must contain at least one uppercase letter'}, status=400)
         if not re.search(r'[a-z]', new_password):
@@ -417,8 +469,8 @@ def change_password(request):
             return JsonResponse({'error': 'Password must contain at least one number'}, status=400)
         
         # Update password
-        db_user.password = make_password(new_password)
-        db_user.save()
+        db_user.password = await amake_password(new_password)
+        await sync_to_async(db_user.save)(update_fields=['password'])
         
         # Return success response
         return JsonResponse({
@@ -426,6 +478,8 @@ def change_password(request):
             'message': 'Password changed successfully'
         })
         
+    except HashingBusy as e:
+        return JsonResponse({'error': str(e)}, status=503)
     except Users.DoesNotExist:
         return JsonResponse({'error': 'User not found'}, status=404)
     except Exception as e:
@@ -438,16 +492,90 @@ def change_password(request):
 # MENU ITEMS API
 # ============================================================================
 
+@method_decorator(replica_reads, name='list')
+@method_decorator(replica_reads, name='retrieve')
 class MenuItemsViewSet(viewsets.ModelViewSet):
-    """ViewSet for managing menu items via REST API."""
-    queryset = MenuItems.objects.all()
+    """
+    ViewSet for managing menu items via REST API.
+    - ?fields=item_id,name,price narrows both the SELECT and the response
+    - ?cursor= / ?page_size= switch the list to cursor pages ordered by item_id
+    """
+    queryset = catalog_items()
     serializer_class = MenuItemsSerializer
+    pagination_class = MenuCursorPagination
+
+    def get_requested_fields(self):
+        """Return the valid fields listed in ?fields=, or None for all fields."""
+        if self.request is None or self.request.method != 'GET':
+            return None
+        requested = self.request.query_params.get('fields')
+        if not requested:
+            return None
+        model_fields = {f.name for f in MenuItems._meta.concrete_fields}
+        fields = [f for f in requested.split(',') if f in model_fields]
+        if fields and 'item_id' not in fields:
+            fields.insert(0, 'item_id')  # cursor pagination orders by item_id
+        return fields or None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        return queryset.only(*fields) if fields else queryset
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def perform_create(self, serializer):
+        item = serializer.save()
+        bump_catalog_version([item.item_id])
+
+    def perform_update(self, serializer):
+        old_price = serializer.instance.price
+        with transaction.atomic():
+            item = serializer.save()
+            if item.price != old_price:
+                reprice_cart_items(item.item_id)
+            bump_catalog_version([item.item_id])
+
+    def perform_destroy(self, instance):
+        archive_menu_item(instance.item_id)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Server-side menu search from the in-memory index (no DB hit).
+        Params: q, category, min_price, max_price, available=1, limit,
+        fields=comma list (default: item_id only).
+        """
+        fields = [f for f in request.query_params.get('fields', 'item_id').split(',') if f in DOC_FIELDS]
+        try:
+            limit = int(request.query_params.get('limit', 0)) or None
+        except ValueError:
+            limit = None
+
+        docs = menu_index.search(
+            request.query_params.get('q', ''),
+            category=request.query_params.get('category', '').lower() or None,
+            min_price=parse_price(request.query_params.get('min_price')),
+            max_price=parse_price(request.query_params.get('max_price')),
+            available_only=request.query_params.get('available') == '1',
+            limit=limit,
+        )
+        results = [{f: doc[f] for f in fields or ['item_id']} for doc in docs]
+        return Response({'count': len(results), 'results': results})
 
 def menu_page(request):
-    """Render menu page."""
-    user = get_logged_in_user(request)
-    items = MenuItems.objects.filter(is_available=1)
-    return render(request, 'restaurant/menu.html', {'user': user, 'menu_items': items})
+    """Render menu page (items are loaded by the page from /api/menu/)."""
+    # The page has no per-user or per-item markup, so the rendered HTML is shared
+    cache_key = f'menu_page:{get_catalog_version()}'
+    html = cache.get(cache_key)
+    if html is None:
+        html = render_to_string('restaurant/menu.html', request=request)
+        cache.set(cache_key, html, MENU_PAGE_CACHE_TIMEOUT)
+    return HttpResponse(html)
 
 
 # ============================================================================
@@ -489,7 +617,7 @@ def add_to_cart_api(request):
         return Response({"detail": "Item ID is required"}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        menu_item = MenuItems.objects.get(item_id=item_id)
+        menu_item = catalog_items().get(item_id=item_id)
         cart_item, created = Cart.objects.get_or_create(user=user, item=menu_item)
 
         # Update quantity
@@ -560,52 +688,67 @@ def place_order_api(request):
     try:
         data = json.loads(request.body)
 
+        branch = data.get("branch") or settings.DEFAULT_BRANCH
+        if branch not in settings.BRANCH_SHARDS:
+            return JsonResponse({"detail": "Unknown branch"}, status=400)
+        # The branch's shard holds the order and everything under it
+        shard = branch_shard(branch)
+
+        # Verify stored subtotals against current menu prices
+        stored_subtotal, subtotal = cart_totals(user.user_id)
+        if stored_subtotal != subtotal:
+            reprice_user_cart(user.user_id)
+
         # Calculate total
-        subtotal = sum([ci.subtotal for ci in cart_items])
         shipping_fee = Decimal('40.00')
         total_amount = subtotal + shipping_fee
 
         now = timezone.localtime()
 
-        # Create order
-        order = Orders.objects.create(
-            user_id=user.user_id,
-            total_amount=total_amount,
-            order_date=now
-        )
+        with transaction.atomic(), transaction.atomic(using=shard):
+            # Create order
+            order = Orders.objects.using(shard).create(
+                user_id=user.user_id,
+                branch=branch,
+                total_amount=total_amount,
+                order_date=now
+            )
 
-        # Save order items
-        for ci in cart_items:
-            OrderItems.objects.create(
-                order_id=order.order_id,
-                item_id=ci.item.item_id,
-                quantity=ci.quantity,
-                subtotal=ci.subtotal
+            # Save order items
+            for ci in cart_items:
+                OrderItems.objects.using(shard).create(
+                    order_id=order.order_id,
+                    item_id=ci.item_id,
+                    quantity=ci.quantity,
+                    subtotal=ci.subtotal
+                )
+
+            # Save payment
+            Payments.objects.using(shard).create(
+                order=order,
+                payment_method=data.get("payment_method", ""),
+                payment_date=now
             )
 
-        # Save payment
-        Payments.objects.create(
-            order=order,
-            payment_method=data.get("payment_method", ""),
-            payment_date=now
-        )
+            # Save delivery
+            Deliveries.objects.using(shard).create(
+                order=order,
+                delivery_address=data.get("address", ""),
+                contact_number=data.get("contact", ""),
+                delivery_option=data.get("delivery_option", ""),
+                notes=data.get("notes", ""),
+                status="pending",
+                confirmed_at=None,
+                preparing_at=None,
+                out_for_delivery_at=None,
+                delivered_at=None
+            )
 
-        # Save delivery
-        Deliveries.objects.create(
-            order=order,
-            delivery_address=data.get("address", ""),
-            contact_number=data.get("contact", ""),
-            delivery_option=data.get("delivery_option", ""),
-            notes=data.get("notes", ""),
-            status="pending",
-            confirmed_at=None,
-            preparing_at=None,
-            out_for_delivery_at=None,
-            delivered_at=None
-        )
+            record_status_events([order.order_id], 'pending')
+            refresh_order_summaries([order.order_id])
 
-        # Clear cart
-        cart_items.delete()
+            # Clear cart
+            cart_items.delete()
 
         return JsonResponse({
             "detail": "Order placed successfully",
@@ -625,7 +768,9 @@ def order_view(request):
             {"order": None, "order_id": None},
         )
 
-    order = Orders.objects.filter(user=user).order_by("-order_date").first()
+    # order_summary knows the latest order across branches; the order itself is on its shard
+    latest = OrderSummary.objects.filter(user_id=user.user_id).order_by("-order_date").values_list("order_id", flat=True).first()
+    order = Orders.objects.using(order_shard(latest)).filter(pk=latest).first() if latest else None
 
     return render(
         request,
@@ -639,8 +784,8 @@ def order_view(request):
 @api_view(["GET"])
 def track_order_api(request, order_id):
     """Return order status and tracking information."""
-    order = get_object_or_404(Orders, pk=order_id)
-    delivery = Deliveries.objects.filter(order=order).first()
+    order = get_object_or_404(Orders.objects.using(order_shard(order_id)), pk=order_id)
+    delivery = Deliveries.objects.using(order._state.db).filter(order=order).first()
 
     # Demo map points
     START_COORDS = [14.6760, 121.0437]  # Quezon City
@@ -689,8 +834,8 @@ def mark_order_seen(request, order_id):
         return JsonResponse({"detail": "Method not allowed"}, status=405)
 
     try:
-        order = Orders.objects.get(pk=order_id)
-        delivery = Deliveries.objects.filter(order=order).first()
+        order = Orders.objects.using(order_shard(order_id)).get(pk=order_id)
+        delivery = Deliveries.objects.using(order._state.db).filter(order=order).first()
         if delivery:
             delivery.timestamps = {}
             delivery.save()
@@ -707,22 +852,27 @@ def mark_order_seen(request, order_id):
 @api_view(['POST'])
 def submit_feedback(request):
     """Submit user feedback."""
-    user_id = request.session.get('user_session_id')
-    if not user_id:
+    user = get_logged_in_user(request)
+    if not user:
         return Response({'detail': 'You must be logged in to submit feedback.'}, status=status.HTTP_403_FORBIDDEN)
 
-    user = Users.objects.get(pk=user_id)
     serializer = FeedbackSerializer(data=request.data, context={'request': request})
-    if serializer.is_valid():
-        serializer.save(user=user, date_submitted=timezone.now())
-        return Response({'message': 'Feedback submitted successfully!'}, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    # Queued and written in bulk by the feedback buffer
+    try:
+        feedback_buffer.submit(user.user_id, serializer.validated_data['message'], serializer.validated_data.get('rating'))
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'message': 'Feedback submitted successfully!'}, status=status.HTTP_202_ACCEPTED)
 
 
 # ============================================================================
 # ADMIN DASHBOARD
 # ============================================================================
 
+@replica_reads
 def admin_dashboard(request):
     """Render admin dashboard with statistics."""
     admin = get_logged_in_admin(request)
@@ -730,32 +880,35 @@ def admin_dashboard(request):
         return redirect('restaurant:login')
 
     # Summary counts
-    total_orders = Orders.objects.count()
-    pending_orders = Deliveries.objects.filter(status='pending').count()
-    total_menu = MenuItems.objects.count()
+    total_orders = OrderSummary.objects.count() + ArchivedOrder.objects.count()
+    pending_orders = OrderSummary.objects.filter(status='pending').count()
+    total_menu = catalog_items().count()
     total_users = Users.objects.count()
 
     # Last 10 orders
-    orders = Orders.objects.prefetch_related(
-        Prefetch('deliveries_set', queryset=Deliveries.objects.all()),
-        Prefetch('items', queryset=OrderItems.objects.select_related('item'))
-    ).order_by('-order_date')[:10]
-
-    # Best Sellers (top 5)
-    best_sellers = (
-        OrderItems.objects
-        .values('item', 'item__name', 'item__image_url')
-        .annotate(total_ordered=Sum('quantity'))
-        .order_by('-total_ordered')[:5]
-    )
-
-    # Low Sellers (bottom 5)
-    low_sellers = (
-        OrderItems.objects
-        .values('item', 'item__name', 'item__image_url')
-        .annotate(total_ordered=Sum('quantity'))
-        .order_by('total_ordered')[:5]
-    )
+    orders = OrderSummary.objects.order_by('-order_date')[:10]
+
+    # Best / low sellers: per-item totals from every shard and the archive, added up here
+    ordered = {}
+    for row in chain(
+        for_each_shard(lambda alias: (
+            on_shard(OrderItems, alias).values('item_id').annotate(total_ordered=Sum('quantity'))
+        )),
+        ArchivedOrderItem.objects.values('item_id').annotate(total_ordered=Sum('quantity')),
+    ):
+        ordered[row['item_id']] = ordered.get(row['item_id'], 0) + row['total_ordered']
+    menu = MenuItems.objects.only('name', 'image_url').in_bulk(list(ordered))
+    sellers = [
+        {
+            'item': item_id,
+            'item__name': menu[item_id].name if item_id in menu else None,
+            'item__image_url': menu[item_id].image_url if item_id in menu else None,
+            'total_ordered': total,
+        }
+        for item_id, total in ordered.items()
+    ]
+    best_sellers = sorted(sellers, key=lambda row: row['total_ordered'], reverse=True)[:5]
+    low_sellers = sorted(sellers, key=lambda row: row['total_ordered'])[:5]
 
     context = {
         'total_orders': total_orders,
@@ -781,7 +934,7 @@ def admin_menu(request):
     if not admin:
         return redirect('restaurant:login')
     
-    menu_items = MenuItems.objects.all()
+    menu_items = catalog_items()
     return render(request, 'restaurant/admin_menu.html', {'menu_items': menu_items, 'admin': admin})
 
 def admin_add_menu(request):
@@ -798,7 +951,7 @@ def admin_add_menu(request):
         image_url = request.POST.get("image_url")
         is_available = int(request.POST.get("is_available", 1))
 
-        MenuItems.objects.create(
+        item = MenuItems.objects.create(
             name=name,
             description=description,
             price=price,
@@ -806,6 +959,7 @@ def admin_add_menu(request):
             image_url=image_url,
             is_available=is_available
         )
+        bump_catalog_version([item.item_id])
         messages.success(request, f"{name} added successfully!")
         return redirect('restaurant:admin-menu')
 
@@ -817,16 +971,30 @@ def admin_edit_menu(request, item_id):
     if not admin:
         return redirect('restaurant:login')
     
-    item = get_object_or_404(MenuItems, item_id=item_id)
+    item = get_object_or_404(catalog_items(), item_id=item_id)
 
     if request.method == "POST":
+        try:
+            price = Decimal((request.POST.get("price") or '').strip())
+            is_available = int(request.POST.get("is_available", 1))
+        except (InvalidOperation, ValueError):
+            price = None
+        if price is None or not price.is_finite() or price < 0:
+            return HttpResponseBadRequest("Please enter a valid price.")
+
+        old_price = item.price
         item.name = request.POST.get("name")
         item.description = request.POST.get("description")
-        item.price = request.POST.get("price")
+        item.price = price
         item.category = request.POST.get("category")
        
-        item.is_available = int(request.POST.get("is_available", 1))
-        item.save()
+        item.is_available = is_available
+        with transaction.atomic():
+            item.save()
+            # Keep existing cart subtotals in line with the new price
+            if item.price != old_price:
+                reprice_cart_items(item.item_id)
+            bump_catalog_version([item.item_id])
         messages.success(request, f"{item.name} updated successfully!")
         return redirect('restaurant:admin-menu')
 
@@ -836,26 +1004,19 @@ from django.db import transaction
 from django.db import connection
 
 def admin_delete_menu(request, item_id):
-    """Delete a menu item."""
+    """Delete (archive) a menu item; past OrderItems keep pointing at it."""
     admin = get_logged_in_admin(request)
     if not admin:
         return redirect('restaurant:login')
     
     try:
         with transaction.atomic():
-            from .models import MenuItems
-            
             # Get the item name first
-            item = MenuItems.objects.get(item_id=item_id)
+            item = catalog_items().get(item_id=item_id)
             item_name = item.name
             
-            # Use raw SQL to bypass Django's model constraints
-            with connection.cursor() as cursor:
-                # Delete order items first
-                cursor.execute("DELETE FROM OrderItems WHERE item_id = %s", [item_id])
-                
-                # Delete menu item
-                cursor.execute("DELETE FROM menu_items WHERE item_id = %s", [item_id])
+            # Soft delete: a single row UPDATE instead of purging sales history
+            archive_menu_item(item_id)
             
             messages.success(request, f"{item_name} deleted successfully!")
             
@@ -866,6 +1027,75 @@ def admin_delete_menu(request, item_id):
     
     return redirect('restaurant:admin-menu')
 
+@export_reads
+def admin_export_menu(request):
+    """Download the whole menu catalog as CSV or JSON."""
+    admin = get_logged_in_admin(request)
+    if not admin:
+        return redirect('restaurant:login')
+
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in CATALOG_FORMATS:
+        fmt = 'csv'
+
+    try:
+        rows = export_catalog()
+    except ExportTimeout as e:
+        messages.error(request, str(e))
+        return redirect('restaurant:admin-menu')
+
+    content_type = 'application/json' if fmt == 'json' else 'text/csv'
+    response = HttpResponse(render_catalog(rows, fmt), content_type=content_type)
+    filename = f"menu_{timezone.localtime().strftime('%Y%m%d_%H%M')}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def admin_import_menu(request):
+    """Create/update many menu items from an uploaded CSV or JSON file."""
+    admin = get_logged_in_admin(request)
+    if not admin:
+        return redirect('restaurant:login')
+
+    if request.method == "POST":
+        upload = request.FILES.get('catalog_file')
+        if not upload:
+            messages.error(request, "Please choose a CSV or JSON file to import.")
+            return redirect('restaurant:admin-menu')
+
+        fmt = 'json' if upload.name.lower().endswith('.json') else 'csv'
+        try:
+            rows = parse_catalog(upload.read().decode('utf-8-sig'), fmt)
+            created, updated = import_catalog(rows)
+            messages.success(request, f"Menu import done: {created} added, {updated} updated.")
+        except (ValueError, UnicodeDecodeError) as e:
+            messages.error(request, f"Error importing menu: {str(e)}")
+
+    return redirect('restaurant:admin-menu')
+
+def admin_menu_availability(request):
+    """Mark many menu items available or sold out in one UPDATE."""
+    admin = get_logged_in_admin(request)
+    if not admin:
+        return JsonResponse({'detail': 'Admin login required'}, status=401)
+
+    if request.method != "POST":
+        return JsonResponse({'detail': 'Method not allowed'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            raise ValueError
+        item_ids = [int(item_id) for item_id in data.get('item_ids', [])]
+        is_available = int(data.get('is_available', 1))
+    except (ValueError, TypeError):
+        return JsonResponse({'detail': 'Invalid request data'}, status=400)
+
+    if not item_ids:
+        return JsonResponse({'detail': 'No items selected'}, status=400)
+
+    updated = set_availability(item_ids, is_available)
+    return JsonResponse({'updated': updated, 'is_available': 1 if is_available else 0})
+
 
 # ============================================================================
 # ADMIN ORDER MANAGEMENT
@@ -883,37 +1113,19 @@ def admin_orders(request):
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
 
-    # Base queryset with prefetch
-    orders = Orders.objects.all().prefetch_related(
-        Prefetch('items', queryset=OrderItems.objects.select_related('item')),
-        Prefetch('deliveries_set', queryset=Deliveries.objects.all()),
-        Prefetch('payments_set', queryset=Payments.objects.all())
-    )
+    # One row per order from the order_summary read model (orders without items are skipped)
+    orders = OrderSummary.objects.filter(item_count__gt=0)
 
-    # Apply status filter
+    # Apply status filter (canonical, indexed status column)
     if status_filter != 'all':
-        if status_filter == 'delivered':
-            orders = orders.filter(deliveries__delivered_at__isnull=False)
-        elif status_filter == 'out_for_delivery':
-            orders = orders.filter(deliveries__status='out_for_delivery')
-        elif status_filter == 'preparing':
-            orders = orders.filter(deliveries__status='preparing')
-        elif status_filter == 'confirmed':
-            orders = orders.filter(deliveries__status='confirmed')
-        elif status_filter == 'pending':
-            orders = orders.filter(
-                Q(deliveries__isnull=True) | 
-                Q(deliveries__status='pending')
-            )
-        else:
-            orders = orders.filter(deliveries__status=status_filter)
+        orders = orders.filter(status=status_filter)
 
     # Apply date filtering for delivered orders
     if status_filter == 'delivered' and (start_date or end_date):
         if start_date:
             try:
                 start_date_obj = timezone.make_aware(datetime.strptime(start_date, '%Y-%m-%d'))
-                orders = orders.filter(deliveries__delivered_at__gte=start_date_obj)
+                orders = orders.filter(delivered_at__gte=start_date_obj)
             except ValueError:
                 pass
         
@@ -921,13 +1133,18 @@ def admin_orders(request):
             try:
                 end_date_obj = timezone.make_aware(datetime.strptime(end_date, '%Y-%m-%d'))
                 end_date_obj = end_date_obj + timedelta(days=1)
-                orders = orders.filter(deliveries__delivered_at__lt=end_date_obj)
+                orders = orders.filter(delivered_at__lt=end_date_obj)
             except ValueError:
                 pass
 
-    # Order by order_date
+    # Order by order_date; item names for all cards come from one query
     orders = orders.order_by('-order_date')
-    orders = [order for order in orders if order.items.exists()]
+
+    # A search replaces the status / date listing
+    query = request.GET.get('q', '').strip()
+    if query:
+        orders = search_orders(query)
+    orders = attach_order_lines(orders)
 
     return render(
         request,
@@ -937,76 +1154,128 @@ def admin_orders(request):
             'status_filter': status_filter,
             'admin': admin,
             'start_date': start_date,
-            'end_date': end_date
+            'end_date': end_date,
+            'changes_since': latest_event_id(),
+            'query': query,
         }
     )
 
+def admin_order_search_api(request):
+    """Find live orders by order ID, phone number (or its last digits), customer name or address (archived orders are not searched)."""
+    admin = get_logged_in_admin(request)
+    if not admin:
+        return JsonResponse({'detail': 'Admin login required'}, status=401)
+
+    results = search_orders(request.GET.get('q', ''))
+    return JsonResponse({
+        'results': [
+            {
+                'order_id': order.order_id,
+                'customer_name': order.customer_name,
+                'contact_number': order.contact_number,
+                'delivery_address': order.delivery_address,
+                'status': order.status,
+                'total_amount': str(order.total_amount),
+                'order_date': order.order_date.isoformat() if order.order_date else None,
+            }
+            for order in results
+        ]
+    })
+
+def admin_order_changes_api(request):
+    """
+    Status changes after ?since=<event id>, oldest first, for polling admin
+    pages. Recent changes may be sent twice (see status_changes()).
+    """
+    admin = get_logged_in_admin(request)
+    if not admin:
+        return JsonResponse({'detail': 'Admin login required'}, status=401)
+
+    since = request.GET.get('since')
+    if since is None:
+        # No position yet: start from the newest event
+        return JsonResponse({'since': latest_event_id(), 'changes': [], 'has_more': False})
+    try:
+        since = int(since)
+    except ValueError:
+        return JsonResponse({'detail': 'Invalid since'}, status=400)
+
+    events, last = status_changes(since)
+    return JsonResponse({
+        'since': last,
+        'changes': [[order_id, status] for _, order_id, status in events],
+        # Only a full page of settled events means there is more to read now
+        'has_more': len(events) == CHANGES_PAGE_SIZE and last == events[-1][0],
+    })
+
 def admin_update_orders(request, order_id):
-    """Update order status and sync Deliveries timestamps."""
+    """Move an order to the posted status (one conditional UPDATE, see order_status.py)."""
     admin = get_logged_in_admin(request)
     if not admin:
         return redirect('restaurant:login')
     
-    order = get_object_or_404(Orders, order_id=order_id)
-    delivery = Deliveries.objects.filter(order=order).first()
-
-    if request.method == "POST" and delivery:
+    if request.method == "POST":
         new_status = request.POST.get("status")
-        now = timezone.now()
-        
-        if new_status == "preparing":
-            delivery.status = "preparing"
-            delivery.preparing_at = now
-            if not delivery.confirmed_at:
-                delivery.confirmed_at = now
-
-        elif new_status == "out_for_delivery":
-            delivery.status = "out_for_delivery"
-            delivery.out_for_delivery_at = now
-            if not delivery.confirmed_at:
-                delivery.confirmed_at = now
-            if not delivery.preparing_at:
-                delivery.preparing_at = now
-
-        elif new_status == "delivered":
-            delivery.status = "delivered"
-            delivery.delivered_at = now
-            if not delivery.confirmed_at:
-                delivery.confirmed_at = now
-            if not delivery.preparing_at:
-                delivery.preparing_at = now
-            if not delivery.out_for_delivery_at:
-                delivery.out_for_delivery_at = now
-
-        delivery.save()
+        if new_status not in STAGE_TIMESTAMPS:
+            return redirect('/admin-orders/')
         
+        # No-op if another admin already moved the order this far
+        transition_order(order_id, new_status)
         return redirect(f'/admin-orders/?status={new_status}')
 
     return redirect('/admin-orders/')
 
+def admin_bulk_update_orders(request):
+    """Move many orders to one status in a single transaction; returns per-order results."""
+    admin = get_logged_in_admin(request)
+    if not admin:
+        return JsonResponse({'detail': 'Admin login required'}, status=401)
+
+    if request.method != "POST":
+        return JsonResponse({'detail': 'Method not allowed'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict) or not isinstance(data.get('order_ids', []), list):
+            raise ValueError
+        order_ids = [int(order_id) for order_id in data.get('order_ids', [])]
+        new_status = data.get('status')
+    except (ValueError, TypeError):
+        return JsonResponse({'detail': 'Invalid request data'}, status=400)
+
+    if new_status not in STAGE_TIMESTAMPS:
+        return JsonResponse({'detail': 'Invalid status'}, status=400)
+    if not order_ids:
+        return JsonResponse({'detail': 'No orders selected'}, status=400)
+    if len(order_ids) > 500:
+        return JsonResponse({'detail': 'Too many orders selected (max 500)'}, status=400)
+
+    results = bulk_transition(order_ids, new_status)
+    return JsonResponse({
+        'status': new_status,
+        'moved': sum(1 for result, _ in results.values() if result == 'moved'),
+        'results': [
+            {'order_id': order_id, 'result': result, 'status': status}
+            for order_id, (result, status) in results.items()
+        ],
+    })
+
 def confirm_order(request, order_id):
     """Confirm order."""
     admin = get_logged_in_admin(request)
     if not admin:
         return redirect('restaurant:login')
     
-    order = get_object_or_404(Orders, order_id=order_id)
-    
     if request.method == "POST":
-        now = timezone.now()
-        
-        delivery, created = Deliveries.objects.get_or_create(
-            order=order,
-            defaults={
-                'status': 'confirmed',
-                'confirmed_at': now
-            }
-        )
-        
-        if not created:
-            delivery.status = 'confirmed'
-            delivery.confirmed_at = now
-            delivery.save()
+        with transaction.atomic():
+            if not transition_order(order_id, 'confirmed'):
+                # Orders placed without a delivery row get one here
+                shard = order_shard(order_id)
+                order = get_object_or_404(Orders.objects.using(shard), order_id=order_id)
+                if not Deliveries.objects.using(shard).filter(order=order).exists():
+                    Deliveries.objects.using(shard).create(order=order, status='confirmed', confirmed_at=timezone.now())
+                    record_status_events([order.order_id], 'confirmed')
+                    refresh_order_summaries([order.order_id])
 
     return redirect('/admin-orders/?status=confirmed')
 
@@ -1021,9 +1290,14 @@ def admin_feedback(request):
     if not admin:
         return redirect('restaurant:login')
     
-    feedback_list = Feedback.objects.all().order_by('-date_submitted')
+    # Keyset page: ?before=<feedback_id> shows older feedback
+    before = request.GET.get('before')
+    feedback_list, next_before = feedback_page(int(before) if before and before.isdigit() else None)
     context = {
         'feedback_list': feedback_list,
+        'next_before': next_before,
+        'is_first_page': not before,
+        'summary': rating_summary(),
         'admin': admin
     }
     return render(request, 'restaurant/admin_feedback.html', context)
@@ -1043,7 +1317,9 @@ def manage_users(request):
     if not admin:
         return redirect('restaurant:login')
     
-    users = Users.objects.all().order_by('-date_joined')
+    # First page only; the page loads more / searches through admin_users_api
+    query = request.GET.get('q', '').strip()
+    users, next_cursor = users_page(query)
     admins = Admin.objects.all().order_by('-created_at')
     
     success_message = request.session.pop('success_message', None)
@@ -1051,6 +1327,9 @@ def manage_users(request):
     
     context = {
         'users': users,
+        'users_total': Users.objects.count(),
+        'next_cursor': next_cursor,
+        'query': query,
         'admins': admins,
         'admin': admin,
         'success_message': success_message,
@@ -1059,6 +1338,26 @@ def manage_users(request):
     
     return render(request, 'restaurant/manage_users.html', context)
 
+def admin_users_api(request):
+    """JSON page of the user directory: ?q= prefix search, ?cursor= for the next page."""
+    admin = get_logged_in_admin(request)
+    if not admin:
+        return JsonResponse({'detail': 'Admin login required'}, status=401)
+
+    try:
+        limit = min(int(request.GET.get('limit', USER_PAGE_SIZE)), 200)
+        users, next_cursor = users_page(
+            request.GET.get('q', '').strip(),
+            cursor=request.GET.get('cursor') or None,
+            limit=max(limit, 1),
+        )
+    except ValueError:
+        return JsonResponse({'detail': 'Invalid cursor or limit'}, status=400)
+
+    for user in users:
+        user['date_joined'] = format_time(user['date_joined'])
+    return JsonResponse({'results': users, 'next_cursor': next_cursor})
+
 def add_admin(request):
     """Add new admin account."""
     admin_user = get_logged_in_admin(request)
@@ -1097,7 +1396,7 @@ def add_admin(request):
             request.session['success_message'] = 'Admin added successfully!'
             return redirect('restaurant:admin-users')
         except Exception as e:
-            print(f"Error creating admin: {e}")
+            logger.exception("Error creating admin")
             request.session['error_message'] = 'Server error. Please try again.'
             return redirect('restaurant:admin-users')
     
@@ -1146,7 +1445,7 @@ def edit_admin(request):
             request.session['error_message'] = 'Admin not found!'
             return redirect('restaurant:admin-users')
         except Exception as e:
-            print(f"Error updating admin: {e}")
+            logger.exception("Error updating admin")
             request.session['error_message'] = 'Server error. Please try again.'
             return redirect('restaurant:admin-users')
     
@@ -1172,13 +1471,33 @@ def delete_admin(request):
             request.session['error_message'] = 'Admin not found!'
             return redirect('restaurant:admin-users')
         except Exception as e:
-            print(f"Error deleting admin: {e}")
+            logger.exception("Error deleting admin")
             request.session['error_message'] = 'Server error. Please try again.'
             return redirect('restaurant:admin-users')
     
     return redirect('restaurant:admin-users')
 
 
+# ============================================================================
+# METRICS
+# ============================================================================
+
+def metrics_view(request):
+    """
+    Request histograms in the Prometheus text format. Scrapers send
+    "Authorization: Bearer <METRICS_TOKEN>"; logged-in admins may look too.
+    Without a token it is open only when DEBUG is on.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    else:
+        allowed = settings.DEBUG
+    if not allowed and not get_logged_in_admin(request):
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # ============================================================================
 # ADMIN SETTINGS
 # ============================================================================
@@ -1225,14 +1544,28 @@ def admin_settings(request):
                 messages.error(request, 'Please fill all password fields to change password!')
                 return redirect('restaurant:admin-settings')
             
-            if admin.check_password(current_password):
+            if not allow_password_attempt(request, admin.email):
+                messages.error(request, 'Too many attempts. Please wait a minute and try again.')
+                return redirect('restaurant:admin-settings')
+            
+            try:
+                current_password_ok = admin.check_password(current_password)
+            except HashingBusy as e:
+                messages.error(request, str(e))
+                return redirect('restaurant:admin-settings')
+            
+            if current_password_ok:
                 if new_password == confirm_password:
                     # Validate password strength
                     if len(new_password) < 8:
                         messages.error(request, 'Password must be at least 8 characters long!')
                         return redirect('restaurant:admin-settings')
                     
-                    admin.password = make_password(new_password)
+                    try:
+                        admin.password = make_password(new_password)
+                    except HashingBusy as e:
+                        messages.error(request, str(e))
+                        return redirect('restaurant:admin-settings')
                     password_changed = True
                     messages.success(request, 'Password updated successfully!')
                 else:
@@ -1265,15 +1598,10 @@ import json
 @method_decorator(csrf_exempt, name='dispatch')
 class FeedbackView(View):
     def post(self, request):
-        user_id = request.session.get('user_session_id')
-        if not user_id:
+        user = get_logged_in_user(request)
+        if not user:
             return JsonResponse({'detail': 'You must be logged in to submit feedback.'}, status=403)
         
-        try:
-            user = Users.objects.get(pk=user_id)
-        except Users.DoesNotExist:
-            return JsonResponse({'detail': 'User not found'}, status=404)
-        
         # Parse request data
         if request.content_type == 'application/json':
             try:
@@ -1290,18 +1618,13 @@ class FeedbackView(View):
         if not data.get('message'):
             return JsonResponse({'message': ['This field is required.']}, status=400)
         
-        # Create feedback
-        feedback = Feedback.objects.create(
-            user=user,
-            message=data['message'],
-            rating=int(data['rating']) if data.get('rating') and data['rating'].isdigit() else None,
-            date_submitted=timezone.now()
-        )
+        # Queue feedback (written in bulk by the feedback buffer)
+        try:
+            feedback_buffer.submit(user.user_id, data['message'], data.get('rating'))
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
         
-        return JsonResponse({
-            'message': 'Feedback submitted successfully!',
-            'feedback_id': feedback.feedback_id
-        }, status=201)
+        return JsonResponse({'message': 'Feedback submitted successfully!'}, status=202)
     
     from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
@@ -1313,44 +1636,20 @@ def submit_feedback_form(request):
     if request.method != 'POST':
         return JsonResponse({'detail': 'Method not allowed'}, status=405)
     
-    user_id = request.session.get('user_session_id')
-    if not user_id:
+    user = get_logged_in_user(request)
+    if not user:
         return JsonResponse({'detail': 'You must be logged in to submit feedback.'}, status=403)
-
-    try:
-        user = Users.objects.get(pk=user_id)
-    except Users.DoesNotExist:
-        return JsonResponse({'detail': 'User not found'}, status=404)
     
     # Get form data
     message = request.POST.get('message', '').strip()
     rating = request.POST.get('rating', '').strip()
     
-    # Validate
-    if not message:
-        return JsonResponse({'error': 'Message is required'}, status=400)
-    
-    # Validate rating
-    rating_int = None
-    if rating:
-        try:
-            rating_int = int(rating)
-            if rating_int < 1 or rating_int > 5:
-                return JsonResponse({'error': 'Rating must be between 1 and 5'}, status=400)
-        except ValueError:
-            return JsonResponse({'error': 'Invalid rating value'}, status=400)
-    
-    # Create feedback
+    # Validate and queue (written in bulk by the feedback buffer)
     try:
-        Feedback.objects.create(
-            user=user,
-            message=message,
-            rating=rating_int,
-            date_submitted=timezone.now()
-        )
-        return JsonResponse({'message': 'Feedback submitted successfully!'}, status=201)
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        feedback_buffer.submit(user.user_id, message, rating)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'message': 'Feedback submitted successfully!'}, status=202)
     
 
 # restaurant/views.py
@@ -1370,6 +1669,7 @@ from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 import openpyxl
 from .models import Orders, Deliveries
 
+@export_reads
 def export_orders(request):
     """Handle order export requests"""
     try:
@@ -1379,91 +1679,77 @@ def export_orders(request):
         start_date = request.GET.get('start_date')
         end_date = request.GET.get('end_date')
         
-        print(f"Export Parameters: status={status}, start_date={start_date}, end_date={end_date}, format={format_type}, report_type={report_type}")
-        
-        # Start with all orders
-        orders = Orders.objects.all()
-        
-        # Apply status filter based on delivery status
-        if status == 'delivered':
-            orders = orders.filter(deliveries__delivered_at__isnull=False)
-            print(f"Filtering delivered orders. Found: {orders.count()}")
-        elif status == 'out_for_delivery':
-            orders = orders.filter(deliveries__out_for_delivery_at__isnull=False, 
-                                   deliveries__delivered_at__isnull=True)
-        elif status == 'preparing':
-            orders = orders.filter(deliveries__preparing_at__isnull=False,
-                                   deliveries__out_for_delivery_at__isnull=True)
-        elif status == 'confirmed':
-            orders = orders.filter(deliveries__confirmed_at__isnull=False,
-                                   deliveries__preparing_at__isnull=True)
-        elif status == 'pending':
-            orders = orders.filter(deliveries__confirmed_at__isnull=True)
-        else:
-            # If no status specified, show all
-            pass
+        logger.debug("Export parameters: status=%s, start_date=%s, end_date=%s, format=%s, report_type=%s",
+                     status, start_date, end_date, format_type, report_type)
+        
+        # Start with all orders (order_summary read model: no joins needed to filter)
+        orders = OrderSummary.objects.all()
+        
+        # Apply status filter on the canonical status (same column admin_orders reads)
+        if status in ORDER_STATUSES:
+            orders = orders.filter(status=status)
         
         # Apply date filter if provided - FIXED
+        date_filter = Q()
+        since = None
         if start_date and end_date:
             # Convert string dates to datetime objects
             from datetime import datetime
             try:
-                start_datetime = datetime.strptime(start_date, '%Y-%m-%d')
-                end_datetime = datetime.strptime(end_date, '%Y-%m-%d')
+                start_datetime = timezone.make_aware(datetime.strptime(start_date, '%Y-%m-%d'))
+                end_datetime = timezone.make_aware(datetime.strptime(end_date, '%Y-%m-%d'))
                 # Add time to end date to include the entire day
                 from datetime import timedelta
                 end_datetime = end_datetime + timedelta(days=1) - timedelta(seconds=1)
                 
-                print(f"Date filter range: {start_datetime} to {end_datetime}")
+                logger.debug("Export date range: %s to %s", start_datetime, end_datetime)
                 
                 if status == 'delivered':
                     # For delivered orders, filter by delivered_at date
-                    orders = orders.filter(deliveries__delivered_at__range=[start_datetime, end_datetime])
-                    print(f"Filtered by delivered_at. Found: {orders.count()}")
+                    date_filter = Q(delivered_at__range=[start_datetime, end_datetime])
                 else:
                     # For other statuses, filter by order_date
-                    orders = orders.filter(order_date__range=[start_datetime, end_datetime])
-                    print(f"Filtered by order_date. Found: {orders.count()}")
+                    date_filter = Q(order_date__range=[start_datetime, end_datetime])
+                # Orders are placed before they are delivered, so either way
+                # nothing archived is newer than the archive's last delivery
+                since = start_datetime
                     
             except Exception as e:
-                print(f"Date parsing error: {str(e)}")
+                logger.warning("Export date parsing error: %s", e)
                 # Fallback to string comparison if datetime parsing fails
-                orders = orders.filter(order_date__date__range=[start_date, end_date])
-                print(f"Fallback date filter. Found: {orders.count()}")
-        
-        # Sort by order date (newest first)
-        orders = orders.order_by('-order_date')
-        
-        print(f"Total orders for export: {orders.count()}")
+                date_filter = Q(order_date__date__range=[start_date, end_date])
+            orders = orders.filter(date_filter)
+        
+        # Sort by order date (newest first); item lines come in chunks of ORDER_LINES_CHUNK orders
+        orders = attach_order_lines(orders.order_by('-order_date'))
+        
+        # Delivered orders older than the live tables are in the archive
+        if status in ('delivered', 'all') and archive_needed(since):
+            archived = ArchivedOrder.objects.filter(date_filter).order_by('-order_date')
+            orders = sorted(
+                orders + attach_archived_lines(archived),
+                key=lambda order: order.order_date or timezone.now(), reverse=True,
+            )
         
-        # Debug: Print sample orders
-        sample_count = min(3, orders.count())
-        for i, order in enumerate(orders[:sample_count]):
-            delivery = order.deliveries_set.first() if hasattr(order, 'deliveries_set') and order.deliveries_set.exists() else None
-            print(f"Sample Order {i+1}: #{order.order_id}, Date: {order.order_date}, "
-                  f"Delivery Date: {delivery.delivered_at if delivery else 'None'}")
+        logger.debug("Exporting %d orders as %s (%s)", len(orders), format_type, report_type)
         
         if format_type == 'pdf':
             if report_type == 'receipts':
-                print("Generating individual receipts PDF...")
                 return generate_individual_receipts_pdf(orders)
             else:
-                print("Generating detailed PDF report...")
                 return generate_detailed_pdf_report(orders, report_type, status)
         elif format_type == 'excel':
-            print("Generating Excel report...")
             return generate_detailed_excel_report(orders, report_type, status)
         elif format_type == 'csv':
-            print("Generating CSV report...")
             return generate_detailed_csv_report(orders, report_type, status)
         else:
-            print("Default: Generating detailed PDF report...")
             return generate_detailed_pdf_report(orders, report_type, status)
             
+    except ExportTimeout as e:
+        logger.warning("Export timed out: %s", e)
+        return HttpResponse(str(e), status=503)
     except Exception as e:
-        import traceback
-        print(f"Export error: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Export error")
         return HttpResponse(f"Error generating report: {str(e)}", status=500)
 
 def generate_detailed_pdf_report(orders, report_type, status):
@@ -1556,13 +1842,13 @@ def generate_detailed_pdf_report(orders, report_type, status):
         
         # Order count and total
         total_amount = sum(order.total_amount for order in orders)
-        count_text = Paragraph(f"Orders: {orders.count()} | Total: ₱{total_amount:,.2f}", subtitle_style)
+        count_text = Paragraph(f"Orders: {len(orders)} | Total: ₱{total_amount:,.2f}", subtitle_style)
         elements.append(count_text)
         
         # Add minimal space
         elements.append(Spacer(1, 8))
         
-        if orders.count() == 0:
+        if len(orders) == 0:
             no_orders = Paragraph("No orders found.", 
                                  ParagraphStyle('NoOrders', parent=styles['Normal'], 
                                                fontSize=8, alignment=TA_CENTER, textColor=colors.gray))
@@ -1577,7 +1863,7 @@ def generate_detailed_pdf_report(orders, report_type, status):
         # Process each order
         for i, order in enumerate(orders):
             try:
-                delivery = order.deliveries_set.first() if hasattr(order, 'deliveries_set') and order.deliveries_set.exists() else None
+                delivery = order  # summary rows carry the delivery fields
                 
                 # Order Header
                 order_header = Paragraph(f"<b>#{order.order_id}</b>", order_header_style)
@@ -1587,16 +1873,16 @@ def generate_detailed_pdf_report(orders, report_type, status):
                 details_data = []
                 
                 # Status
-                if delivery and hasattr(delivery, 'delivered_at') and delivery.delivered_at:
+                if delivery and delivery.status == 'delivered':
                     status_text = "DELIVERED"
                     status_color = colors.green
-                elif delivery and hasattr(delivery, 'out_for_delivery_at') and delivery.out_for_delivery_at:
+                elif delivery and delivery.status == 'out_for_delivery':
                     status_text = "OUT FOR DELIVERY"
                     status_color = colors.blue
-                elif delivery and hasattr(delivery, 'preparing_at') and delivery.preparing_at:
+                elif delivery and delivery.status == 'preparing':
                     status_text = "PREPARING"
                     status_color = colors.purple
-                elif delivery and hasattr(delivery, 'confirmed_at') and delivery.confirmed_at:
+                elif delivery and delivery.status == 'confirmed':
                     status_text = "CONFIRMED"
                     status_color = colors.blue
                 else:
@@ -1606,7 +1892,7 @@ def generate_detailed_pdf_report(orders, report_type, status):
                 details_data.append(['Status:', f"<font color='{status_color}'><b>{status_text}</b></font>"])
                 
                 # Customer
-                customer_name = f"{order.user.first_name or ''} {order.user.last_name or ''}".strip()
+                customer_name = order.customer_name
                 if customer_name:
                     details_data.append(['Customer:', customer_name[:20] + '..' if len(customer_name) > 20 else customer_name])
                 
@@ -1626,11 +1912,7 @@ def generate_detailed_pdf_report(orders, report_type, status):
                     details_data.append(['Contact:', delivery.contact_number])
                 
                 # Payment Method
-                payment_method = "COD"
-                if hasattr(order, 'payments_set') and order.payments_set.exists():
-                    payment = order.payments_set.first()
-                    if payment and hasattr(payment, 'payment_method'):
-                        payment_method = payment.payment_method or "COD"
+                payment_method = order.payment_method or "COD"
                 details_data.append(['Payment:', payment_method.upper()[:8]])
                 
                 # Total Amount
@@ -1656,18 +1938,18 @@ def generate_detailed_pdf_report(orders, report_type, status):
                 elements.append(details_table)
                 
                 # Order Items (compact)
-                if hasattr(order, 'items') and order.items.exists():
+                if order.lines:
                     items_text = ""
-                    item_count = min(2, order.items.count())
-                    for j, item in enumerate(order.items.all()[:item_count]):
-                        item_name = item.item.name if hasattr(item.item, 'name') else "Item"
-                        quantity = item.quantity if hasattr(item, 'quantity') else 0
+                    item_count = min(2, len(order.lines))
+                    for j, item in enumerate(order.lines[:item_count]):
+                        item_name = item['name'] or "Item"
+                        quantity = item['quantity'] or 0
                         items_text += f"{item_name[:18]}{'..' if len(item_name) > 18 else ''}×{quantity}"
                         if j < item_count - 1:
                             items_text += ", "
                     
-                    if order.items.count() > 2:
-                        items_text += f" +{order.items.count() - 2} more"
+                    if len(order.lines) > 2:
+                        items_text += f" +{len(order.lines) - 2} more"
                     
                     items_display = Paragraph(f"<font size=5>Items: {items_text}</font>", item_style)
                     elements.append(items_display)
@@ -1689,7 +1971,7 @@ def generate_detailed_pdf_report(orders, report_type, status):
                     elements.append(Spacer(1, 3))
                 
             except Exception as e:
-                print(f"Error processing order {order.order_id}: {str(e)}")
+                logger.warning("Error processing order %s: %s", order.order_id, e)
                 continue
         
         # Add final summary
@@ -1710,16 +1992,14 @@ def generate_detailed_pdf_report(orders, report_type, status):
         return response
         
     except Exception as e:
-        import traceback
-        print(f"PDF generation error: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("PDF generation error")
         return HttpResponse(f"Error generating PDF: {str(e)}", status=500)
 
 
 def generate_individual_receipts_pdf(orders):
     """Generate individual receipts PDF (compact one per page)"""
     try:
-        if orders.count() == 0:
+        if len(orders) == 0:
             buffer = BytesIO()
             doc = SimpleDocTemplate(buffer, pagesize=letter)
             elements = []
@@ -1808,7 +2088,7 @@ def generate_individual_receipts_pdf(orders):
         # Process each order as individual receipt
         for order_index, order in enumerate(orders):
             try:
-                delivery = order.deliveries_set.first() if hasattr(order, 'deliveries_set') and order.deliveries_set.exists() else None
+                delivery = order  # summary rows carry the delivery fields
                 
                 # Add page break except for first receipt
                 if order_index > 0:
@@ -1828,13 +2108,13 @@ def generate_individual_receipts_pdf(orders):
                 elements.append(order_header)
                 
                 # Status
-                if delivery and hasattr(delivery, 'delivered_at') and delivery.delivered_at:
+                if delivery and delivery.status == 'delivered':
                     status = Paragraph("<b><font color='green'>✓ DELIVERED</font></b>", value_style)
-                elif delivery and hasattr(delivery, 'out_for_delivery_at') and delivery.out_for_delivery_at:
+                elif delivery and delivery.status == 'out_for_delivery':
                     status = Paragraph("<b><font color='blue'>OUT FOR DELIVERY</font></b>", value_style)
-                elif delivery and hasattr(delivery, 'preparing_at') and delivery.preparing_at:
+                elif delivery and delivery.status == 'preparing':
                     status = Paragraph("<b><font color='purple'>PREPARING</font></b>", value_style)
-                elif delivery and hasattr(delivery, 'confirmed_at') and delivery.confirmed_at:
+                elif delivery and delivery.status == 'confirmed':
                     status = Paragraph("<b><font color='blue'>CONFIRMED</font></b>", value_style)
                 else:
                     status = Paragraph("<b><font color='orange'>PENDING</font></b>", value_style)
@@ -1847,7 +2127,7 @@ def generate_individual_receipts_pdf(orders):
                 details_data = []
                 
                 # Customer Info
-                customer_name = f"{order.user.first_name or ''} {order.user.last_name or ''}".strip()
+                customer_name = order.customer_name
                 details_data.append(['Customer:', customer_name or 'Guest'])
                 
                 # Order Date
@@ -1882,11 +2162,11 @@ def generate_individual_receipts_pdf(orders):
                 items_data = [['Item', 'Qty', 'Price', 'Total']]
                 total_amount = 0
                 
-                if hasattr(order, 'items') and order.items.exists():
-                    for item in order.items.all():
-                        item_name = item.item.name if hasattr(item.item, 'name') else "Item"
-                        quantity = item.quantity if hasattr(item, 'quantity') else 0
-                        price = item.item.price if hasattr(item.item, 'price') else 0
+                if order.lines:
+                    for item in order.lines:
+                        item_name = item['name'] or "Item"
+                        quantity = item['quantity'] or 0
+                        price = item['price'] or 0
                         item_total = price * quantity
                         total_amount += item_total
                         
@@ -1931,11 +2211,7 @@ def generate_individual_receipts_pdf(orders):
                 elements.append(total_text)
                 
                 # Payment Method
-                payment_method = "COD"
-                if hasattr(order, 'payments_set') and order.payments_set.exists():
-                    payment = order.payments_set.first()
-                    if payment and hasattr(payment, 'payment_method'):
-                        payment_method = payment.payment_method or "COD"
+                payment_method = order.payment_method or "COD"
                 
                 payment_info = Paragraph(f"<b>Payment:</b> {payment_method.upper()}", value_style)
                 elements.append(payment_info)
@@ -1963,7 +2239,7 @@ def generate_individual_receipts_pdf(orders):
                 elements.append(footer)
                 
             except Exception as e:
-                print(f"Error processing order {order.order_id} for receipt: {str(e)}")
+                logger.warning("Error processing order %s for receipt: %s", order.order_id, e)
                 continue
         
         # Build PDF
@@ -1976,9 +2252,7 @@ def generate_individual_receipts_pdf(orders):
         return response
         
     except Exception as e:
-        import traceback
-        print(f"Individual receipts PDF error: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Individual receipts PDF error")
         return HttpResponse(f"Error generating individual receipts PDF: {str(e)}", status=500)
 
 
@@ -2022,12 +2296,12 @@ def generate_detailed_excel_report(orders, report_type, status):
         
         ws.merge_cells('A3:H3')
         total_amount = sum(order.total_amount for order in orders)
-        ws['A3'] = f"Orders: {orders.count()} | Total: ₱{total_amount:,.2f}"
+        ws['A3'] = f"Orders: {len(orders)} | Total: ₱{total_amount:,.2f}"
         ws['A3'].alignment = Alignment(horizontal='center', vertical='center')
         
         row_num = 5
         
-        if orders.count() == 0:
+        if len(orders) == 0:
             ws.merge_cells(f'A{row_num}:H{row_num}')
             ws[f'A{row_num}'] = "No orders found."
             ws[f'A{row_num}'].alignment = Alignment(horizontal='center')
@@ -2047,10 +2321,10 @@ def generate_detailed_excel_report(orders, report_type, status):
         # Add each order as a compact row
         for order in orders:
             try:
-                delivery = order.deliveries_set.first()
+                delivery = order  # OrderSummary carries the delivery fields
                 
                 # Customer name (compact)
-                customer_name = f"{order.user.first_name or ''} {order.user.last_name or ''}".strip()
+                customer_name = order.customer_name
                 if not customer_name:
                     customer_name = "Guest"
                 if len(customer_name) > 20:
@@ -2060,23 +2334,11 @@ def generate_detailed_excel_report(orders, report_type, status):
                 order_date = order.order_date.strftime('%m/%d %H:%M') if hasattr(order, 'order_date') else "N/A"
                 
                 # Status
-                if delivery and delivery.delivered_at:
-                    status_text = "DELIVERED"
-                elif delivery and delivery.out_for_delivery_at:
-                    status_text = "OUT FOR DELIVERY"
-                elif delivery and delivery.preparing_at:
-                    status_text = "PREPARING"
-                elif delivery and delivery.confirmed_at:
-                    status_text = "CONFIRMED"
-                else:
-                    status_text = "PENDING"
+                status_text = order.status.upper().replace('_', ' ')
                 
                 # Items count
-                if hasattr(order, 'items') and order.items.exists():
-                    items_count = order.items.count()
-                    items_text = f"{items_count} item{'s' if items_count != 1 else ''}"
-                else:
-                    items_text = "0 items"
+                items_count = order.item_count
+                items_text = f"{items_count} item{'s' if items_count != 1 else ''}"
                 
                 # Delivery Address (truncated)
                 address = "-"
@@ -2086,11 +2348,7 @@ def generate_detailed_excel_report(orders, report_type, status):
                         address = address[:23] + ".."
                 
                 # Payment Method
-                payment_method = "COD"
-                if hasattr(order, 'payments_set') and order.payments_set.exists():
-                    payment = order.payments_set.first()
-                    if payment and hasattr(payment, 'payment_method'):
-                        payment_method = payment.payment_method or "COD"
+                payment_method = order.payment_method or "COD"
                 payment_text = payment_method.upper()[:10]
                 
                 # Create row data
@@ -2141,7 +2399,7 @@ def generate_detailed_excel_report(orders, report_type, status):
                 row_num += 1
                 
             except Exception as e:
-                print(f"Error processing order {order.order_id} for Excel: {str(e)}")
+                logger.warning("Error processing order %s for Excel: %s", order.order_id, e)
                 continue
         
         # Auto-adjust column widths for compactness
@@ -2156,9 +2414,7 @@ def generate_detailed_excel_report(orders, report_type, status):
         return response
         
     except Exception as e:
-        import traceback
-        print(f"Excel generation error: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Excel generation error")
         return HttpResponse(f"Error generating Excel: {str(e)}", status=500)
 
 
@@ -2178,10 +2434,10 @@ def generate_detailed_csv_report(orders, report_type, status):
         writer.writerow([f"Generated: {datetime.now().strftime('%m/%d/%Y %I:%M%p')}"])
         
         total_amount = sum(order.total_amount for order in orders)
-        writer.writerow([f"Orders: {orders.count()}, Total: ₱{total_amount:,.2f}"])
+        writer.writerow([f"Orders: {len(orders)}, Total: ₱{total_amount:,.2f}"])
         writer.writerow([])
         
-        if orders.count() == 0:
+        if len(orders) == 0:
             writer.writerow(["No orders found."])
             return response
         
@@ -2190,10 +2446,10 @@ def generate_detailed_csv_report(orders, report_type, status):
         
         for order in orders:
             try:
-                delivery = order.deliveries_set.first()
+                delivery = order  # OrderSummary carries the delivery fields
                 
                 # Customer name (compact)
-                customer_name = f"{order.user.first_name or ''} {order.user.last_name or ''}".strip()
+                customer_name = order.customer_name
                 if not customer_name:
                     customer_name = "Guest"
                 
@@ -2201,23 +2457,11 @@ def generate_detailed_csv_report(orders, report_type, status):
                 order_date = order.order_date.strftime('%m/%d %H:%M') if hasattr(order, 'order_date') else "N/A"
                 
                 # Status
-                if delivery and delivery.delivered_at:
-                    status_text = "DELIVERED"
-                elif delivery and delivery.out_for_delivery_at:
-                    status_text = "OUT FOR DELIVERY"
-                elif delivery and delivery.preparing_at:
-                    status_text = "PREPARING"
-                elif delivery and delivery.confirmed_at:
-                    status_text = "CONFIRMED"
-                else:
-                    status_text = "PENDING"
+                status_text = order.status.upper().replace('_', ' ')
                 
                 # Items count
-                if hasattr(order, 'items') and order.items.exists():
-                    items_count = order.items.count()
-                    items_text = f"{items_count} item{'s' if items_count != 1 else ''}"
-                else:
-                    items_text = "0 items"
+                items_count = order.item_count
+                items_text = f"{items_count} item{'s' if items_count != 1 else ''}"
                 
                 # Delivery Address (truncated)
                 address = "-"
@@ -2227,11 +2471,7 @@ def generate_detailed_csv_report(orders, report_type, status):
                         address = address[:28] + ".."
                 
                 # Payment Method
-                payment_method = "COD"
-                if hasattr(order, 'payments_set') and order.payments_set.exists():
-                    payment = order.payments_set.first()
-                    if payment and hasattr(payment, 'payment_method'):
-                        payment_method = payment.payment_method or "COD"
+                payment_method = order.payment_method or "COD"
                 payment_text = payment_method.upper()
                 
                 # Notes (truncated)
@@ -2257,17 +2497,15 @@ def generate_detailed_csv_report(orders, report_type, status):
                 writer.writerow(row)
                 
             except Exception as e:
-                print(f"Error processing order {order.order_id} for CSV: {str(e)}")
+                logger.warning("Error processing order %s for CSV: %s", order.order_id, e)
                 continue
         
         # Add summary row
         writer.writerow([])
-        writer.writerow(['SUMMARY', f'Total Orders: {orders.count()}', f'Total Amount: ₱{total_amount:,.2f}'])
+        writer.writerow(['SUMMARY', f'Total Orders: {len(orders)}', f'Total Amount: ₱{total_amount:,.2f}'])
         
         return response
         
     except Exception as e:
-        import traceback
-        print(f"CSV generation error: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("CSV generation error")
         return HttpResponse(f"Error generating CSV: {str(e)}", status=500)
\ No newline at end of file